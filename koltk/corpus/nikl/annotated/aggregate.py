@@ -0,0 +1,230 @@
+"""Label counts rolled up by the categories of the tagsets
+
+A :class:`Hierarchy` maps the tags of a tagset of :mod:`.tag` (``POS_TAGS``,
+``NE_TAGS``, ``SYN_TAGS``, ``FUN_TAGS``) to their categories at one level
+(``'cat1'``, ``'cat2'``, ...). Labels are coded into an array of integers as
+they are read, and the histograms of all the groups (documents, topics, ...)
+are made with a ``bincount`` over ``group * number of categories + category``
+for each chunk of :data:`CHUNK_SIZE` codes, so that the memory does not grow
+with the size of the corpus.
+
+Labels that are not in the tagset are counted in the ``'<unk>'`` column and
+listed in :attr:`Aggregation.unknown`. DP labels are split into their
+syntactic and function halves (``NP_SBJ`` → ``NP`` and ``SBJ``); a label
+without a function tag has the function ``'<none>'``. The fine NE labels of
+the corpora (``PS_NAME``, ``LCP_COUNTRY``, ``OGG_ECONOMY``, ...) are counted
+as their tags of ``NE_TAGS`` (see :func:`.coarse_ne_tag`).
+
+Requires NumPy.
+
+::
+
+    >>> agg = aggregate('NXMP1902008040.json', layer='pos', level='cat1', by='topic')
+    >>> agg.table()['사회']
+    {'체언': 10235, '용언': 4522, ...}
+    >>> agg.unknown
+    Counter({'NNGX': 2})
+"""
+
+from array import array
+from collections import namedtuple, Counter
+from itertools import repeat
+
+from .optional import np, require_numpy
+from .tag import POS_TAGS, NE_TAGS, SYN_TAGS, FUN_TAGS, coarse_ne_tag
+from .archive import open_binary
+from .stream import DocumentScanner, corpus_files
+
+
+NONE = '<none>'
+UNKNOWN = '<unk>'
+
+#: number of label codes counted at once by :func:`aggregate`
+CHUNK_SIZE = 1 << 20
+
+
+class Hierarchy:
+    """Mapping of the tags of a tagset to their categories at a level.
+
+    Tag codes are the indexes of :attr:`tags`, followed by the codes of
+    ``'<none>'`` and ``'<unk>'``. :attr:`mapping` is the array of the category
+    codes of the tag codes, and the categories are :attr:`categories`, also
+    followed by ``'<none>'`` and ``'<unk>'``.
+
+    :param tagset: dict of tag -> dict of level -> category, as in :mod:`.tag`
+    :param level: 'tag' for the tags themselves, or a level such as 'cat1'
+    """
+    def __init__(self, tagset, level='cat1'):
+        require_numpy('Hierarchy')
+
+        self.level = level
+        self.tags = list(tagset)
+        if level == 'tag':
+            cats = self.tags
+        else:
+            try:
+                cats = [tagset[tag][level] for tag in self.tags]
+            except KeyError:
+                raise ValueError('level {} is not in the tagset'.format(level))
+
+        # categories in the order of their first tag
+        self.categories = list(dict.fromkeys(cats)) + [NONE, UNKNOWN]
+        cat_code = {c: i for i, c in enumerate(self.categories)}
+        self.code = {tag: i for i, tag in enumerate(self.tags)}
+        self.none_code = len(self.tags)
+        self.unknown_code = len(self.tags) + 1
+        self.mapping = np.array([cat_code[c] for c in cats] + [cat_code[NONE], cat_code[UNKNOWN]],
+                                dtype=np.int64)
+
+    def tag_code(self, label, unknown=None):
+        """Tag code of a label. None is coded as ``'<none>'``.
+
+        :param unknown: a Counter to which an unknown label is added
+        """
+        if label is None:
+            return self.none_code
+        code = self.code.get(label)
+        if code is None:
+            if unknown is not None:
+                unknown[label] += 1
+            return self.unknown_code
+        return code
+
+    def encode(self, labels, unknown=None):
+        """Array of the tag codes of the labels, see :meth:`tag_code`."""
+        return np.fromiter((self.tag_code(x, unknown) for x in labels), dtype=np.int64)
+
+    def rollup(self, codes, groups=None, n_groups=None):
+        """Histogram of the categories of tag codes.
+
+        :param groups: group number of each code, or None for one group
+        :param n_groups: number of groups, ``max(groups) + 1`` if None
+        :return: array of ``len(categories)`` counts, or of shape
+          ``(n_groups, len(categories))`` with ``groups``
+        """
+        return rollup(codes, self.mapping, len(self.categories), groups, n_groups)
+
+
+def rollup(codes, mapping, n_categories, groups=None, n_groups=None):
+    """Histogram of ``mapping[codes]`` per group with a single bincount.
+
+    See :meth:`Hierarchy.rollup`.
+    """
+    cats = np.asarray(mapping)[np.asarray(codes, dtype=np.int64)]
+    if groups is None:
+        return np.bincount(cats, minlength=n_categories)
+
+    groups = np.asarray(groups, dtype=np.int64)
+    if n_groups is None:
+        n_groups = int(groups.max()) + 1 if len(groups) else 0
+    counts = np.bincount(groups * n_categories + cats, minlength=n_groups * n_categories)
+    return counts.reshape(n_groups, n_categories)
+
+
+def split_dp_label(label):
+    """``(syntactic tag, function tag or None)`` of a DP label."""
+    syn, sep, fun = label.partition('_')
+    return syn, (fun if sep else None)
+
+
+def _pos_labels(sentence):
+    return [m['label'] for m in sentence.get('morpheme') or []]
+
+
+def _ne_labels(sentence):
+    return [coarse_ne_tag(ne['label']) for ne in sentence.get('NE', sentence.get('ne')) or []]
+
+
+def _syn_labels(sentence):
+    return [split_dp_label(dp['label'])[0] for dp in sentence.get('DP') or []]
+
+
+def _fun_labels(sentence):
+    return [split_dp_label(dp['label'])[1] for dp in sentence.get('DP') or []]
+
+
+#: layer name -> (tagset, function of a raw sentence dict to its labels)
+LAYERS = {
+    'pos': (POS_TAGS, _pos_labels),
+    'ne': (NE_TAGS, _ne_labels),
+    'syn': (SYN_TAGS, _syn_labels),
+    'fun': (FUN_TAGS, _fun_labels),
+}
+
+#: group names of :func:`aggregate`
+GROUPS = ('corpus', 'file', 'document', 'topic', 'publisher', 'date')
+
+
+class Aggregation(namedtuple('Aggregation', ['groups', 'categories', 'counts', 'unknown'])):
+    """Category counts per group.
+
+    - groups: group names, the rows of ``counts``
+    - categories: category names, the columns of ``counts``
+    - counts: array of shape ``(len(groups), len(categories))``
+    - unknown: Counter of the labels that are not in the tagset
+    """
+    __slots__ = ()
+
+    def table(self, zeros=False):
+        """dict of group -> dict of category -> count"""
+        return {g: {c: int(n) for c, n in zip(self.categories, row) if zeros or n}
+                for g, row in zip(self.groups, self.counts)}
+
+    def total(self):
+        """dict of category -> count over all the groups"""
+        return {c: int(n) for c, n in zip(self.categories, self.counts.sum(axis=0)) if n}
+
+
+def aggregate(path, layer='pos', level='cat1', by='corpus', pattern='*.json'):
+    """Rolled up label counts of a corpus file or directory.
+
+    :param layer: 'pos' (morphemes), 'ne', 'syn' or 'fun' (halves of DP labels)
+    :param level: 'tag' or a category level of the tagset, e.g. 'cat1'
+    :param by: 'corpus', 'file', 'document', or a document metadata member:
+      'topic', 'publisher' or 'date'
+    :return: :class:`Aggregation`
+    """
+    if layer not in LAYERS:
+        raise ValueError('layer must be one of {}: {}'.format(tuple(LAYERS), layer))
+    if by not in GROUPS:
+        raise ValueError('by must be one of {}: {}'.format(GROUPS, by))
+
+    tagset, labels_of = LAYERS[layer]
+    hierarchy = Hierarchy(tagset, level)
+    tag_code = hierarchy.tag_code
+    unknown = Counter()
+    group_code = {}     # group name -> group number, in the order of appearance
+    counts = np.zeros((0, len(hierarchy.categories)), dtype=np.int64)
+    codes, groups = array('i'), array('i')
+    for filename in corpus_files(path, pattern):
+        with open_binary(filename) as file:
+            for begin, end, doc in DocumentScanner(file):
+                before = len(codes)
+                for s in doc.get('sentence', []):
+                    codes.extend(tag_code(x, unknown) for x in labels_of(s))
+                if by == 'corpus':
+                    name = path
+                elif by == 'file':
+                    name = filename
+                elif by == 'document':
+                    name = doc.get('id')
+                else:
+                    name = (doc.get('metadata') or {}).get(by)
+                group = group_code.setdefault(name, len(group_code))
+                groups.extend(repeat(group, len(codes) - before))
+                if len(codes) >= CHUNK_SIZE:
+                    counts = _add_counts(counts, hierarchy, codes, groups, len(group_code))
+                    codes, groups = array('i'), array('i')
+
+    counts = _add_counts(counts, hierarchy, codes, groups, len(group_code))
+    return Aggregation(list(group_code), hierarchy.categories, counts, unknown)
+
+
+def _add_counts(counts, hierarchy, codes, groups, n_groups):
+    """``counts`` with rows up to ``n_groups`` and the histogram of a chunk added."""
+    chunk = hierarchy.rollup(np.frombuffer(codes, dtype=np.intc), np.frombuffer(groups, dtype=np.intc),
+                             n_groups)
+    if len(counts) < n_groups:
+        counts = np.vstack([counts, np.zeros((n_groups - len(counts), counts.shape[1]), dtype=counts.dtype)])
+    counts += chunk
+    return counts
@@ -0,0 +1,121 @@
+"""asyncio API for NIKL Annotated Corpus JSON files
+
+File reads run in a thread off the event loop, and building the
+:class:`.Document` objects runs in an executor, which may be a
+:class:`concurrent.futures.ProcessPoolExecutor` for large documents.
+``None`` is the default executor of the loop.
+
+::
+
+    >>> async for document in AsyncNiklansonReader('NXRW1900000001.json'):
+    ...     print(document.id)
+
+    >>> corpora = await load_many(filenames, limit=4)
+
+Cancelling the task that awaits these coroutines stops the reading; the file
+is closed after the read in progress, if any, returns.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+from .object import Corpus, Document
+from .archive import open_binary
+from .stream import DocumentScanner
+
+
+_END = object()
+
+
+def _build_document(dic):
+    return Document.from_dict(dic)
+
+
+def _build(data):
+    dic = json.loads(data.decode('utf-8-sig'))
+    if 'document' in dic:
+        return Corpus.from_dict(dic)
+    elif 'sentence' in dic:
+        return Document.from_dict(dic)
+    else:
+        raise ValueError('The top level object is neither a corpus nor a document.')
+
+
+def _read(filename):
+    with open_binary(filename) as file:
+        return file.read()
+
+
+class AsyncNiklansonReader:
+    """Async iterator of :class:`.Document` in a NIKL JSON file.
+
+    Documents are read one at a time as in :class:`.NiklansonStreamReader`.
+
+    :param filename: corpus or document JSON file name
+    :param executor: executor that builds the documents, None for the
+      default executor of the running loop
+    """
+    def __init__(self, filename, executor=None, chunk_size=1 << 20):
+        self.filename = filename
+        self.executor = executor
+        self.chunk_size = chunk_size
+        self.header = {}
+
+    def __aiter__(self):
+        return self.documents()
+
+    async def documents(self):
+        loop = asyncio.get_running_loop()
+        # one thread per reader keeps the reads and the final close in order
+        io = ThreadPoolExecutor(max_workers=1)
+        file = await loop.run_in_executor(io, open_binary, self.filename)
+        try:
+            scanner = DocumentScanner(file, chunk_size=self.chunk_size)
+            self.header = scanner.header
+            it = iter(scanner)
+            while True:
+                item = await loop.run_in_executor(io, next, it, _END)
+                if item is _END:
+                    break
+                yield await loop.run_in_executor(self.executor, _build_document, item[2])
+        finally:
+            io.submit(file.close)
+            io.shutdown(wait=False)
+
+    def __repr__(self):
+        return 'AsyncNiklansonReader(filename={})'.format(self.filename)
+
+
+async def load(filename, executor=None):
+    """Load a NIKL JSON file into a :class:`.Corpus` or a :class:`.Document`.
+
+    :param executor: executor that decodes and builds the objects, None for
+      the default executor of the running loop
+    """
+    loop = asyncio.get_running_loop()
+    data = await loop.run_in_executor(None, _read, filename)
+    return await loop.run_in_executor(executor, _build, data)
+
+
+async def load_many(filenames, limit=4, executor=None, return_exceptions=False):
+    """Load NIKL JSON files concurrently.
+
+    Return the list of loaded objects in the order of ``filenames``.
+
+    :param limit: maximum number of files being loaded at a time
+    :param return_exceptions: return exceptions in the list instead of
+      raising the first one, as in :func:`asyncio.gather`
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def bounded(filename):
+        async with semaphore:
+            return await load(filename, executor)
+
+    return await asyncio.gather(*(bounded(f) for f in filenames),
+                                return_exceptions=return_exceptions)
@@ -0,0 +1,233 @@
+"""Alignment of morphemes to the characters of their word
+
+The forms of NIKL morphemes are lemma forms, which may differ from the word
+form through contractions and irregular conjugations::
+
+    했다. = 하/XSV + 였/EP + 다/EF + ./SF
+
+:class:`MorphemeAligner` gives each morpheme a character span ``(begin,
+end)`` in its word. When the morpheme forms spell the word, the spans follow
+from their lengths. Otherwise the morphemes and the word are decomposed into
+jamo (a final consonant morpheme such as ``ㄴ/ETM`` matches the final consonant
+of a syllable) and aligned by edit distance; each morpheme spans the
+characters of the jamo aligned with its own. In the example, 하 and 였 both
+span 했 ``(0, 1)``. A morpheme with no aligned jamo gets an empty span at the
+end of the previous one. The characters left between spans are given to the
+morpheme before them.
+
+The same words with the same morphemes occur over and over, so the
+alignments are memoized in a bounded LRU cache.
+
+::
+
+    >>> aligner = MorphemeAligner()
+    >>> aligner.align('했다.', ('하', '였', '다', '.'))
+    ((0, 1), (0, 1), (1, 2), (2, 3))
+    >>> for sentence_id, spans in aligner.corpus('NXMP1902008040.json'):
+    ...     print(sentence_id, spans)
+"""
+
+from functools import lru_cache
+
+from .archive import open_binary
+from .stream import DocumentScanner, corpus_files
+
+
+_INITIALS = 'ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ'
+_VOWELS = 'ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ'
+_FINALS = ('', 'ㄱ', 'ㄲ', 'ㄳ', 'ㄴ', 'ㄵ', 'ㄶ', 'ㄷ', 'ㄹ', 'ㄺ', 'ㄻ', 'ㄼ', 'ㄽ', 'ㄾ',
+           'ㄿ', 'ㅀ', 'ㅁ', 'ㅂ', 'ㅄ', 'ㅅ', 'ㅆ', 'ㅇ', 'ㅈ', 'ㅊ', 'ㅋ', 'ㅌ', 'ㅍ', 'ㅎ')
+_VOWEL_SET = frozenset(_VOWELS)
+
+DEFAULT_CACHE_SIZE = 1 << 16
+
+
+def _tokens(text):
+    """List of ``(jamo, role, character index)``. The role is 'L' (initial),
+    'V' (vowel), 'T' (final) or '' for the other characters, including
+    standalone jamo."""
+    tokens = []
+    for i, ch in enumerate(text):
+        code = ord(ch) - 0xAC00
+        if 0 <= code < 11172:
+            tokens.append((_INITIALS[code // 588], 'L', i))
+            tokens.append((_VOWELS[code % 588 // 28], 'V', i))
+            final = _FINALS[code % 28]
+            if final:
+                tokens.append((final, 'T', i))
+        else:
+            tokens.append((ch, '', i))
+    return tokens
+
+
+def jamo(text):
+    """Compatibility jamo of a text and the index of the character of each jamo.
+
+    Characters other than Hangul syllables are kept as they are.
+
+    ::
+
+        >>> jamo('했다')
+        ('ㅎㅐㅆㄷㅏ', [0, 0, 0, 1, 1])
+    """
+    tokens = _tokens(text)
+    return ''.join(t[0] for t in tokens), [t[2] for t in tokens]
+
+
+def _substitution_cost(a, b):
+    if a[0] == b[0] and (a[1] == b[1] or a[1] == '' or b[1] == ''):
+        return 0
+    # a vowel for a vowel, or a consonant for a consonant (ㅏ/ㅐ in 하+였 → 했)
+    return 1 if (a[0] in _VOWEL_SET) == (b[0] in _VOWEL_SET) else 2
+
+
+def _deletion_cost(a):
+    # the silent initial ㅇ disappears in contractions (이+다 → 다, 하+였 → 했)
+    return 0.5 if a[0] == 'ㅇ' and a[1] == 'L' else 1
+
+
+def _align_jamo(word, forms):
+    """Spans by the edit distance alignment of the jamo."""
+    b = _tokens(word)
+    a, aowner = [], []
+    for k, form in enumerate(forms):
+        t = _tokens(form)
+        a.extend(t)
+        aowner.extend([k] * len(t))
+
+    n, m = len(a), len(b)
+    # cost[i][j]: distance between a[:i] and b[:j]
+    cost = [[0] * (m + 1) for _ in range(n + 1)]
+    for i in range(1, n + 1):
+        cost[i][0] = cost[i - 1][0] + _deletion_cost(a[i - 1])
+    for j in range(1, m + 1):
+        cost[0][j] = j
+    for i in range(1, n + 1):
+        row, prev, ai = cost[i], cost[i - 1], a[i - 1]
+        delete = _deletion_cost(ai)
+        for j in range(1, m + 1):
+            row[j] = min(prev[j - 1] + _substitution_cost(ai, b[j - 1]),
+                         prev[j] + delete, row[j - 1] + 1)
+
+    # back trace, preferring the diagonal
+    chars = [[] for _ in forms]
+    i, j = n, m
+    while i > 0 and j > 0:
+        c = cost[i][j]
+        if c == cost[i - 1][j - 1] + _substitution_cost(a[i - 1], b[j - 1]):
+            chars[aowner[i - 1]].append(b[j - 1][2])
+            i, j = i - 1, j - 1
+        elif c == cost[i - 1][j] + _deletion_cost(a[i - 1]):
+            i -= 1
+        else:
+            j -= 1
+
+    spans = []
+    end = 0
+    for cs in chars:
+        if cs:
+            begin = max(min(cs), spans[-1][0] if spans else 0)
+            end = max(cs) + 1
+            spans.append([begin, end])
+        else:
+            spans.append([end, end])
+
+    # give the characters left between the spans to the morpheme before them
+    nonempty = [k for k, (s, e) in enumerate(spans) if e > s]
+    if nonempty:
+        spans[nonempty[0]][0] = 0
+        for k, k2 in zip(nonempty, nonempty[1:]):
+            if spans[k][1] < spans[k2][0]:
+                spans[k][1] = spans[k2][0]
+        spans[nonempty[-1]][1] = len(word)
+    return tuple((s, e) for s, e in spans)
+
+
+def _align(word, forms):
+    if ''.join(forms) == word:
+        spans = []
+        b = 0
+        for form in forms:
+            spans.append((b, b + len(form)))
+            b += len(form)
+        return tuple(spans)
+    return _align_jamo(word, forms)
+
+
+def _word_spans(sentence):
+    words = sentence.get('word')
+    if words:
+        return [(w['form'], w['begin']) for w in words]
+
+    spans = []
+    b = 0
+    form = sentence.get('form') or ''
+    for wform in form.split():
+        b = form.index(wform, b)
+        spans.append((wform, b))
+        b += len(wform)
+    return spans
+
+
+class MorphemeAligner:
+    """Memoized aligner of morphemes to the characters of their word.
+
+    :param cache_size: maximum number of ``(word form, morpheme forms)``
+      pairs kept in the cache, None for no limit
+    """
+    def __init__(self, cache_size=DEFAULT_CACHE_SIZE):
+        self.align = lru_cache(maxsize=cache_size)(_align)
+        self.align.__doc__ = """Tuple of the ``(begin, end)`` spans of morpheme forms in a word form.
+
+        :param word: word form
+        :param forms: tuple of morpheme forms
+        """
+
+    def cache_info(self):
+        return self.align.cache_info()
+
+    def sentence(self, sentence):
+        """List of the ``(begin, end)`` spans of the morphemes of a sentence,
+        in sentence offsets, in the order of the morphemes.
+
+        :param sentence: a :class:`.Sentence` or a raw sentence dict
+        """
+        morphs = sentence.get('morpheme') or []
+        if not morphs:
+            return []
+        words = _word_spans(sentence)
+        spans = []
+        i = 0
+        while i < len(morphs):
+            word_id = morphs[i]['word_id']
+            j = i + 1
+            while j < len(morphs) and morphs[j]['word_id'] == word_id:
+                j += 1
+            if 1 <= word_id <= len(words):
+                wform, wbegin = words[word_id - 1]
+                forms = tuple(m['form'] for m in morphs[i:j])
+                spans.extend((wbegin + b, wbegin + e) for b, e in self.align(wform, forms))
+            else:
+                spans.extend((None, None) for _ in range(i, j))
+            i = j
+        return spans
+
+    def document(self, doc):
+        """List of the :meth:`sentence` spans of the sentences of a document."""
+        return [self.sentence(s) for s in doc.get('sentence', [])]
+
+    def corpus(self, path, pattern='*.json'):
+        """Iterate ``(sentence id, spans)`` over a corpus file or directory."""
+        for filename in corpus_files(path, pattern):
+            with open_binary(filename) as file:
+                for begin, end, doc in DocumentScanner(file):
+                    for s in doc.get('sentence', []):
+                        yield s.get('id'), self.sentence(s)
+
+
+_default = MorphemeAligner()
+
+
+def align_morphemes(word, forms):
+    """:meth:`MorphemeAligner.align` with a shared aligner."""
+    return _default.align(word, tuple(forms))
@@ -0,0 +1,119 @@
+"""Compressed and archived NIKL Annotated Corpus files
+
+NIKL distributes the corpora as zip archives. :func:`open_binary` opens,
+without extracting anything to the disk,
+
+- a member of a zip archive: ``'NIKL_NE_2020.zip/NXNE2000211080.json'``
+- a gzip file: ``'NXNE2000211080.json.gz'``
+- a zstd file: ``'NXNE2000211080.json.zst'``, if the ``zstandard`` module is
+  installed
+- a plain file
+
+The decompressed data is streamed to the reader as it is read. Documents
+can be read at their byte ranges by seeking only in plain files
+(:func:`is_seekable`): the other files are decompressed from the start,
+so they are read in one forward pass (see :func:`.load_documents`).
+"""
+
+import os
+import re
+import io
+import gzip
+import fnmatch
+import zipfile
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+_ZIP_MEMBER = re.compile(r'^(.*?\.zip)[/\\](.+)$', re.IGNORECASE)
+
+COMPRESSED_EXTENSIONS = ('.gz', '.zst')
+
+
+def split_archive_path(path):
+    """Split a path into a zip archive into the archive and the member names.
+
+    Return ``(path, None)`` if the path does not point into a zip archive.
+    """
+    path = os.fspath(path)
+    m = _ZIP_MEMBER.match(path)
+    if m and os.path.isfile(m.group(1)):
+        return m.group(1), m.group(2).replace('\\', '/')
+
+    return path, None
+
+
+def open_binary(path):
+    """Open a plain, compressed or archived file for reading in binary mode."""
+    path, member = split_archive_path(path)
+    if member is not None:
+        with zipfile.ZipFile(path) as zf:
+            # the member keeps the archive file open after zf is closed
+            return zf.open(member)
+
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    elif path.endswith('.zst'):
+        if zstandard is None:
+            raise ImportError('zstandard module is required to read {}'.format(path))
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+    else:
+        return open(path, 'rb')
+
+
+def is_seekable(path):
+    """True if byte offsets of the file can be reached by seeking, i.e. for a
+    plain file. Compressed files and the members of zip archives can only be
+    read forward efficiently.
+    """
+    path, member = split_archive_path(path)
+    return member is None and not path.endswith(COMPRESSED_EXTENSIONS)
+
+
+def is_stream(file):
+    """True for a file object of :func:`open_binary` that decompresses its
+    data, where a seek reads (or fails to read) from the start.
+    """
+    if isinstance(file, (gzip.GzipFile, zipfile.ZipExtFile)):
+        return True
+    return zstandard is not None and type(file).__name__.startswith('ZstdDecompressionReader')
+
+
+def open_text(path, encoding='utf-8'):
+    """Open a plain, compressed or archived file for reading in text mode."""
+    return io.TextIOWrapper(open_binary(path), encoding=encoding)
+
+
+def uncompressed_name(path):
+    """File name without the compression extension."""
+    for ext in COMPRESSED_EXTENSIONS:
+        if path.endswith(ext):
+            return path[:-len(ext)]
+    return path
+
+
+def archive_members(path, pattern='*.json'):
+    """Sorted paths of the members of a zip archive matching the pattern."""
+    with zipfile.ZipFile(path) as zf:
+        names = [info.filename for info in zf.infolist()
+                 if not info.is_dir() and fnmatch.fnmatch(os.path.basename(info.filename), pattern)]
+
+    return [path + '/' + name for name in sorted(names)]
+
+
+def expand(path, pattern='*.json'):
+    """Corpus file paths in a file name: the members matching the pattern for
+    a zip archive, or the file itself.
+    """
+    if path.lower().endswith('.zip') and os.path.isfile(path):
+        return archive_members(path, pattern)
+
+    return [path]
+
+
+def is_corpus_file(name, pattern='*.json'):
+    """True for zip archives and for the (compressed) files matching the pattern."""
+    return name.lower().endswith('.zip') or fnmatch.fnmatch(uncompressed_name(name), pattern)
@@ -7,12 +7,83 @@ try:
 except ImportError:
     import json
 
+_ATOMS = frozenset([str, int, float, bool, type(None)])
+
+
+def _clone_value(value, old_parent, new_parent):
+    """Deep copy of a JSON value. Niklanson objects whose parent is
+    ``old_parent`` are re-linked to ``new_parent``."""
+    if type(value) in _ATOMS:
+        return value
+    elif isinstance(value, (Niklanson, NiklansonList)):
+        parent = value.parent
+        return value.clone(parent=new_parent if parent is old_parent else parent)
+    elif type(value) is list:
+        return [_clone_value(x, old_parent, new_parent) for x in value]
+    elif type(value) is dict:
+        return {k: _clone_value(v, old_parent, new_parent) for k, v in value.items()}
+    else:
+        return value
+
+
 class Niklanson(dict):
     """
     NIKL Annotated Corpus JSON 
     """ 
     def __init__(self, parent=None):
         self.__parent = parent
+
+    def clone(self, deep=True, parent=None):
+        """Copy of the object.
+
+        Members that are Niklanson objects have their parent re-linked to the
+        copy.
+
+        A shallow copy (``deep=False``) shares the layers (lists and objects)
+        with the original until they are accessed: the first access through
+        an attribute, ``[]`` or :meth:`get` copies the layer, and assigning a
+        layer replaces it. It makes edited variants of a sentence cheap, as
+        the layers that are not touched are never copied. Layers seen through
+        :meth:`items` or :meth:`values` without being accessed are those of
+        the original, and must not be changed.
+
+        Only the shallow copies check their accesses, through a subclass of
+        their class (see :class:`_SharedLayers`), until all their layers are
+        copied or replaced. Other objects are plain dicts to read.
+
+        ::
+
+            >>> variant = sentence.clone(deep=False)
+            >>> variant.form = variant.form.replace('철수', '영희')
+            >>> variant.NE[0].form = '영희'     # only the NE layer is copied
+
+        :param parent: parent of the copy. The parent of the original if None.
+        """
+        cls = _own_class(self)
+        shared = self.__dict__.get('_shared_layers', {})
+        obj = cls.__new__(cls)
+        # private attributes, e.g. the sentence number
+        obj.__dict__.update(self.__dict__)
+        obj.__dict__.pop('_shared_layers', None)
+        obj.__parent = parent if parent is not None else self.parent
+        if deep:
+            for key, value in dict.items(self):
+                dict.__setitem__(obj, key, _clone_value(value, shared.get(key, self), obj))
+        else:
+            dict.update(obj, self)
+            # member name -> the object that its value is re-linked from
+            layers = {key: shared.get(key, self) for key, value in dict.items(self)
+                      if isinstance(value, (list, dict))}
+            if layers:
+                obj._shared_layers = layers
+                obj.__class__ = _shared_class(cls)
+        return obj
+
+    def __copy__(self):
+        return self.clone(deep=False)
+
+    def __deepcopy__(self, memo):
+        return self.clone()
         
     @classmethod
     def from_dict(cls, dic, parent=None):
@@ -27,7 +98,7 @@ class Niklanson(dict):
 
     @property
     def parent(self):
-        return self.__parent
+        return self.__dict__.get('_Niklanson__parent')
     
     @property
     def slice(self):
@@ -65,6 +136,65 @@ class Niklanson(dict):
         else:
             del self[name]
 
+class _SharedLayers:
+    """Mixin of the class of a shallow :meth:`Niklanson.clone` that still
+    shares layers with its original. A shared layer is copied at its first
+    access, and the object is given back its own class when no layer is
+    shared any more.
+    """
+    def __unshare(self, key):
+        origin = self._shared_layers.pop(key)
+        dict.__setitem__(self, key, _clone_value(dict.__getitem__(self, key), origin, self))
+        self.__release()
+
+    def __release(self):
+        if not self._shared_layers:
+            del self._shared_layers
+            self.__class__ = _own_class(self)
+
+    def __getitem__(self, key):
+        if key in self._shared_layers:
+            self.__unshare(key)
+        return dict.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        if key in self._shared_layers:
+            self.__unshare(key)
+        return dict.get(self, key, default)
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        if self._shared_layers.pop(key, None) is not None:
+            self.__release()
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        if self._shared_layers.pop(key, None) is not None:
+            self.__release()
+
+    def __reduce_ex__(self, protocol):
+        # pickle a copy of the layers under the own class
+        for key in list(self._shared_layers):
+            self.__unshare(key)
+        return self.__reduce_ex__(protocol)
+
+
+# own class -> its class for shallow clones
+_SHARED_CLASSES = {}
+
+
+def _shared_class(cls):
+    shared = _SHARED_CLASSES.get(cls)
+    if shared is None:
+        shared = _SHARED_CLASSES[cls] = type(cls.__name__, (_SharedLayers, cls), {'__module__': cls.__module__})
+    return shared
+
+
+def _own_class(obj):
+    cls = type(obj)
+    return cls.__bases__[1] if issubclass(cls, _SharedLayers) else cls
+
+
 class NiklansonList(list):
     """NiklansonList: NIKL ANnotated Corpus JSON List
 
@@ -76,13 +206,33 @@ class NiklansonList(list):
         self.__parent = parent
         
         if type(xlist) is type(self):
-            # TODO: implement clone
-            raise NotImplementedError
+            self.__init_from_clone(xlist, parent)
         elif type(xlist) is list:
             self.__init_from_list(xlist, parent)
 
         self.postprocess()
 
+    def clone(self, deep=True, parent=None):
+        """Copy of the list. Elements are copied with :meth:`Niklanson.clone`
+        if ``deep``, and shared with the original otherwise.
+
+        :param parent: parent of the copy. The parent of the original if None.
+        """
+        obj = type(self).__new__(type(self))
+        obj.__dict__.update(self.__dict__)
+        obj.__parent = parent if parent is not None else self.parent
+        if deep:
+            obj.__init_from_clone(self, obj.__parent)
+        else:
+            list.extend(obj, self)
+        return obj
+
+    def __copy__(self):
+        return self.clone(deep=False)
+
+    def __deepcopy__(self, memo):
+        return self.clone()
+
     @property
     def parent(self):
         return self.__parent
@@ -93,3 +243,8 @@ class NiklansonList(list):
     def __init_from_list(self, xlist, parent):
         for x in xlist:
             list.append(self, self.element_type.from_dict(x, parent=parent))
+
+    def __init_from_clone(self, xlist, parent):
+        old_parent = xlist.parent
+        for x in xlist:
+            list.append(self, _clone_value(x, old_parent, parent))
@@ -0,0 +1,178 @@
+"""Length-bucketed, padded batches for model training
+
+:class:`BucketBatchIterator` codes the sentences of a corpus once into flat
+integer arrays. Each epoch, the sentences are shuffled with a fixed seed,
+sorted by length within pools of batches, so that the sentences of a batch
+have similar lengths, and cut into batches that are shuffled again. A batch
+is built with one gather into padded arrays.
+
+At the word level the labels and heads are those of the DP layer (heads are
+1-based, 0 for the root). At the morpheme level the labels are the POS tags
+of the morphemes and there are no heads.
+
+Requires NumPy.
+
+::
+
+    >>> batches = BucketBatchIterator.from_corpus('NXDP1902008040.json', unit='word', batch_size=32)
+    >>> for epoch in range(10):
+    ...     for batch in batches:
+    ...         train(batch.forms, batch.labels, batch.heads, batch.mask)
+"""
+
+from array import array
+from collections import namedtuple
+
+from .optional import np, require_numpy
+from .coding import Vocabulary, PAD, pad
+from .archive import open_binary
+from .stream import DocumentScanner, corpus_files
+
+
+Batch = namedtuple('Batch', ['ids', 'forms', 'labels', 'heads', 'mask', 'lengths'])
+Batch.__doc__ = """A padded batch.
+
+- ids: list of sentence ids
+- forms: coded forms, ``(batch size, max length)``
+- labels: coded labels, same shape as forms
+- heads: heads of the words, same shape as forms, or None for morphemes
+- mask: True for the real units, False for the padding
+- lengths: lengths of the sentences
+"""
+
+
+def _word_units(sentence):
+    words = sentence.get('word')
+    if words:
+        forms = [w['form'] for w in words]
+    else:
+        forms = (sentence.get('form') or '').split()
+    labels = [None] * len(forms)
+    heads = [0] * len(forms)
+    for dp in sentence.get('DP') or []:
+        i = dp['word_id'] - 1
+        if 0 <= i < len(forms):
+            labels[i] = dp.get('label')
+            heads[i] = dp['head'] if dp['head'] > 0 else 0
+    return forms, labels, heads
+
+
+def _morpheme_units(sentence):
+    morphs = sentence.get('morpheme') or []
+    return [m['form'] for m in morphs], [m['label'] for m in morphs], None
+
+
+class BucketBatchIterator:
+    """Iterable of padded :class:`Batch`\\ es of sentences of similar lengths.
+
+    :param sentences: iterable of :class:`.Sentence`\\ s or raw sentence dicts
+    :param unit: 'word' or 'morpheme'
+    :param batch_size: number of sentences in a batch
+    :param vocab: :class:`.Vocabulary` of the forms. A new one is built and
+      frozen if None.
+    :param label_vocab: :class:`.Vocabulary` of the labels, as ``vocab``
+    :param seed: seed of the shuffling. Epoch ``e`` uses ``(seed, e)``.
+    :param shuffle: shuffle the sentences and the batches
+    :param pool_size: number of batches sorted together. None sorts the whole
+      corpus, which minimizes padding but makes the batches less random.
+    :param drop_last: drop the last incomplete batch of each pool
+    """
+    def __init__(self, sentences, unit='word', batch_size=32, vocab=None, label_vocab=None,
+                 seed=0, shuffle=True, pool_size=100, drop_last=False):
+        require_numpy('BucketBatchIterator')
+        if unit not in ('word', 'morpheme'):
+            raise ValueError('unit must be word or morpheme: {}'.format(unit))
+
+        self.unit = unit
+        self.batch_size = batch_size
+        self.vocab = vocab if vocab is not None else Vocabulary()
+        self.label_vocab = label_vocab if label_vocab is not None else Vocabulary()
+        self.seed = seed
+        self.shuffle = shuffle
+        self.pool_size = pool_size
+        self.drop_last = drop_last
+        self.epoch = 0
+        self.__load(sentences)
+        self.vocab.freeze()
+        self.label_vocab.freeze()
+
+    @classmethod
+    def from_corpus(cls, path, pattern='*.json', **kwargs):
+        """Iterator over the sentences of a corpus file or directory."""
+        def sentences():
+            for filename in corpus_files(path, pattern):
+                with open_binary(filename) as file:
+                    for begin, end, doc in DocumentScanner(file):
+                        yield from doc.get('sentence', [])
+
+        return cls(sentences(), **kwargs)
+
+    def __load(self, sentences):
+        units = _word_units if self.unit == 'word' else _morpheme_units
+        forms, labels, heads = array('i'), array('i'), array('i')
+        offsets = array('q', [0])
+        self.ids = []
+        for s in sentences:
+            f, l, h = units(s)
+            forms.extend(self.vocab.encode(f))
+            labels.extend(self.label_vocab.encode(PAD if x is None else x for x in l))
+            if h is not None:
+                heads.extend(h)
+            offsets.append(offsets[-1] + len(f))
+            self.ids.append(s.get('id'))
+
+        self.forms = np.frombuffer(forms, dtype=np.int32)
+        self.labels = np.frombuffer(labels, dtype=np.int32)
+        self.heads = np.frombuffer(heads, dtype=np.int32) if self.unit == 'word' else None
+        self.offsets = np.frombuffer(offsets, dtype=np.int64)
+        self.lengths = np.diff(self.offsets)
+
+    def __len__(self):
+        """number of batches in an epoch"""
+        n = len(self.ids)
+        pool = n if self.pool_size is None else self.pool_size * self.batch_size
+        count = 0
+        for p in range(0, n, max(pool, 1)):
+            size = min(pool, n - p)
+            count += size // self.batch_size if self.drop_last else -(-size // self.batch_size)
+        return count
+
+    def __batches(self, rng):
+        n = len(self.ids)
+        order = rng.permutation(n) if self.shuffle else np.arange(n)
+        pool = n if self.pool_size is None else self.pool_size * self.batch_size
+        batches = []
+        for p in range(0, n, max(pool, 1)):
+            chunk = order[p:p + pool]
+            # stable sort by length keeps the shuffled order among equal lengths
+            chunk = chunk[np.argsort(self.lengths[chunk], kind='stable')]
+            for b in range(0, len(chunk), self.batch_size):
+                batch = chunk[b:b + self.batch_size]
+                if self.drop_last and len(batch) < self.batch_size:
+                    continue
+                batches.append(batch)
+        if self.shuffle:
+            batches = [batches[i] for i in rng.permutation(len(batches))]
+        return batches
+
+    def batch(self, index):
+        """:class:`Batch` of the sentences at ``index``."""
+        forms, mask = pad(self.forms, self.offsets, index)
+        labels, _ = pad(self.labels, self.offsets, index)
+        heads = pad(self.heads, self.offsets, index)[0] if self.heads is not None else None
+        return Batch([self.ids[i] for i in index], forms, labels, heads, mask, self.lengths[index])
+
+    def __iter__(self):
+        rng = np.random.default_rng([self.seed, self.epoch])
+        self.epoch += 1
+        for index in self.__batches(rng):
+            yield self.batch(index)
+
+    def padding_ratio(self):
+        """Fraction of padding in the batches of an epoch."""
+        total = real = 0
+        for index in self.__batches(np.random.default_rng([self.seed, 0])):
+            lengths = self.lengths[index]
+            total += len(index) * int(lengths.max())
+            real += int(lengths.sum())
+        return 1 - real / total if total else 0.0
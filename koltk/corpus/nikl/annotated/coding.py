@@ -0,0 +1,123 @@
+"""Integer coding of corpus strings for NumPy arrays
+
+:class:`Vocabulary` maps strings such as word forms, morphemes or tags to
+integer codes. The ragged array helpers work on sequences of different
+lengths stored as one flat array and an offsets array, where the i-th
+sequence is ``flat[offsets[i]:offsets[i+1]]``.
+"""
+
+from .optional import np
+
+
+PAD = '<pad>'
+UNK = '<unk>'
+
+
+class Vocabulary:
+    """Two way mapping between strings and integer codes.
+
+    With ``specials``, code 0 is the padding ``'<pad>'`` and code 1 is the
+    unknown ``'<unk>'``. Unknown strings are added while the vocabulary is
+    open, and coded as ``'<unk>'`` (or rejected with KeyError if there is no
+    ``'<unk>'``) after :meth:`freeze`.
+
+    ::
+
+        >>> v = Vocabulary(['NNG', 'JKS'])
+        >>> v.encode(['JKS', 'NNG', 'XX'])
+        [3, 2, 4]
+    """
+    def __init__(self, strings=(), specials=True):
+        self.strings = []
+        self.index = {}
+        self.frozen = False
+        if specials:
+            self.add(PAD)
+            self.add(UNK)
+        for s in strings:
+            self.add(s)
+
+    @classmethod
+    def from_tagset(cls, tagset, specials=False):
+        """Frozen vocabulary of the tags of a tagset such as :data:`.POS_TAGS`.
+
+        Code 0 is always the padding ``'<pad>'``, which also codes the missing
+        labels, e.g. of the words without a DP label. With ``specials``, code 1
+        is ``'<unk>'`` for the labels that are not in the tagset.
+        """
+        v = cls(specials=specials)
+        v.add(PAD)
+        for tag in tagset:
+            v.add(tag)
+        v.freeze()
+        return v
+
+    def add(self, s):
+        code = self.index.get(s)
+        if code is None:
+            code = len(self.strings)
+            self.index[s] = code
+            self.strings.append(s)
+        return code
+
+    def freeze(self):
+        self.frozen = True
+        return self
+
+    def code(self, s):
+        code = self.index.get(s)
+        if code is not None:
+            return code
+        elif not self.frozen:
+            return self.add(s)
+        elif UNK in self.index:
+            return self.index[UNK]
+        else:
+            raise KeyError(s)
+
+    def encode(self, strings):
+        """List of the codes of strings."""
+        return [self.code(s) for s in strings]
+
+    def decode(self, codes):
+        """List of the strings of codes."""
+        return [self.strings[c] for c in codes]
+
+    def __len__(self):
+        return len(self.strings)
+
+    def __contains__(self, s):
+        return s in self.index
+
+    def __repr__(self):
+        return 'Vocabulary(size={}, frozen={})'.format(len(self), self.frozen)
+
+
+def ragged_arange(starts, lengths):
+    """Concatenation of ``arange(s, s + n)`` for each ``s, n`` in ``starts, lengths``."""
+    lengths = np.asarray(lengths, dtype=np.int64)
+    total = int(lengths.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64)
+    offsets = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return np.repeat(np.asarray(starts, dtype=np.int64), lengths) + np.arange(total) - offsets
+
+
+def pad(flat, offsets, index, pad_value=0, dtype=None):
+    """Padded 2-D array and mask of the ragged sequences at ``index``.
+
+    :param flat: flat array of all the sequences
+    :param offsets: sequence boundaries in ``flat``
+    :param index: array of the sequence numbers to put in the rows
+    :return: ``(array, mask)`` of shape ``(len(index), max length)``
+    """
+    index = np.asarray(index, dtype=np.int64)
+    starts = offsets[index]
+    lengths = offsets[index + 1] - starts
+    width = int(lengths.max()) if len(index) else 0
+    out = np.full((len(index), width), pad_value, dtype=dtype or flat.dtype)
+    rows = np.repeat(np.arange(len(index)), lengths)
+    cols = ragged_arange(np.zeros(len(index), dtype=np.int64), lengths)
+    out[rows, cols] = flat[ragged_arange(starts, lengths)]
+    mask = np.arange(width) < lengths[:, None]
+    return out, mask
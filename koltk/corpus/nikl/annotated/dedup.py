@@ -0,0 +1,184 @@
+"""Exact and near-duplicate sentences in NIKL Annotated Corpora
+
+- exact duplicates: sentences whose :func:`normalize`\\ d forms are the same
+- near-duplicates: sentences whose character shingle sets are similar, found
+  with MinHash signatures bucketed by LSH (locality sensitive hashing) and
+  checked against a Jaccard similarity threshold
+
+The signatures are computed in a process pool, one corpus file per task.
+Each bucket is checked against its first member only, so the time is close
+to linear in the number of sentences. Near-duplicate detection requires
+NumPy.
+
+::
+
+    >>> for cluster in find_duplicates('NIKL_MESSENGER/'):
+    ...     print(cluster.kind, cluster.ids)
+"""
+
+import re
+import zlib
+import hashlib
+import unicodedata
+from functools import partial
+from collections import namedtuple
+
+from .optional import np, require_numpy
+from .archive import open_binary
+from .stream import DocumentScanner, corpus_files, map_files
+
+
+DuplicateCluster = namedtuple('DuplicateCluster', ['kind', 'ids'])
+DuplicateCluster.__doc__ = """Sentences duplicated with each other.
+
+- kind: 'exact' or 'near'
+- ids: sentence ids, the first one is the representative
+"""
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_SPACES = re.compile(r'\s+')
+
+
+def normalize(form):
+    """NFKC normalized, case folded form with the spaces collapsed."""
+    return _SPACES.sub(' ', unicodedata.normalize('NFKC', form).casefold()).strip()
+
+
+def shingles(form, k=5):
+    """Set of the character k-grams of a normalized form."""
+    if len(form) <= k:
+        return {form}
+    return {form[i:i + k] for i in range(len(form) - k + 1)}
+
+
+def permutations(num_perm, seed=1):
+    """Parameters ``(a, b)`` of the hash functions of :func:`minhash`."""
+    rng = np.random.RandomState(seed)
+    a = rng.randint(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+    b = rng.randint(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+    return a, b
+
+
+def minhash(shingle_set, perms):
+    """MinHash signature (uint32 array) of a set of shingles."""
+    a, b = perms
+    h = np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingle_set),
+                    dtype=np.uint64, count=len(shingle_set))
+    # uint64 arithmetic wraps around, as in the usual MinHash implementations
+    phv = (np.outer(h, a) + b) % np.uint64(_MERSENNE_PRIME)
+    return (phv.min(axis=0) & np.uint64(0xffffffff)).astype(np.uint32)
+
+
+def signatures_of_file(filename, num_perm=64, k=5, near=True):
+    """Sentence ids, exact digests and MinHash signatures of a corpus file.
+
+    Return ``(ids, digests, signatures)``. ``signatures`` is None if ``near``
+    is False, and a ``(len(ids), num_perm)`` array otherwise.
+    """
+    ids = []
+    digests = []
+    sigs = []
+    perms = permutations(num_perm) if near else None
+    with open_binary(filename) as file:
+        for begin, end, doc in DocumentScanner(file):
+            for s in doc.get('sentence', []):
+                form = normalize(s.get('form') or '')
+                if form == '':
+                    continue
+                ids.append(s['id'])
+                digests.append(hashlib.blake2b(form.encode('utf-8'), digest_size=12).digest())
+                if near:
+                    sigs.append(minhash(shingles(form, k), perms))
+
+    if near:
+        sigs = np.vstack(sigs) if sigs else np.zeros((0, num_perm), dtype=np.uint32)
+        return ids, digests, sigs
+    else:
+        return ids, digests, None
+
+
+class _UnionFind:
+    def __init__(self, n):
+        self.parent = list(range(n))
+
+    def find(self, x):
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, x, y):
+        x, y = self.find(x), self.find(y)
+        if x != y:
+            if y < x:
+                x, y = y, x
+            self.parent[y] = x
+
+
+def find_duplicates(path, pattern='*.json', near=True, num_perm=64, bands=16, k=5,
+                    threshold=0.8, max_workers=None):
+    """List of :class:`DuplicateCluster` of the sentences in a corpus.
+
+    :param path: a corpus file or directory
+    :param pattern: file name pattern of the corpus files
+    :param near: find near-duplicates as well as exact duplicates
+    :param num_perm: number of MinHash permutations, a multiple of ``bands``
+    :param bands: number of LSH bands. More bands find less similar pairs.
+    :param k: shingle size in characters
+    :param threshold: minimum estimated Jaccard similarity of near-duplicates
+    :param max_workers: number of worker processes, 1 for no process pool
+    """
+    if near:
+        require_numpy('finding near-duplicates')
+    if near and num_perm % bands != 0:
+        raise ValueError('num_perm must be a multiple of bands: {} {}'.format(num_perm, bands))
+
+    func = partial(signatures_of_file, num_perm=num_perm, k=k, near=near)
+    ids = []
+    groups = {}         # exact digest -> list of sentence indexes
+    rep_groups = []     # exact duplicate groups in the order of appearance
+    rep_sigs = []       # signature of the first sentence of each group
+    for file_ids, digests, sigs in map_files(func, corpus_files(path, pattern), max_workers):
+        for i, (sid, dig) in enumerate(zip(file_ids, digests)):
+            group = groups.get(dig)
+            if group is None:
+                groups[dig] = [len(ids)]
+                rep_groups.append(groups[dig])
+                if near:
+                    rep_sigs.append(sigs[i])
+            else:
+                group.append(len(ids))
+            ids.append(sid)
+
+    clusters = [DuplicateCluster('exact', [ids[i] for i in group])
+                for group in groups.values() if len(group) > 1]
+    if not near or not rep_groups:
+        return clusters
+
+    sigs = np.vstack(rep_sigs)
+    del rep_sigs
+    rows = num_perm // bands
+    n = len(rep_groups)
+    uf = _UnionFind(n)
+    for band in range(bands):
+        buckets = {}
+        band_sigs = np.ascontiguousarray(sigs[:, band * rows:(band + 1) * rows])
+        for r in range(n):
+            key = band_sigs[r].tobytes()
+            first = buckets.setdefault(key, r)
+            if first != r and uf.find(first) != uf.find(r) \
+               and np.mean(sigs[first] == sigs[r]) >= threshold:
+                uf.union(first, r)
+
+    members = {}
+    for r in range(n):
+        members.setdefault(uf.find(r), []).append(r)
+    for root, rs in members.items():
+        if len(rs) > 1:
+            cluster = []
+            for r in rs:
+                cluster.extend(ids[i] for i in rep_groups[r])
+            clusters.append(DuplicateCluster('near', cluster))
+
+    return clusters
@@ -0,0 +1,231 @@
+"""Differences between two versions of a NIKL Annotated Corpus
+
+Documents and sentences are aligned by their fixed width ids
+(:func:`.document_fwid`, :func:`.sentence_fwid`), so that the 2019 and the
+2020 id schemes can be compared with each other.
+
+The comparison runs in two passes:
+
+1. Each corpus file of both versions is scanned in a process pool and every
+   document is reduced to a digest and its byte range in the file.
+2. Only the documents whose digests differ are loaded again and compared
+   sentence by sentence and layer item by layer item. They are read in one
+   forward pass over each pair of old and new files (see
+   :func:`.load_documents`), so compressed corpora are decompressed once.
+
+The differences of a pair of files are passed on as soon as the pair is
+compared, so memory use is bounded by the number of documents and by the
+modified documents of one pair of files, not by the corpus size or the size
+of the change set.
+
+::
+
+    >>> for item in diff('NIKL_NE_2019', 'NIKL_NE_2020'):
+    ...     print(item.status, item.layer, item.document, item.sentence, item.key)
+"""
+
+import hashlib
+from collections import namedtuple, Counter
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+from .object import document_fwid, sentence_fwid
+from .archive import open_binary
+from .stream import DocumentScanner, load_documents, corpus_files, map_files
+
+
+ADDED = 'added'
+REMOVED = 'removed'
+MODIFIED = 'modified'
+
+DiffItem = namedtuple('DiffItem', ['status', 'layer', 'document', 'sentence', 'key'])
+DiffItem.__doc__ = """A difference between two corpus versions.
+
+- status: 'added', 'removed' or 'modified'
+- layer: 'document', 'metadata', 'sentence', a sentence layer ('word',
+  'morpheme', 'WSD', 'NE', 'DP', 'SRL') or a document layer ('CR', 'ZA')
+- document: fixed width document id
+- sentence: fixed width sentence id, or None for document level items
+- key: key of the layer item, or None for documents and sentences
+"""
+
+# layer name -> function computing the key of an item at an index
+SENTENCE_LAYERS = {
+    'word': lambda i, x: x.get('id'),
+    'morpheme': lambda i, x: x.get('id'),
+    'WSD': lambda i, x: '{}:{}'.format(x.get('begin'), x.get('end')),
+    'NE': lambda i, x: x.get('id'),
+    'DP': lambda i, x: x.get('word_id'),
+    'SRL': lambda i, x: '{}:{}'.format(x.get('predicate', {}).get('begin'),
+                                       x.get('predicate', {}).get('end')),
+}
+
+DOCUMENT_LAYERS = {
+    'CR': lambda i, x: i,
+    'ZA': lambda i, x: i,
+}
+
+# the 2019 corpora use 'ne' for the NE layer
+_LAYER_ALIASES = {'ne': 'NE'}
+
+
+def digest(obj):
+    """16 byte digest of a JSON value, independent of the key order."""
+    s = json.dumps(obj, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.blake2b(s.encode('utf-8'), digest_size=16).digest()
+
+
+def digest_file(filename):
+    """List of ``(document_fwid, digest, filename, begin, end)`` of a corpus file."""
+    result = []
+    with open_binary(filename) as file:
+        for begin, end, doc in DocumentScanner(file):
+            result.append((document_fwid(doc['id']), digest(doc), filename, begin, end))
+
+    return result
+
+
+def _layers(dic, layers):
+    res = {}
+    for name, value in dic.items():
+        name = _LAYER_ALIASES.get(name, name)
+        if name in layers and isinstance(value, list):
+            res[name] = value
+    return res
+
+
+def _keyed(items, keyfunc):
+    """dict of key -> digest. Duplicated keys get a '#n' suffix."""
+    res = {}
+    for i, x in enumerate(items):
+        key = keyfunc(i, x)
+        if key in res:
+            n = 2
+            while '{}#{}'.format(key, n) in res:
+                n += 1
+            key = '{}#{}'.format(key, n)
+        res[key] = digest(x)
+    return res
+
+
+def _diff_keyed(old, new, layer, docid, sentid):
+    for key in old:
+        if key not in new:
+            yield DiffItem(REMOVED, layer, docid, sentid, key)
+        elif old[key] != new[key]:
+            yield DiffItem(MODIFIED, layer, docid, sentid, key)
+    for key in new:
+        if key not in old:
+            yield DiffItem(ADDED, layer, docid, sentid, key)
+
+
+def _diff_layers(old, new, layers, docid, sentid):
+    old_layers = _layers(old, layers)
+    new_layers = _layers(new, layers)
+    for name, keyfunc in layers.items():
+        if name not in old_layers and name not in new_layers:
+            continue
+        yield from _diff_keyed(_keyed(old_layers.get(name, []), keyfunc),
+                               _keyed(new_layers.get(name, []), keyfunc),
+                               name, docid, sentid)
+
+
+def _rest(dic, exclude):
+    return {k: v for k, v in dic.items() if k not in exclude and _LAYER_ALIASES.get(k, k) not in exclude}
+
+
+def diff_documents(old, new):
+    """List of :class:`DiffItem` between two versions of a raw document dict."""
+    docid = document_fwid(new['id'])
+    items = []
+    if digest(old.get('metadata')) != digest(new.get('metadata')):
+        items.append(DiffItem(MODIFIED, 'metadata', docid, None, None))
+
+    old_sents = {sentence_fwid(s['id']): s for s in old.get('sentence', [])}
+    new_sents = {sentence_fwid(s['id']): s for s in new.get('sentence', [])}
+    exclude = set(SENTENCE_LAYERS) | {'id'}
+    for sid, s in old_sents.items():
+        if sid not in new_sents:
+            items.append(DiffItem(REMOVED, 'sentence', docid, sid, None))
+            continue
+        t = new_sents[sid]
+        if digest(s) == digest(t):
+            continue
+        if digest(_rest(s, exclude)) != digest(_rest(t, exclude)):
+            items.append(DiffItem(MODIFIED, 'sentence', docid, sid, None))
+        items.extend(_diff_layers(s, t, SENTENCE_LAYERS, docid, sid))
+    for sid in new_sents:
+        if sid not in old_sents:
+            items.append(DiffItem(ADDED, 'sentence', docid, sid, None))
+
+    items.extend(_diff_layers(old, new, DOCUMENT_LAYERS, docid, None))
+
+    return items
+
+
+def _diff_file_pair(task):
+    """List of ``(document_fwid, diff items)`` of the modified documents of a
+    pair of files, given as ``(old_file, new_file, [(fwid, old range, new range)])``,
+    in the order of the document ids.
+    """
+    old_file, new_file, docs = task
+    old_docs = {begin: doc for begin, end, doc in load_documents(old_file, [old for fwid, old, new in docs])}
+    fwid_of = {new[0]: (fwid, old[0]) for fwid, old, new in docs}
+    result = []
+    for begin, end, new_doc in load_documents(new_file, [new for fwid, old, new in docs]):
+        fwid, old_begin = fwid_of[begin]
+        result.append((fwid, diff_documents(old_docs.pop(old_begin), new_doc)))
+    result.sort(key=lambda r: r[0])
+    return result
+
+
+def _digest_corpus(path, pattern, max_workers):
+    res = {}
+    for entries in map_files(digest_file, corpus_files(path, pattern), max_workers):
+        for fwid, dig, filename, begin, end in entries:
+            res[fwid] = (dig, (filename, begin, end))
+    return res
+
+
+def diff(old, new, pattern='*.json', max_workers=None):
+    """Iterate :class:`DiffItem` between two versions of a corpus.
+
+    Removed and added documents come first, in the order of the document
+    ids. The differences in the modified documents follow, by pair of old and
+    new files in the order of their first modified document, and in the order
+    of the document ids within a pair. As the files of a corpus hold separate
+    ranges of document ids, this is the order of the document ids.
+
+    :param old: a corpus file or directory of the old version
+    :param new: a corpus file or directory of the new version
+    :param pattern: file name pattern of the corpus files in a directory
+    :param max_workers: number of worker processes, 1 for no process pool
+    """
+    old_docs = _digest_corpus(old, pattern, max_workers)
+    new_docs = _digest_corpus(new, pattern, max_workers)
+
+    for docid in sorted(old_docs.keys() - new_docs.keys()):
+        yield DiffItem(REMOVED, 'document', docid, None, None)
+    for docid in sorted(new_docs.keys() - old_docs.keys()):
+        yield DiffItem(ADDED, 'document', docid, None, None)
+
+    # the modified documents, grouped by their pair of files
+    tasks = {}
+    for docid in old_docs.keys() & new_docs.keys():
+        (old_digest, old_loc), (new_digest, new_loc) = old_docs[docid], new_docs[docid]
+        if old_digest != new_digest:
+            tasks.setdefault((old_loc[0], new_loc[0]), []).append((docid, old_loc[1:], new_loc[1:]))
+    del old_docs, new_docs
+
+    tasks = sorted((min(docs)[0],) + pair + (docs,) for pair, docs in tasks.items())
+    for result in map_files(_diff_file_pair, [task[1:] for task in tasks], max_workers):
+        for docid, items in result:
+            yield from items
+
+
+def summary(items):
+    """Counter of ``(layer, status)`` of :class:`DiffItem`\\ s."""
+    return Counter((item.layer, item.status) for item in items)
@@ -0,0 +1,77 @@
+"""File table of the SQLite corpus indexes
+
+:class:`.KWICIndex` and :class:`.MetadataIndex` keep a ``file`` table of
+the indexed corpus files with their size and modification time::
+
+    CREATE TABLE file (id INTEGER PRIMARY KEY, name TEXT UNIQUE, size INTEGER, mtime REAL, ...)
+
+:func:`sync_files` compares it with the corpus files on the disk, so that only
+the new and the changed files are indexed again, and the rows of the files
+that are gone are deleted. The names may be relative to a ``root``
+directory, so that the index of a corpus does not depend on the current
+directory.
+"""
+
+import os
+
+from .archive import split_archive_path
+
+
+def file_stat(filename):
+    """``(size, mtime)`` of a corpus file, of its archive for a zip member."""
+    st = os.stat(split_archive_path(filename)[0])
+    return st.st_size, st.st_mtime
+
+
+def relative_name(filename, root):
+    """Name of a file in the file table: relative to ``root``, or the file
+    name itself if ``root`` is None."""
+    return os.path.relpath(filename, root) if root is not None else filename
+
+
+def _exists(filename):
+    return os.path.exists(split_archive_path(filename)[0])
+
+
+def _within(filename, path):
+    return filename == path or filename.startswith(os.path.join(path, ''))
+
+
+def sync_files(db, filenames, remove, path=None, root=None):
+    """Compare the file table with the corpus files and delete the stale rows.
+
+    The indexed files that are no longer corpus files are removed: all of them
+    if ``path`` is None, or those in ``path`` (a file, an archive or a
+    directory) and those that no longer exist otherwise. The changed files are
+    removed too, to be indexed again.
+
+    :param db: SQLite connection of the index
+    :param filenames: the corpus files, e.g. from :func:`.corpus_files`
+    :param remove: function of a file id, deleting the rows of the file and
+      its row in the file table
+    :param path: the corpus path of ``filenames``, None for the whole index
+    :param root: directory that the names in the file table are relative to,
+      or None if they are the file names themselves
+    :return: ``([(filename, size, mtime)] to index, number of files removed)``
+    """
+    indexed = {name: (file_id, size, mtime) for file_id, name, size, mtime
+               in db.execute('SELECT id, name, size, mtime FROM file')}
+    todo = []
+    for filename in filenames:
+        size, mtime = file_stat(filename)
+        old = indexed.pop(relative_name(filename, root), None)
+        if old is not None:
+            if old[1:] == (size, mtime):
+                continue
+            remove(old[0])
+        todo.append((filename, size, mtime))
+
+    removed = 0
+    path = os.fspath(path) if path is not None else None
+    for name, (file_id, size, mtime) in indexed.items():
+        filename = os.path.join(root, name) if root is not None else name
+        if path is None or _within(filename, path) or not _exists(filename):
+            remove(file_id)
+            removed += 1
+    db.commit()
+    return todo, removed
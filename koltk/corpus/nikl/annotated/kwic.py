@@ -0,0 +1,230 @@
+"""Keyword in context (KWIC) concordances of NIKL Annotated Corpora
+
+:class:`KWICIndex` keeps an SQLite index of the occurrences of
+
+- word forms: ``form='읽는다'``
+- morphemes: ``morpheme='읽/VV'``
+- NE labels: ``ne='PS'``
+- WSD senses: ``sense=('책', 1)``
+
+with the byte range of their documents and short left and right context sort
+keys. A query is answered from the index, sorted and paged in SQL, and only
+the documents of the hits on the page are loaded, in one forward pass over
+each file, with :func:`.load_documents`. The context of a hit is limited to its sentence.
+
+The keyword of a morpheme hit is the word that contains the morpheme.
+
+::
+
+    >>> index = KWICIndex('messenger.kwic')
+    >>> index.add('NIKL_MESSENGER/')
+    >>> index.count(morpheme='먹/VV')
+    1532
+    >>> for hit in index.query(morpheme='먹/VV', sort='left', width=20, page=0):
+    ...     print(hit.left.rjust(20), hit.keyword, hit.right)
+"""
+
+import sqlite3
+from collections import namedtuple
+
+from .archive import open_binary
+from .fileindex import sync_files
+from .stream import DocumentScanner, load_documents, corpus_files, map_files
+
+
+KWIC = namedtuple('KWIC', ['sentence', 'left', 'keyword', 'right'])
+KWIC.__doc__ = """A concordance line.
+
+- sentence: sentence id
+- left: context before the keyword
+- keyword: the matched text
+- right: context after the keyword
+"""
+
+#: kinds of queries, the keyword arguments of :meth:`KWICIndex.query`
+KINDS = ('form', 'morpheme', 'ne', 'sense')
+
+#: number of context characters stored for sorting
+SORT_WIDTH = 32
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS file (
+    id INTEGER PRIMARY KEY, name TEXT UNIQUE, size INTEGER, mtime REAL);
+CREATE TABLE IF NOT EXISTS document (
+    id INTEGER PRIMARY KEY, file INTEGER, begin INTEGER, end INTEGER);
+CREATE TABLE IF NOT EXISTS hit (
+    kind TEXT, key TEXT, document INTEGER, sentence INTEGER,
+    begin INTEGER, end INTEGER, left TEXT, right TEXT);
+CREATE INDEX IF NOT EXISTS hit_left ON hit (kind, key, left);
+CREATE INDEX IF NOT EXISTS hit_right ON hit (kind, key, right);
+CREATE INDEX IF NOT EXISTS document_file ON document (file);
+CREATE INDEX IF NOT EXISTS hit_document ON hit (document);
+"""
+
+
+def sense_key(word, sense_id):
+    return '{}/{}'.format(word, sense_id)
+
+
+def _sentence_hits(s):
+    """``(kind, key, begin, end)`` of the occurrences in a raw sentence dict."""
+    words = s.get('word') or []
+    for w in words:
+        yield 'form', w['form'], w['begin'], w['end']
+
+    for m in s.get('morpheme') or []:
+        i = m['word_id'] - 1
+        if 0 <= i < len(words):
+            yield 'morpheme', '{}/{}'.format(m['form'], m['label']), words[i]['begin'], words[i]['end']
+
+    for ne in s.get('NE', s.get('ne')) or []:
+        yield 'ne', ne['label'], ne['begin'], ne['end']
+
+    for wsd in s.get('WSD', s.get('wsd')) or []:
+        yield 'sense', sense_key(wsd['word'], wsd['sense_id']), wsd['begin'], wsd['end']
+
+
+def hits_of_file(filename):
+    """Document byte ranges and hit rows of a corpus file.
+
+    Return a list of ``(begin, end, hits)`` where ``hits`` is a list of
+    ``(kind, key, sentence index, begin, end, left sort key, right sort key)``.
+    The left sort key is the left context reversed.
+    """
+    result = []
+    with open_binary(filename) as file:
+        for begin, end, doc in DocumentScanner(file):
+            hits = []
+            for si, s in enumerate(doc.get('sentence', [])):
+                form = s.get('form') or ''
+                for kind, key, b, e in _sentence_hits(s):
+                    left = form[max(0, b - SORT_WIDTH):b][::-1]
+                    right = form[e:e + SORT_WIDTH]
+                    hits.append((kind, key, si, b, e, left, right))
+            result.append((begin, end, hits))
+    return result
+
+
+class KWICIndex:
+    """Persistent concordance index of corpus files.
+
+    :param filename: SQLite database file, created if it does not exist
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self.db = sqlite3.connect(filename)
+        self.db.executescript(_SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def files(self):
+        """Names of the indexed files."""
+        return [name for name, in self.db.execute('SELECT name FROM file ORDER BY id')]
+
+    def __remove(self, file_id):
+        self.db.execute('DELETE FROM hit WHERE document IN (SELECT id FROM document WHERE file = ?)',
+                        (file_id,))
+        self.db.execute('DELETE FROM document WHERE file = ?', (file_id,))
+        self.db.execute('DELETE FROM file WHERE id = ?', (file_id,))
+
+    def add(self, path, pattern='*.json', max_workers=None):
+        """Index the corpus files of a file or directory.
+
+        Files already indexed are skipped if their size and modification time
+        have not changed, and indexed again otherwise. Indexed files of the
+        path that are no longer corpus files, and indexed files that no longer
+        exist, are removed.
+
+        :return: number of files indexed
+        """
+        todo, removed = sync_files(self.db, corpus_files(path, pattern), self.__remove, path)
+
+        for (filename, size, mtime), docs in zip(todo, map_files(hits_of_file, [t[0] for t in todo],
+                                                                 max_workers)):
+            file_id = self.db.execute('INSERT INTO file (name, size, mtime) VALUES (?, ?, ?)',
+                                      (filename, size, mtime)).lastrowid
+            for begin, end, hits in docs:
+                doc_id = self.db.execute('INSERT INTO document (file, begin, end) VALUES (?, ?, ?)',
+                                         (file_id, begin, end)).lastrowid
+                self.db.executemany('INSERT INTO hit VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                    ((kind, key, doc_id, si, b, e, l, r)
+                                     for kind, key, si, b, e, l, r in hits))
+            self.db.commit()
+
+        return len(todo)
+
+    def remove(self, filename):
+        """Remove a file from the index."""
+        row = self.db.execute('SELECT id FROM file WHERE name = ?', (filename,)).fetchone()
+        if row is not None:
+            self.__remove(row[0])
+            self.db.commit()
+
+    @staticmethod
+    def __where(kwargs):
+        given = [(kind, value) for kind, value in kwargs.items() if value is not None]
+        if len(given) != 1 or given[0][0] not in KINDS:
+            raise ValueError('give one of {}: {}'.format(KINDS, kwargs))
+        kind, value = given[0]
+        if kind == 'sense':
+            value = sense_key(*value)
+        return kind, value
+
+    def count(self, **kwargs):
+        """Number of hits of a query, e.g. ``count(ne='PS')``."""
+        kind, key = self.__where(kwargs)
+        return self.db.execute('SELECT count(*) FROM hit WHERE kind = ? AND key = ?', (kind, key)).fetchone()[0]
+
+    def keys(self, kind):
+        """Counts of the keys of a kind, e.g. ``keys('ne')``."""
+        return dict(self.db.execute('SELECT key, count(*) FROM hit WHERE kind = ? GROUP BY key', (kind,)))
+
+    def query(self, sort=None, width=40, page=0, page_size=50, **kwargs):
+        """List of the :class:`KWIC` lines of a page of hits.
+
+        :param sort: None for the corpus order, 'left' to sort by the left
+          context read from right to left, or 'right' to sort by the right
+          context. Only the first :data:`SORT_WIDTH` characters are compared.
+        :param width: maximum number of context characters on each side
+        :param page: page number from 0
+        :param page_size: number of hits in a page
+        :param kwargs: one of ``form``, ``morpheme``, ``ne`` or ``sense``
+        """
+        kind, key = self.__where(kwargs)
+        order = {None: 'hit.rowid', 'left': 'hit.left, hit.rowid',
+                 'right': 'hit.right, hit.rowid'}.get(sort)
+        if order is None:
+            raise ValueError('sort must be None, left or right: {}'.format(sort))
+
+        rows = self.db.execute(
+            'SELECT file.name, document.begin, document.end, hit.sentence, hit.begin, hit.end '
+            'FROM hit JOIN document ON hit.document = document.id JOIN file ON document.file = file.id '
+            'WHERE hit.kind = ? AND hit.key = ? ORDER BY ' + order + ' LIMIT ? OFFSET ?',
+            (kind, key, page_size, page * page_size)).fetchall()
+
+        # load each document of the page once, grouped by file
+        needed = {}
+        for name, dbegin, dend, si, b, e in rows:
+            needed.setdefault(name, set()).add((dbegin, dend))
+        docs = {}
+        for name, ranges in needed.items():
+            for dbegin, dend, doc in load_documents(name, ranges):
+                docs[name, dbegin] = doc
+
+        lines = []
+        for name, dbegin, dend, si, b, e in rows:
+            s = docs[name, dbegin]['sentence'][si]
+            form = s.get('form') or ''
+            lines.append(KWIC(s.get('id'), form[max(0, b - width):b], form[b:e], form[e:e + width]))
+        return lines
+
+    def pages(self, page_size=50, **kwargs):
+        """Number of pages of a query."""
+        return -(-self.count(**kwargs) // page_size)
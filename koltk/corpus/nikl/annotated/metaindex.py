@@ -0,0 +1,237 @@
+"""Sidecar index of the document metadata of a corpus directory
+
+:class:`MetadataIndex` keeps, in an SQLite file next to the corpus, the
+:class:`.DocumentMetadata` members (``title``, ``author``, ``publisher``,
+``date``, ``topic``), the document id and the byte range of every document,
+and the id and :class:`.CorpusMetadata` ``category`` of every file. Documents
+are selected by equality and range conditions on these columns without
+reading the corpus, and only the selected ones are loaded by byte range.
+
+The index is updated incrementally: :meth:`~MetadataIndex.update` scans the
+files that are new or have changed since they were indexed, and forgets the
+files that are gone.
+
+::
+
+    >>> index = MetadataIndex('NIKL_NEWSPAPER/')       # NIKL_NEWSPAPER/.metadata.idx
+    >>> index.update(max_workers=8)
+    >>> for doc in index.documents(date=('20190101', '20190331'), topic={'사회', '경제'}):
+    ...     print(doc.id, doc.metadata.date)
+"""
+
+import os
+import sqlite3
+from collections import namedtuple
+from itertools import groupby
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+from .object import Document
+from .archive import open_binary
+from .fileindex import sync_files, relative_name
+from .stream import DocumentScanner, load_documents, corpus_files, map_files
+
+
+DocumentLocation = namedtuple('DocumentLocation', ['filename', 'begin', 'end', 'id'])
+DocumentLocation.__doc__ = """Byte range of a document in a corpus file, for :func:`.load_documents`."""
+
+#: document metadata columns
+DOCUMENT_COLUMNS = ('title', 'author', 'publisher', 'date', 'topic')
+
+#: corpus file columns
+FILE_COLUMNS = ('corpus_id', 'category')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS file (
+    id INTEGER PRIMARY KEY, name TEXT UNIQUE, size INTEGER, mtime REAL,
+    corpus_id TEXT, category TEXT, metadata TEXT);
+CREATE TABLE IF NOT EXISTS document (
+    id INTEGER PRIMARY KEY, file INTEGER, begin INTEGER, end INTEGER, document_id TEXT,
+    title TEXT, author TEXT, publisher TEXT, date TEXT, topic TEXT, metadata TEXT);
+CREATE INDEX IF NOT EXISTS document_file ON document (file);
+CREATE INDEX IF NOT EXISTS document_id ON document (document_id);
+CREATE INDEX IF NOT EXISTS document_date ON document (date);
+CREATE INDEX IF NOT EXISTS document_topic ON document (topic);
+CREATE INDEX IF NOT EXISTS document_publisher ON document (publisher);
+CREATE INDEX IF NOT EXISTS document_author ON document (author);
+"""
+
+
+def sidecar_name(path):
+    """Index file name of a corpus directory or file."""
+    if os.path.isdir(path):
+        return os.path.join(path, '.metadata.idx')
+    return path + '.metadata.idx'
+
+
+def metadata_of_file(filename):
+    """``(corpus header, [(begin, end, document id, document metadata), ...])`` of a corpus file."""
+    rows = []
+    with open_binary(filename) as file:
+        scanner = DocumentScanner(file)
+        for begin, end, doc in scanner:
+            rows.append((begin, end, doc.get('id'), doc.get('metadata') or {}))
+        header = {k: v for k, v in scanner.header.items() if k != 'sentence'} \
+            if scanner.toplevel == 'corpus' else {}
+    return header, rows
+
+
+def _condition(column, value):
+    """SQL condition and parameters of a column condition."""
+    if isinstance(value, tuple):
+        low, high = value
+        sql, params = [], []
+        if low is not None:
+            sql.append('{} >= ?'.format(column))
+            params.append(low)
+        if high is not None:
+            sql.append('{} <= ?'.format(column))
+            params.append(high)
+        return ' AND '.join(sql) or '1', params
+    elif isinstance(value, (set, frozenset, list)):
+        value = list(value)
+        return '{} IN ({})'.format(column, ', '.join('?' * len(value))), value
+    else:
+        return '{} = ?'.format(column), [value]
+
+
+class MetadataIndex:
+    """Document metadata index of a corpus directory or file.
+
+    The files are indexed by their names relative to the corpus directory (the
+    directory of the file for a corpus file), and the :class:`DocumentLocation`
+    file names are joined to ``path`` again, so that the index can be used
+    from any current directory.
+
+    :param path: corpus directory or file
+    :param index_file: SQLite file, :func:`sidecar_name` of the path if None
+    :param pattern: file name pattern of the corpus files
+    """
+    def __init__(self, path, index_file=None, pattern='*.json'):
+        self.path = path
+        # the file names are stored relative to the corpus directory
+        self.root = path if os.path.isdir(path) else (os.path.dirname(path) or os.curdir)
+        self.pattern = pattern
+        self.index_file = index_file or sidecar_name(path)
+        self.db = sqlite3.connect(self.index_file)
+        self.db.executescript(_SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __remove(self, file_id):
+        self.db.execute('DELETE FROM document WHERE file = ?', (file_id,))
+        self.db.execute('DELETE FROM file WHERE id = ?', (file_id,))
+
+    def update(self, max_workers=None):
+        """Index the new and changed corpus files and forget the removed ones.
+
+        :return: ``(number of files indexed, number of files removed)``
+        """
+        todo, removed = sync_files(self.db, corpus_files(self.path, self.pattern), self.__remove,
+                                   root=self.root)
+
+        results = map_files(metadata_of_file, [t[0] for t in todo], max_workers)
+        for (filename, size, mtime), (header, rows) in zip(todo, results):
+            corpus_meta = header.get('metadata') or {}
+            file_id = self.db.execute(
+                'INSERT INTO file (name, size, mtime, corpus_id, category, metadata) VALUES (?, ?, ?, ?, ?, ?)',
+                (relative_name(filename, self.root), size, mtime, header.get('id'), corpus_meta.get('category'),
+                 json.dumps(corpus_meta, ensure_ascii=False))).lastrowid
+            self.db.executemany(
+                'INSERT INTO document (file, begin, end, document_id, title, author, publisher, date, topic, metadata) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                ((file_id, begin, end, docid) + tuple(meta.get(c) for c in DOCUMENT_COLUMNS)
+                 + (json.dumps(meta, ensure_ascii=False),)
+                 for begin, end, docid, meta in rows))
+            self.db.commit()
+
+        return len(todo), removed
+
+    def __where(self, conditions):
+        sql, params = [], []
+        for name, value in conditions.items():
+            if value is None:
+                continue
+            if name in DOCUMENT_COLUMNS:
+                column = 'document.' + name
+            elif name == 'id':
+                column = 'document.document_id'
+            elif name in FILE_COLUMNS:
+                column = 'file.' + name
+            else:
+                raise ValueError('unknown column {}, not in {}'.format(
+                    name, DOCUMENT_COLUMNS + FILE_COLUMNS + ('id',)))
+            s, p = _condition(column, value)
+            sql.append(s)
+            params.extend(p)
+        return ' AND '.join(sql) or '1', params
+
+    def find(self, **conditions):
+        """List of the :class:`DocumentLocation` of the documents that match.
+
+        A condition is a value, a set or list of values, or a ``(low, high)``
+        tuple of inclusive bounds (None for no bound), on a document metadata
+        column (``title``, ``author``, ``publisher``, ``date``, ``topic``), the
+        document ``id``, or a corpus file column (``corpus_id``, ``category``).
+        """
+        where, params = self.__where(conditions)
+        return [DocumentLocation(os.path.join(self.root, name), begin, end, docid)
+                for name, begin, end, docid in self.db.execute(
+                    'SELECT file.name, document.begin, document.end, document.document_id '
+                    'FROM document JOIN file ON document.file = file.id '
+                    'WHERE ' + where + ' ORDER BY document.id', params)]
+
+    def count(self, **conditions):
+        """Number of the documents that match the conditions of :meth:`find`."""
+        where, params = self.__where(conditions)
+        return self.db.execute('SELECT count(*) FROM document JOIN file ON document.file = file.id '
+                               'WHERE ' + where, params).fetchone()[0]
+
+    def values(self, column):
+        """dict of the values of a column to their document counts"""
+        if column not in DOCUMENT_COLUMNS + FILE_COLUMNS:
+            raise ValueError('unknown column {}'.format(column))
+        table = 'file' if column in FILE_COLUMNS else 'document'
+        return dict(self.db.execute(
+            'SELECT {0}.{1}, count(*) FROM document JOIN file ON document.file = file.id '
+            'GROUP BY {0}.{1}'.format(table, column)))
+
+    def metadata(self, location):
+        """Raw metadata dict of the document at a :class:`DocumentLocation`."""
+        row = self.db.execute('SELECT document.metadata FROM document JOIN file ON document.file = file.id '
+                              'WHERE file.name = ? AND document.begin = ?',
+                              (relative_name(location.filename, self.root), location.begin)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def raw(self, locations):
+        """Iterate the raw document dicts at the locations, in their order.
+
+        The consecutive locations in a file are read in one forward pass over
+        the file. If they are not in the order of the file, the documents of
+        the run are held until they are yielded.
+        """
+        for filename, run in groupby(locations, key=lambda loc: loc.filename):
+            ranges = [(loc.begin, loc.end) for loc in run]
+            docs = load_documents(filename, ranges)
+            if ranges == sorted(ranges):
+                for begin, end, doc in docs:
+                    yield doc
+            else:
+                held = {(begin, end): doc for begin, end, doc in docs}
+                for r in ranges:
+                    yield held[r]
+
+    def documents(self, **conditions):
+        """Iterate the :class:`.Document`\\ s that match the conditions of :meth:`find`."""
+        for doc in self.raw(self.find(**conditions)):
+            yield Document.from_dict(doc)
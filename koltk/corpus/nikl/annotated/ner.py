@@ -0,0 +1,261 @@
+"""NE labels in the BIO or BIOES scheme
+
+:class:`NELabeler` converts the NE spans (``begin``, ``end``, ``label``) of
+all the sentences of a document into one array of label codes, at the
+character, word or morpheme level. The codes index :attr:`NELabeler.tags`,
+which is made from :data:`.NE_TAGS`:
+
+- BIO: ``['O', 'B-PS', 'I-PS', 'B-FD', 'I-FD', ...]``
+- BIOES: ``['O', 'B-PS', 'I-PS', 'E-PS', 'S-PS', 'B-FD', ...]``
+
+Spans are aligned with the units by binary search over the unit offsets of the
+whole document. Spans that overlap a previous span, that do not start at the
+beginning of a unit (or, except at the word level, do not end at the end of
+a unit), or that have an unknown label are reported as :class:`NEIssue`.
+Fine labels such as ``PS_NAME`` are labeled with their tag (see
+:func:`.coarse_ne_tag`).
+
+Morphemes have no character offsets in the corpus. At the morpheme level, the
+morphemes are given spans in their words by :class:`.MorphemeAligner`.
+Morphemes contracted into one syllable share the span of the syllable.
+
+Requires NumPy.
+
+::
+
+    >>> labeler = NELabeler(scheme='BIOES', unit='word')
+    >>> for doc in labeler.corpus('NXNE2000211080.json'):
+    ...     print(doc.labels_of(0))
+"""
+
+from collections import namedtuple
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+from .optional import np, require_numpy
+from .tag import NE_TAGS, coarse_ne_tag
+from .coding import ragged_arange
+from .align import MorphemeAligner
+from .archive import open_binary
+from .stream import DocumentScanner, corpus_files
+
+
+SCHEMES = {'BIO': 'BI', 'BIOES': 'BIES'}
+UNITS = ('char', 'word', 'morpheme')
+
+NEIssue = namedtuple('NEIssue', ['sentence', 'ne', 'kind'])
+NEIssue.__doc__ = """An NE span that is not labeled.
+
+- sentence: sentence id
+- ne: NE id
+- kind: 'overlap', 'misaligned', 'empty' or 'unknown_label'
+"""
+
+
+class LabeledDocument(namedtuple('LabeledDocument', ['id', 'sentence_ids', 'tokens', 'labels', 'offsets', 'issues'])):
+    """NE labels of a document.
+
+    - id: document id
+    - sentence_ids: list of sentence ids
+    - tokens: list of the unit strings of each sentence
+    - labels: label codes of all the units of the document
+    - offsets: ``labels[offsets[i]:offsets[i+1]]`` are the codes of the i-th sentence
+    - issues: list of :class:`NEIssue`
+    """
+    __slots__ = ()
+
+    def labels_of(self, i):
+        return self.labels[self.offsets[i]:self.offsets[i + 1]]
+
+
+def _word_spans(sentence):
+    words = sentence.get('word')
+    if words:
+        return [w['form'] for w in words], [w['begin'] for w in words], [w['end'] for w in words]
+
+    forms, begins, ends = [], [], []
+    b = 0
+    for wform in (sentence.get('form') or '').split():
+        b = sentence['form'].index(wform, b)
+        forms.append(wform)
+        begins.append(b)
+        ends.append(b + len(wform))
+        b += len(wform)
+    return forms, begins, ends
+
+
+def _morpheme_spans(sentence, aligner):
+    morphs = sentence.get('morpheme') or []
+    begins, ends = [], []
+    last = 0
+    for b, e in aligner.sentence(sentence):
+        if b is None:       # morpheme of an unknown word
+            b = e = last
+        begins.append(b)
+        ends.append(e)
+        last = e
+    return ['{}/{}'.format(m['form'], m['label']) for m in morphs], begins, ends
+
+
+class NELabeler:
+    """BIO or BIOES labeler of NE spans.
+
+    :param scheme: 'BIO' or 'BIOES'
+    :param unit: 'char', 'word' or 'morpheme'
+    """
+    def __init__(self, scheme='BIO', unit='word'):
+        require_numpy('NELabeler')
+        if scheme not in SCHEMES:
+            raise ValueError('scheme must be one of {}: {}'.format(tuple(SCHEMES), scheme))
+        if unit not in UNITS:
+            raise ValueError('unit must be one of {}: {}'.format(UNITS, unit))
+
+        self.scheme = scheme
+        self.unit = unit
+        prefixes = SCHEMES[scheme]
+        self.tags = ['O'] + ['{}-{}'.format(p, ne) for ne in NE_TAGS for p in prefixes]
+        self.code = {tag: i for i, tag in enumerate(self.tags)}
+        # code of B-<label>; I, E and S follow it
+        self.__base = {ne: 1 + i * len(prefixes) for i, ne in enumerate(NE_TAGS)}
+        self.dtype = np.uint8 if len(self.tags) < 256 else np.uint16
+        self.__aligner = MorphemeAligner() if unit == 'morpheme' else None
+
+    def units(self, sentence):
+        """``(tokens, begins, ends)`` of the units of a sentence"""
+        if self.unit == 'char':
+            form = sentence.get('form') or ''
+            return list(form), list(range(len(form))), list(range(1, len(form) + 1))
+        elif self.unit == 'word':
+            return _word_spans(sentence)
+        else:
+            return _morpheme_spans(sentence, self.__aligner)
+
+    def document(self, doc):
+        """:class:`LabeledDocument` of a :class:`.Document` or a raw document dict."""
+        sentence_ids, tokens, begins, ends = [], [], [], []
+        offsets = [0]
+        ne_sent, ne_ids, ne_begin, ne_end, ne_base = [], [], [], [], []
+        issues = []
+        shift = 0       # sentences are laid one after another in character offsets
+        for si, s in enumerate(doc.get('sentence', [])):
+            toks, b, e = self.units(s)
+            sentence_ids.append(s.get('id'))
+            tokens.append(toks)
+            begins.extend(x + shift for x in b)
+            ends.extend(x + shift for x in e)
+            offsets.append(offsets[-1] + len(toks))
+            for ne in s.get('NE', s.get('ne')) or []:
+                base = self.__base.get(coarse_ne_tag(ne.get('label')))
+                if base is None:
+                    issues.append(NEIssue(s.get('id'), ne.get('id'), 'unknown_label'))
+                    continue
+                ne_sent.append(si)
+                ne_ids.append(ne.get('id'))
+                ne_begin.append(ne['begin'] + shift)
+                ne_end.append(ne['end'] + shift)
+                ne_base.append(base)
+            shift += len(s.get('form') or '') + 1
+
+        labels = np.zeros(offsets[-1], dtype=self.dtype)
+        if ne_base:
+            self.__label(labels, np.array(begins, dtype=np.int64), np.array(ends, dtype=np.int64),
+                         np.array(ne_begin, dtype=np.int64), np.array(ne_end, dtype=np.int64),
+                         np.array(ne_base, dtype=np.int64), ne_sent, ne_ids, sentence_ids, issues)
+
+        return LabeledDocument(doc.get('id'), sentence_ids, tokens, labels,
+                               np.array(offsets, dtype=np.int64), issues)
+
+    def __label(self, labels, ub, ue, nb, ne, base, ne_sent, ne_ids, sentence_ids, issues):
+        # first unit ending after the span begin, last unit beginning before the span end
+        n = len(ub)
+        if n == 0:
+            issues.extend(NEIssue(sentence_ids[si], i, 'empty') for si, i in zip(ne_sent, ne_ids))
+            return
+        s = np.searchsorted(ue, nb, side='right')
+        t = np.searchsorted(ub, ne, side='left') - 1
+        sc = np.minimum(s, n - 1)
+        tc = np.clip(t, 0, n - 1)
+        empty = (s > t) | (s >= n) | (ne <= nb)
+        misaligned = ~empty & (ub[sc] != nb)
+        if self.unit != 'word':
+            misaligned |= ~empty & (ue[tc] != ne)
+
+        # drop the spans overlapping a previous span, in the order of the begin
+        order = np.lexsort((t, s))
+        overlap = np.zeros(len(s), dtype=bool)
+        last = -1
+        for i in order:
+            if empty[i] or misaligned[i]:
+                continue
+            if s[i] <= last:
+                overlap[i] = True
+            else:
+                last = t[i]
+
+        for i in np.flatnonzero(empty | misaligned | overlap):
+            kind = 'empty' if empty[i] else 'misaligned' if misaligned[i] else 'overlap'
+            issues.append(NEIssue(sentence_ids[ne_sent[i]], ne_ids[i], kind))
+
+        ok = ~(empty | misaligned | overlap)
+        s, t, base = s[ok], t[ok], base[ok]
+        if self.scheme == 'BIO':
+            labels[s] = base
+            inside = t - s
+            labels[ragged_arange(s + 1, inside)] = np.repeat(base + 1, inside)
+        else:
+            single = s == t
+            labels[s[single]] = base[single] + 3
+            m = ~single
+            s, t, base = s[m], t[m], base[m]
+            labels[s] = base
+            labels[t] = base + 2
+            inside = t - s - 1
+            labels[ragged_arange(s + 1, inside)] = np.repeat(base + 1, inside)
+
+    def corpus(self, path, pattern='*.json'):
+        """Iterate :class:`LabeledDocument` of the documents in a corpus file or directory."""
+        for filename in corpus_files(path, pattern):
+            with open_binary(filename) as file:
+                for begin, end, doc in DocumentScanner(file):
+                    yield self.document(doc)
+
+
+def write_jsonl(labeled_docs, file, tags=None):
+    """Write one sentence per line: ``{"id", "tokens", "labels"}``.
+
+    :param tags: tag list to write the labels as strings, e.g.
+      :attr:`NELabeler.tags`. Codes are written if None.
+    """
+    for doc in labeled_docs:
+        for i, sid in enumerate(doc.sentence_ids):
+            codes = doc.labels_of(i).tolist()
+            labels = [tags[c] for c in codes] if tags is not None else codes
+            file.write(json.dumps({'id': sid, 'tokens': doc.tokens[i], 'labels': labels},
+                                  ensure_ascii=False))
+            file.write('\n')
+
+
+def save_npz(labeled_docs, filename, tags=None):
+    """Save the label codes of all sentences into a NumPy ``.npz`` file.
+
+    The file has ``labels`` (all the codes), ``offsets`` (sentence boundaries
+    in ``labels``), ``ids`` (sentence ids) and ``tags`` (the tag list, if given).
+    """
+    labels, lengths, ids = [], [], []
+    for doc in labeled_docs:
+        labels.append(doc.labels)
+        lengths.append(np.diff(doc.offsets))
+        ids.extend(doc.sentence_ids)
+
+    offsets = np.zeros(len(ids) + 1, dtype=np.int64)
+    if lengths:
+        np.cumsum(np.concatenate(lengths), out=offsets[1:])
+    arrays = {'labels': np.concatenate(labels) if labels else np.zeros(0, dtype=np.uint8),
+              'offsets': offsets,
+              'ids': np.array(ids, dtype=str)}
+    if tags is not None:
+        arrays['tags'] = np.array(tags, dtype=str)
+    np.savez_compressed(filename, **arrays)
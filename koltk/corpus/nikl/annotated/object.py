@@ -24,10 +24,65 @@ r"""NIKL ANnotated Corpus JSON (Niklanson) Objects
 
 
 from __future__ import annotations
+from collections import OrderedDict
+from itertools import count
 from .base import Niklanson, NiklansonList
+from .stream import load_document
+from .archive import is_seekable
 import re
 import json
 
+
+def document_fwid(document_id):
+    """Fixed width document id, which is the same across the corpus versions.
+
+    ::
+
+        >>> document_fwid('SARW180000004')
+        'SARW180000004-0001'
+        >>> document_fwid('SARW180000004.1')
+        'SARW180000004-0001'
+    """
+    toks = document_id.split('.')
+    if len(toks) == 1:
+        # This option (for 2019 spoken annotated corpus) will be deprecated.
+        #
+        # - (2019 spoken annotated corpus) document id example: SARW180000004
+        # - (2020 version) document id example: SARW180000004.1
+        #
+        return '{}-0001'.format(toks[0])
+    elif len(toks) == 2:
+        return '{}-{:04d}'.format(toks[0], int(toks[1]))
+    else:
+        raise Exception('document id error: {}'.format(document_id))
+
+
+def sentence_fwid(sentence_id):
+    """Fixed width sentence id, which is the same across the corpus versions.
+
+    ::
+
+        >>> sentence_fwid('SARW180000004.3')
+        'SARW180000004-0001-00001-00003'
+        >>> sentence_fwid('SARW180000004.1.1.3')
+        'SARW180000004-0001-00001-00003'
+    """
+    toks = sentence_id.split(".")
+    if len(toks) == 2:
+        # This option (for 2019 spoken annotated corpus) will be deprecated.
+        #
+        # - (2019 spoken annotated corpus) sentence id example: SARW180000004.3
+        # - (2020 version) document id example: SARW180000004.1.1.3
+        #
+        docid, sentnum = toks
+        return "{}-{:04d}-{:05d}-{:05d}".format(docid, 1, 1, int(sentnum))
+    elif len(toks) == 4:
+        corpusid, docnum, paranum, sentnum = toks
+        return "{}-{:04d}-{:05d}-{:05d}".format(corpusid, int(docnum), int(paranum), int(sentnum))
+    else:
+        raise Exception('sentence id error: {}'.format(sentence_id))
+
+
 class CorpusMetadata(Niklanson):
     def __init__(self,
                  parent: Corpus = None,
@@ -82,10 +137,17 @@ class Corpus(Niklanson):
                  id: str = None,
                  metadata : {} = {},
                  document: [] = [],
+                 lazy: bool = False,
+                 cache_size: int = None,
+                 parent = None,
                  **kwargs):
+        super().__init__(parent=parent)
         self.id = id
         self.metadata = CorpusMetadata(**metadata)
-        self.document = DocumentList(document, parent=self)
+        if lazy:
+            self.document = LazyDocumentList(document, parent=self, cache_size=cache_size)
+        else:
+            self.document = DocumentList(document, parent=self)
         self.update(kwargs)
 
     @classmethod
@@ -101,6 +163,11 @@ class Corpus(Niklanson):
 
         return self.document
 
+    def json(self, ensure_ascii=False, **kwargs):
+        if isinstance(self.document, LazyDocumentList):
+            return json.dumps(dict(self, document=self.document.raw_list()), ensure_ascii=ensure_ascii, **kwargs)
+        return super().json(ensure_ascii=ensure_ascii, **kwargs)
+
     def __repr__(self):
         return 'Corpus(id={})'.format(self.id)
 
@@ -157,18 +224,7 @@ class Document(Niklanson):
 
     @property
     def fwid(self):
-        toks = self.id.split('.')
-        if len(toks) == 1:
-            # This option (for 2019 spoken annotated corpus) will be deprecated.
-            #
-            # - (2019 spoken annotated corpus) document id example: SARW180000004
-            # - (2020 version) document id example: SARW180000004.1
-            #
-            return '{}-0001'.format(toks[0])
-        elif len(toks) == 2:
-            return '{}-{:04d}'.format(toks[0], int(toks[1]))
-        else:
-            raise Exception('document id error: {}'.format(self.id))
+        return document_fwid(self.id)
    
     @property
     def sentence_list(self):
@@ -199,7 +255,112 @@ class Document(Niklanson):
  
 class DocumentList(NiklansonList):
     element_type = Document
-    
+
+
+class LazyDocumentList(DocumentList):
+    """DocumentList that builds a :class:`Document` only when it is accessed.
+
+    The list holds raw document dicts, or the byte ranges of the documents in
+    ``file`` (see :class:`.DocumentScanner`). ``len()``, slicing and
+    :meth:`getDocumentById` do not build any document.
+
+    Built documents are kept in a cache of ``cache_size`` documents, the least
+    recently used one being released first. None keeps all of them. Changes to
+    a released document are lost, and changes to built documents are not
+    written back to the raw documents.
+
+    ::
+
+        >>> corpus = Corpus.from_dict(data, lazy=True, cache_size=16)
+        >>> corpus.document_list[-10:]         # no document is built
+        >>> corpus.document_list.getDocumentById('NXRW1900000001.1')
+
+    :param xlist: list of raw document dicts, or of ``(begin, end)`` if ``file`` is given
+    :param file: path of a plain corpus file for :func:`.load_document`.
+      Compressed files and zip members are not accepted, as each document
+      would be decompressed again from the start of the file.
+    :param ids: document ids, required with ``file``
+    :raise ValueError: if ``file`` is not a plain file
+    """
+    def __init__(self, xlist, parent=None, cache_size=None, file=None, ids=None):
+        super().__init__([], parent=parent)
+        list.extend(self, xlist)
+        if file is not None and ids is None:
+            raise ValueError('ids are required for byte ranges')
+        if file is not None and not is_seekable(file):
+            raise ValueError('byte ranges need a plain file, not {}'.format(file))
+        self.__file = file
+        self.__ids = list(ids) if ids is not None else [x.get('id') for x in xlist]
+        self.__id2index = None
+        self.__cache_size = cache_size
+        self.__cache = OrderedDict()
+
+    @property
+    def ids(self):
+        return self.__ids
+
+    def raw(self, index):
+        """raw document dict at the index"""
+        x = list.__getitem__(self, index)
+        if self.__file is not None:
+            return load_document(self.__file, *x)
+        else:
+            return x
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return LazyDocumentList(list.__getitem__(self, index), parent=self.parent,
+                                    cache_size=self.__cache_size, file=self.__file,
+                                    ids=self.__ids[index])
+
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError('list index out of range')
+
+        doc = self.__cache.get(index)
+        if doc is not None:
+            self.__cache.move_to_end(index)
+            return doc
+
+        doc = Document.from_dict(self.raw(index), parent=self.parent)
+        if self.__cache_size is None or self.__cache_size > 0:
+            self.__cache[index] = doc
+            if self.__cache_size is not None and len(self.__cache) > self.__cache_size:
+                self.__cache.popitem(last=False)
+        return doc
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __reversed__(self):
+        for i in reversed(range(len(self))):
+            yield self[i]
+
+    def clone(self, deep=True, parent=None):
+        """Copy of the list with the same raw documents and no built document."""
+        return LazyDocumentList(list(list.__iter__(self)), parent=parent if parent is not None else self.parent,
+                                cache_size=self.__cache_size, file=self.__file, ids=self.__ids)
+
+    def raw_list(self):
+        """list of the raw document dicts"""
+        return [self.raw(i) for i in range(len(self))]
+
+    def getDocumentById(self, document_id):
+        if self.__id2index is None:
+            self.__id2index = {docid: i for i, docid in enumerate(self.__ids)}
+
+        return self[self.__id2index[document_id]]
+
+    def release(self):
+        """Release all the built documents."""
+        self.__cache.clear()
+
+    def __repr__(self):
+        return 'LazyDocumentList(len={}, built={})'.format(len(self), len(self.__cache))
+
    
 class Sentence(Niklanson):
     """
@@ -279,22 +440,7 @@ class Sentence(Niklanson):
                 
     @property
     def fwid(self):
-        toks = self.id.split(".")
-        if len(toks) == 2:
-            # This option (for 2019 spoken annotated corpus) will be deprecated.
-            #
-            # - (2019 spoken annotated corpus) sentence id example: SARW180000004.3
-            # - (2020 version) document id example: SARW180000004.1.1.3
-            #
-            docid, sentnum = toks
-            fw_sid = "{}-{:04d}-{:05d}-{:05d}".format(docid, 1, 1, int(sentnum))
-        elif len(toks) == 4:
-            corpusid, docnum, paranum, sentnum = toks
-            fw_sid = "{}-{:04d}-{:05d}-{:05d}".format(corpusid, int(docnum), int(paranum), int(sentnum))
-        else:
-            sys.exit(sid)
-
-        return fw_sid
+        return sentence_fwid(self.id)
 
     @property
     def snum(self):
@@ -317,6 +463,20 @@ class Sentence(Niklanson):
         except:
             raise Exception('No word at {}: {}'.format(charind, self.form))
 
+class SentenceSelection(list):
+    """List of some of the raw sentence dicts of a document, with their
+    numbers in the document, so that the :class:`Sentence` objects built from
+    it keep their :attr:`~Sentence.snum`.
+
+    :param sentences: ``(number, raw sentence dict)`` pairs
+    """
+    def __init__(self, sentences=()):
+        self.numbers = []
+        for num, s in sentences:
+            self.numbers.append(num)
+            self.append(s)
+
+
 class SentenceList(NiklansonList):
     element_type = Sentence
 
@@ -324,15 +484,12 @@ class SentenceList(NiklansonList):
         """
         @param sentence_dic_list: a list of dict. 
         a dict is { id, form }
+        A :class:`SentenceSelection` keeps the numbers of its sentences.
         """
-        self.__parent = parent
-        for i, s in enumerate(sentence_dic_list):
-            list.append(self, Sentence(**s, parent=parent, num=i+1))
-    
-        
-    @property
-    def parent(self):
-        return self.__parent
+        super().__init__([], parent=parent)
+        nums = getattr(sentence_dic_list, 'numbers', None) or count(1)
+        for num, s in zip(nums, sentence_dic_list):
+            list.append(self, Sentence(**s, parent=parent, num=num))
     
             
 class Word(Niklanson):
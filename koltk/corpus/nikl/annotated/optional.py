@@ -0,0 +1,57 @@
+"""Optional dependencies, imported when they are first used
+
+NumPy is needed only by the array modules (:mod:`.coding`, :mod:`.batch`,
+:mod:`.ner`, :mod:`.window`, :mod:`.dedup`, :mod:`.aggregate`). They refer to
+it through :data:`np`, which imports it at the first attribute access, so that
+importing them does not import NumPy. The classes and functions that need it
+call :func:`require_numpy` first, to fail early. NumPy is installed with the
+``numpy`` extra::
+
+    $ pip install koltk[numpy]
+"""
+
+import importlib
+
+
+class LazyModule:
+    """Module imported at the first access to one of its attributes.
+
+    :param name: module name
+    :param extra: name of the extra of the koltk package that installs it
+    """
+    def __init__(self, name, extra):
+        self.__name = name
+        self.__extra = extra
+        self.__module = None
+
+    def _load(self, feature=None):
+        """The module.
+
+        :param feature: what the module is required for, in the error message
+        :raise ImportError: if the module is not installed
+        """
+        if self.__module is None:
+            try:
+                self.__module = importlib.import_module(self.__name)
+            except ImportError as e:
+                raise ImportError('{} is required{}: pip install koltk[{}]'.format(
+                    self.__name, ' for ' + feature if feature else '', self.__extra)) from e
+        return self.__module
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __repr__(self):
+        return 'LazyModule({!r}, loaded={})'.format(self.__name, self.__module is not None)
+
+
+#: NumPy, imported at the first use
+np = LazyModule('numpy', 'numpy')
+
+
+def require_numpy(feature):
+    """Import NumPy, at the start of a feature that needs it.
+
+    :raise ImportError: if NumPy is not installed
+    """
+    return np._load(feature)
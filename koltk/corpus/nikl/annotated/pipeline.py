@@ -0,0 +1,253 @@
+"""Streaming pipelines over NIKL Annotated Corpora
+
+A :class:`Pipeline` reads the corpus files of a directory, keeps the documents
+and sentences that pass the :meth:`~Pipeline.where` conditions, applies
+:meth:`~Pipeline.filter` and :meth:`~Pipeline.map` stages, groups the results
+with :meth:`~Pipeline.batch`, and hands them to a sink with
+:meth:`~Pipeline.run`.
+
+The :meth:`~Pipeline.where` conditions on the document metadata and on the
+sentence length are checked on the raw document dicts as they are scanned, so
+that the :class:`.Document` and :class:`.Sentence` objects, with all their
+layers, are built only for what passes. The files are processed in a process
+pool, where the filter and map stages run too; their functions must then be
+picklable (module level) functions. The results are in the order of the files,
+and are passed on as they are made, in chunks from the process pool (see
+:func:`.imap_files`), so that only a bounded number of them is held at a time.
+
+::
+
+    >>> def nouns(sentence):
+    ...     return [m.form for m in sentence.morpheme_list if m.label.startswith('NN')]
+    >>> pipeline = (Pipeline.source('NIKL_NEWSPAPER/', max_workers=8)
+    ...             .where(topic={'사회', '경제'}, date=('20190101', '20191231'), min_length=5)
+    ...             .sentences()
+    ...             .map(nouns)
+    ...             .batch(1000))
+    >>> for batch in pipeline:
+    ...     train(batch)
+"""
+
+from functools import partial
+
+from .object import SentenceSelection
+from .reader import NiklansonStreamReader
+from .stream import corpus_files, imap_files
+
+
+def _match(value, condition):
+    if callable(condition):
+        return condition(value)
+    elif isinstance(condition, tuple):
+        low, high = condition
+        return value is not None and (low is None or low <= value) and (high is None or value <= high)
+    elif isinstance(condition, (set, frozenset, list)):
+        return value in condition
+    else:
+        return value == condition
+
+
+def sentence_length(sentence):
+    """Number of words of a raw sentence dict."""
+    words = sentence.get('word')
+    if words:
+        return len(words)
+    return len((sentence.get('form') or '').split())
+
+
+class Where:
+    """Conditions on raw document dicts.
+
+    A condition on a metadata member (``topic``, ``date``, ``publisher``, ...)
+    is a value to be equal to, a set or list of values, a ``(low, high)``
+    tuple of inclusive bounds (None for no bound), or a function of the
+    value. Sentences shorter than ``min_length`` or longer than ``max_length``
+    words are removed, and documents without any sentence left are skipped.
+
+    Calling a Where on a raw document dict returns the dict, a copy without
+    the removed sentences, or None if the document is skipped. The sentences
+    left are a :class:`.SentenceSelection`, so that they keep their numbers
+    (:attr:`.Sentence.snum`) and ids in the built :class:`.Document`.
+    """
+    def __init__(self, min_length=None, max_length=None, **metadata):
+        self.min_length = min_length
+        self.max_length = max_length
+        self.metadata = metadata
+
+    def __and__(self, other):
+        metadata = dict(self.metadata)
+        for name, condition in other.metadata.items():
+            if name in metadata:
+                first = metadata[name]
+                metadata[name] = partial(_both, first, condition)
+            else:
+                metadata[name] = condition
+        return Where(_tighter(self.min_length, other.min_length, max),
+                     _tighter(self.max_length, other.max_length, min), **metadata)
+
+    def document(self, doc):
+        """True if the metadata of a raw document dict pass the conditions."""
+        meta = doc.get('metadata') or {}
+        return all(_match(meta.get(name), condition) for name, condition in self.metadata.items())
+
+    def sentence(self, sentence):
+        """True if the length of a raw sentence dict passes the conditions."""
+        n = sentence_length(sentence)
+        return (self.min_length is None or self.min_length <= n) and \
+            (self.max_length is None or n <= self.max_length)
+
+    def __call__(self, doc):
+        if not self.document(doc):
+            return None
+        if self.min_length is None and self.max_length is None:
+            return doc
+
+        sentences = SentenceSelection((i, s) for i, s in enumerate(doc.get('sentence', []), 1)
+                                      if self.sentence(s))
+        if not sentences:
+            return None
+        if len(sentences) < len(doc['sentence']):
+            doc = dict(doc, sentence=sentences)
+        return doc
+
+    def __repr__(self):
+        return 'Where(min_length={}, max_length={}, {})'.format(
+            self.min_length, self.max_length,
+            ', '.join('{}={!r}'.format(k, v) for k, v in self.metadata.items()))
+
+
+def _both(first, second, value):
+    return _match(value, first) and _match(value, second)
+
+
+def _tighter(a, b, choose):
+    if a is None:
+        return b
+    elif b is None:
+        return a
+    return choose(a, b)
+
+
+def _flatten_sentences(doc):
+    return doc.sentence_list
+
+
+def _run_file(filename, where, stages):
+    """Iterate the results of the stages over the documents of a file."""
+    for doc in NiklansonStreamReader(filename, where=where):
+        items = [doc]
+        for kind, func in stages:
+            if kind == 'filter':
+                items = [x for x in items if func(x)]
+            elif kind == 'map':
+                items = [func(x) for x in items]
+            else:
+                items = [y for x in items for y in func(x)]
+            if not items:
+                break
+        yield from items
+
+
+class Pipeline:
+    """A chain of stages over the documents of corpus files.
+
+    Each method returns a new pipeline, so a pipeline can be the start of
+    several others. Use :meth:`source` to make the first one.
+
+    :param files: list of corpus file paths
+    :param max_workers: number of worker processes, 1 for no process pool
+    """
+    def __init__(self, files, max_workers=None, where=None, stages=(), batch_size=None):
+        self.files = list(files)
+        self.max_workers = max_workers
+        self.__where = where
+        self.__stages = tuple(stages)
+        self.__batch_size = batch_size
+
+    @classmethod
+    def source(cls, path, pattern='*.json', max_workers=None):
+        """Pipeline over the corpus files of a file or directory (see :func:`.corpus_files`)."""
+        return cls(corpus_files(path, pattern), max_workers=max_workers)
+
+    def __then(self, where=None, stage=None, batch_size=None):
+        if self.__batch_size is not None and (where is not None or stage is not None):
+            raise ValueError('no stage can follow batch()')
+        if where is not None and self.__where is not None:
+            where = self.__where & where
+        return Pipeline(self.files, self.max_workers,
+                        where if where is not None else self.__where,
+                        self.__stages + ((stage,) if stage is not None else ()),
+                        batch_size if batch_size is not None else self.__batch_size)
+
+    def where(self, min_length=None, max_length=None, **metadata):
+        """Keep the documents whose metadata pass the conditions and the
+        sentences of ``min_length`` to ``max_length`` words (see :class:`Where`).
+
+        The conditions are checked before the documents are built, wherever
+        :meth:`where` is in the chain.
+        """
+        return self.__then(where=Where(min_length, max_length, **metadata))
+
+    def filter(self, func):
+        """Keep the items for which ``func`` is true."""
+        return self.__then(stage=('filter', func))
+
+    def map(self, func):
+        """Replace each item by ``func(item)``."""
+        return self.__then(stage=('map', func))
+
+    def flat_map(self, func):
+        """Replace each item by the items of the iterable ``func(item)``."""
+        return self.__then(stage=('flat_map', func))
+
+    def sentences(self):
+        """Replace each :class:`.Document` by its :class:`.Sentence`\\ s."""
+        return self.flat_map(_flatten_sentences)
+
+    def batch(self, size):
+        """Group the items into lists of ``size`` items. The last one may be shorter."""
+        if size < 1:
+            raise ValueError('batch size must be positive: {}'.format(size))
+        return self.__then(batch_size=size)
+
+    def __items(self):
+        func = partial(_run_file, where=self.__where, stages=self.__stages)
+        yield from imap_files(func, self.files, self.max_workers)
+
+    def __iter__(self):
+        if self.__batch_size is None:
+            yield from self.__items()
+            return
+
+        batch = []
+        for item in self.__items():
+            batch.append(item)
+            if len(batch) == self.__batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def run(self, sink):
+        """Pass every item (or batch) to the sink.
+
+        :param sink: a function, or an object with a ``write`` method such as a
+          text file, in which case each item is written on a line
+        :return: number of items passed to the sink
+        """
+        if hasattr(sink, 'write'):
+            def write(item):
+                sink.write(item if isinstance(item, str) else str(item))
+                sink.write('\n')
+        else:
+            write = sink
+
+        count = 0
+        for item in self:
+            write(item)
+            count += 1
+        return count
+
+    def __repr__(self):
+        return 'Pipeline(files={}, where={}, stages={}, batch_size={})'.format(
+            len(self.files), self.__where, [kind for kind, func in self.__stages], self.__batch_size)
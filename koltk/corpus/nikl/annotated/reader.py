@@ -8,7 +8,23 @@ try:
 except ImportError:
     import json
 
-from .object import Corpus, CorpusMetadata, DocumentList, Document
+from .object import Corpus, CorpusMetadata, DocumentList, LazyDocumentList, Document
+from .stream import DocumentScanner, corpus_files, map_files
+from .archive import open_binary, is_seekable
+
+
+def _load(file):
+    """Return (file name, data) of a file object or a path for :func:`.open_binary`.
+
+    The file name of a file object without a name, such as the zstd reader of
+    a ``.zst`` file, is None.
+    """
+    if isinstance(file, (str, os.PathLike)):
+        with open_binary(file) as f:
+            return os.fspath(file), json.loads(f.read().decode('utf-8-sig'))
+    else:
+        return getattr(file, 'name', None), json.load(file)
+
 
 class NiklansonReader:
     """NIKL ANnotated corpus JSON format file reader.
@@ -16,27 +32,69 @@ class NiklansonReader:
     Wrap file contents into a corpus. The top level object of a file may be a
     corpus or a doucment.
 
+    :param file: a file object, or a path to a plain file, a compressed file
+      or a member of a zip archive (see :func:`.open_binary`)
+    :param lazy: build the documents of a corpus only when they are accessed
+      (see :class:`.LazyDocumentList`). For a path of a plain file, only the
+      byte ranges of the documents are kept, and a document is read again
+      from the file when it is built. A compressed file or a zip member
+      cannot be read at random: open it with :func:`.open_binary` and pass
+      the file object, to keep the raw documents and build them lazily.
+    :param cache_size: number of built documents kept by a lazy corpus, None for all
+
+    ::
+
+        >>> NiklansonReader('NXNE2000211080.json.gz')
+        >>> NiklansonReader('NIKL_NE_2020.zip/NXNE2000211080.json')
+        >>> NiklansonReader('NXNE2000211080.json.zst')
+        >>> NiklansonReader(open_binary('NXNE2000211080.json.zst'), lazy=True)  # filename is None
     """
-    def __init__(self, file):
-        self.__filename = file.name
-        self.__data = json.load(file)
+    def __init__(self, file, lazy=False, cache_size=None):
+        if lazy and isinstance(file, (str, os.PathLike)):
+            self.__init_lazy(os.fspath(file), cache_size)
+            return
+
+        self.__filename, self.__data = _load(file)
 
         if 'document' in self.__data:
             self.__toplevel = 'corpus'
-            self.__corpus = Corpus.from_dict(self.__data)
+            if lazy:
+                self.__corpus = Corpus(**self.__data, lazy=True, cache_size=cache_size)
+            else:
+                self.__corpus = Corpus.from_dict(self.__data)
         elif 'sentence' in self.__data:
             self.__toplevel = 'document'
             self.__document = Document.from_dict(self.__data)
         else:
             self.__toplevel = None
 
+    def __init_lazy(self, filename, cache_size):
+        if not is_seekable(filename):
+            raise ValueError('lazy reading by byte ranges needs a plain file, pass an open file object '
+                             'to read {} lazily from memory'.format(filename))
+        self.__filename = filename
+        ranges, ids = [], []
+        with open_binary(filename) as file:
+            scanner = DocumentScanner(file)
+            for begin, end, doc in scanner:
+                ranges.append((begin, end))
+                ids.append(doc.get('id'))
+
+        self.__toplevel = scanner.toplevel
+        if scanner.toplevel == 'corpus':
+            self.__corpus = Corpus(**scanner.header)
+            self.__corpus.document = LazyDocumentList(ranges, parent=self.__corpus, cache_size=cache_size,
+                                                      file=filename, ids=ids)
+        elif scanner.toplevel == 'document':
+            self.__document = Document.from_dict(scanner.header)
+
     @property
     def filename(self):
         return self.__filename
     
     @property
     def basename(self):
-        return os.path.basename(self.__filename)
+        return os.path.basename(self.__filename) if self.__filename is not None else None
 
     @property
     def toplevel(self):
@@ -80,8 +138,7 @@ class NiklansonCorpusReader:
     Read a NIKL annotated corpus JSON file.
     """
     def __init__(self, file):
-        self.filename = file.name
-        self.data = json.load(file)
+        self.filename, self.data = _load(file)
         
     @property
     def corpus(self):
@@ -93,8 +150,7 @@ class NiklansonDocumentReader:
     Read NIKL annotated document JSON files
     """
     def __init__(self, file, encoding='utf-8'):
-        self.filename = file.name
-        self.data = json.load(file)
+        self.filename, self.data = _load(file)
 
     @property
     def document(self):
@@ -104,3 +160,111 @@ class NiklansonDocumentReader:
 
 
 
+
+
+class NiklansonStreamReader:
+    """NIKL ANnotated corpus JSON format file reader for large files.
+
+    Unlike :class:`NiklansonReader`, it does not load the whole file. Documents
+    are decoded and built one at a time while iterating::
+
+        >>> with open('NXRW1900000001.json', 'rb') as file:
+        ...     reader = NiklansonStreamReader(file)
+        ...     for document in reader:
+        ...         print(document.id)
+
+    :param file: a file object, or a path for :func:`.open_binary`. A file
+      opened from a path is closed when the iteration ends.
+    :param where: function of a raw document dict, such as a :class:`.Where`,
+      called before the document is built. It returns the dict to build, or
+      None to skip the document.
+    """
+    def __init__(self, file, where=None):
+        self.__where = where
+        if isinstance(file, (str, os.PathLike)):
+            self.__filename = os.fspath(file)
+            self.__file = None
+        else:
+            self.__filename = getattr(file, 'name', None)
+            self.__file = file
+        self.__scanner = None
+
+    @property
+    def filename(self):
+        return self.__filename
+
+    @property
+    def basename(self):
+        return os.path.basename(self.__filename) if self.__filename is not None else None
+
+    @property
+    def toplevel(self):
+        """'corpus' or 'document'. None until the top level object is known."""
+        if self.__scanner is not None:
+            return self.__scanner.toplevel
+
+    @property
+    def metadata(self):
+        """:class:`.CorpusMetadata` if the members before the documents have been read"""
+        if self.__scanner is not None and self.__scanner.metadata is not None:
+            return CorpusMetadata(**self.__scanner.metadata)
+
+    @property
+    def header(self):
+        """raw members of the top level object other than the documents"""
+        if self.__scanner is not None:
+            return self.__scanner.header
+
+    def raw(self):
+        """Iterate ``(begin, end, document_dict)``, with the byte range of each document."""
+        if self.__file is not None:
+            self.__scanner = DocumentScanner(self.__file)
+            yield from self.__scanner
+        else:
+            with open_binary(self.__filename) as file:
+                self.__scanner = DocumentScanner(file)
+                yield from self.__scanner
+
+    def __iter__(self):
+        where = self.__where
+        for begin, end, doc in self.raw():
+            if where is not None:
+                doc = where(doc)
+                if doc is None:
+                    continue
+            yield Document.from_dict(doc)
+
+    def __repr__(self):
+        return 'NiklansonStreamReader(filename={}, toplevel={})'.format(self.filename, self.toplevel)
+
+
+def _read_documents(filename):
+    return list(NiklansonReader(filename).document_list)
+
+
+class NiklansonDirectoryReader:
+    """Reader of all the corpus files in a directory tree.
+
+    Compressed files and the members of zip archives are read without
+    extracting them. Files are loaded in a process pool, and the documents
+    are iterated in the order of the files::
+
+        >>> for document in NiklansonDirectoryReader('NIKL_NE_2020/'):
+        ...     print(document.id)
+
+    :param path: a directory, a zip archive or a corpus file
+    :param pattern: file name pattern of the corpus files
+    :param max_workers: number of worker processes, 1 for no process pool
+    """
+    def __init__(self, path, pattern='*.json', max_workers=None):
+        self.path = path
+        self.pattern = pattern
+        self.max_workers = max_workers
+        self.filenames = corpus_files(path, pattern)
+
+    def __iter__(self):
+        for documents in map_files(_read_documents, self.filenames, self.max_workers):
+            yield from documents
+
+    def __repr__(self):
+        return 'NiklansonDirectoryReader(path={}, files={})'.format(self.path, len(self.filenames))
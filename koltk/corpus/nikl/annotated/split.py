@@ -0,0 +1,171 @@
+"""Split a NIKL Annotated Corpus JSON file into shards
+
+Documents are read one at a time with :class:`.DocumentScanner` and written
+straight to the shard files, so memory use does not grow with the corpus
+size. Each shard is a valid corpus file with the ``id`` and ``metadata`` of
+the original corpus.
+
+::
+
+    >>> manifest = split('NXRW1900000001.json', 8, 'shards/', by='sentence')
+
+Documents are assigned by
+
+- ``'sentence'``, ``'token'`` or ``'byte'``: to the shard with the smallest
+  size so far, which balances the shards in that unit
+- ``'hash'``: by the hash of the document id, which is stable between runs
+  and corpus versions
+"""
+
+import os
+import heapq
+import hashlib
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+from .object import document_fwid
+from .archive import open_binary, uncompressed_name
+from .stream import DocumentScanner
+
+
+SPLIT_METHODS = ('sentence', 'token', 'byte', 'hash')
+
+
+def _tokens(doc):
+    return sum(len(s.get('form', '').split()) for s in doc.get('sentence', []))
+
+
+class ShardWriter:
+    """Write documents into a corpus JSON file one by one.
+
+    :param filename: output file name
+    :param header: members of the corpus object other than ``document``.
+      Members added to the dict before :meth:`close` are written too.
+    """
+    def __init__(self, filename, header):
+        self.filename = filename
+        self.header = header
+        self.documents = 0
+        self.sentences = 0
+        self.tokens = 0
+        self.bytes = 0
+        self.__file = None
+        self.__written = set()
+
+    def __open(self):
+        self.__file = open(self.filename, 'w', encoding='utf-8')
+        self.__file.write('{')
+        for key, value in self.header.items():
+            self.__file.write(self.__member(key, value) + ',')
+        self.__file.write('"document":[')
+
+    def __member(self, key, value):
+        self.__written.add(key)
+        return '{}:{}'.format(json.dumps(key, ensure_ascii=False),
+                              json.dumps(value, ensure_ascii=False))
+
+    def write(self, doc, size=None):
+        """Append a raw document dict.
+
+        :param size: byte size of the document in the source file, if known
+        """
+        if self.__file is None:
+            self.__open()
+        elif self.documents > 0:
+            self.__file.write(',')
+        self.__file.write(json.dumps(doc, ensure_ascii=False))
+        self.documents += 1
+        self.sentences += len(doc.get('sentence', []))
+        self.tokens += _tokens(doc)
+        if size is not None:
+            self.bytes += size
+
+    def close(self):
+        if self.__file is None:
+            self.__open()
+        self.__file.write(']')
+        # members that come after the documents in the source file
+        for key, value in self.header.items():
+            if key not in self.__written:
+                self.__file.write(',' + self.__member(key, value))
+        self.__file.write('}\n')
+        self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def manifest(self):
+        return {'file': os.path.basename(self.filename),
+                'documents': self.documents,
+                'sentences': self.sentences,
+                'tokens': self.tokens,
+                'bytes': self.bytes}
+
+
+def split(filename, n, outdir, by='sentence', name_format=None, manifest='manifest.json'):
+    """Split a corpus file into ``n`` shard files.
+
+    Return the manifest, which is also written as JSON in ``outdir``
+    unless ``manifest`` is None.
+
+    :param filename: corpus JSON file name, which may be compressed or archived
+    :param n: number of shards
+    :param outdir: output directory
+    :param by: 'sentence', 'token', 'byte' or 'hash'
+    :param name_format: shard file name format, which takes the shard number.
+      The default is the base name of ``filename`` followed by the number.
+    :param manifest: manifest file name in ``outdir``
+    """
+    if by not in SPLIT_METHODS:
+        raise ValueError('by must be one of {}: {}'.format(SPLIT_METHODS, by))
+    if n < 1:
+        raise ValueError('n must be positive: {}'.format(n))
+
+    os.makedirs(outdir, exist_ok=True)
+    if name_format is None:
+        root, ext = os.path.splitext(os.path.basename(uncompressed_name(filename)))
+        name_format = root + '.{:03d}' + (ext or '.json')
+
+    with open_binary(filename) as file:
+        scanner = DocumentScanner(file)
+        writers = [ShardWriter(os.path.join(outdir, name_format.format(i)), scanner.header)
+                   for i in range(n)]
+        # (size, shard number) of the shards
+        heap = [(0, i) for i in range(n)]
+        try:
+            for begin, end, doc in scanner:
+                if by == 'hash':
+                    h = hashlib.blake2b(document_fwid(doc['id']).encode('utf-8'), digest_size=8)
+                    writers[int.from_bytes(h.digest(), 'big') % n].write(doc, end - begin)
+                    continue
+
+                size, i = heapq.heappop(heap)
+                writers[i].write(doc, end - begin)
+                if by == 'sentence':
+                    size += len(doc.get('sentence', []))
+                elif by == 'token':
+                    size += _tokens(doc)
+                else:
+                    size += end - begin
+                heapq.heappush(heap, (size, i))
+        finally:
+            for writer in writers:
+                writer.close()
+
+    result = {'source': os.path.basename(filename),
+              'id': scanner.header.get('id'),
+              'metadata': scanner.header.get('metadata'),
+              'by': by,
+              'shards': [writer.manifest() for writer in writers]}
+
+    if manifest is not None:
+        with open(os.path.join(outdir, manifest), 'w', encoding='utf-8') as file:
+            json.dump(result, file, ensure_ascii=False, indent=2)
+
+    return result
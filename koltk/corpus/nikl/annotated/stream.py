@@ -0,0 +1,364 @@
+"""Streaming access to NIKL Annotated Corpus JSON files
+
+A corpus file is a single JSON object whose ``document`` member holds every
+document of the corpus. :class:`DocumentScanner` walks such a file document by
+document, so that only one document is decoded and held in memory at a time,
+and reports the byte range of each document in the file. The byte ranges can
+be used later for random access with :func:`load_document` in plain files,
+and for a forward pass over any file with :func:`load_documents`.
+
+::
+
+    >>> with open('NXRW1900000001.json', 'rb') as file:
+    ...     scanner = DocumentScanner(file)
+    ...     for begin, end, doc in scanner:
+    ...         print(doc['id'], begin, end)
+"""
+
+import os
+import re
+import codecs
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+from .archive import open_binary, expand, is_corpus_file, is_seekable, is_stream
+
+
+_WS = re.compile(r'[ \t\n\r]*')
+_BOM = codecs.BOM_UTF8
+
+
+class DocumentScanner:
+    """Iterator of ``(begin, end, document_dict)`` over a NIKL JSON file.
+
+    ``begin`` and ``end`` are byte offsets of the document object in the file.
+    Members of the top level object other than ``document`` (``id``,
+    ``metadata``, ...) are collected in :attr:`header` as they are passed.
+
+    If the top level object is a document, it is yielded as the only document.
+
+    :param file: a file object opened in binary mode. A text file object is
+      accepted too, but the byte offsets are only right for UTF-8 files.
+    :param chunk_size: number of bytes to read at once
+    """
+    def __init__(self, file, chunk_size=1 << 20):
+        self.__file = file
+        self.__chunk_size = chunk_size
+        self.__decoder = json.JSONDecoder()
+        self.__bytes_decoder = codecs.getincrementaldecoder('utf-8')()
+        self.__buf = ''
+        self.__pos = 0
+        self.__eof = False
+        # __enc_pos (index in __buf) and __enc_bytes (byte offset in the
+        # file) mark how far the buffer has been measured in bytes.
+        self.__enc_pos = 0
+        self.__enc_bytes = 0
+        self.__bom_checked = False
+        self.header = {}
+        self.toplevel = None
+
+    @property
+    def metadata(self):
+        """the raw ``metadata`` dict of the top level object if passed"""
+        return self.header.get('metadata')
+
+    def __iter__(self):
+        return self.__scan()
+
+    def __scan(self):
+        self.__expect('{')
+        begin = self.__offset()
+        first = True
+        while True:
+            self.__skip_ws()
+            if self.__peek() == '}':
+                self.__pos += 1
+                break
+            if not first:
+                self.__expect(',')
+                self.__skip_ws()
+            first = False
+            key = self.__value()
+            self.__skip_ws()
+            self.__expect(':')
+            self.__skip_ws()
+            if key == 'document' and self.__peek() == '[':
+                self.toplevel = 'corpus'
+                yield from self.__scan_documents()
+            else:
+                self.header[key] = self.__value()
+
+        if self.toplevel is None and 'sentence' in self.header:
+            self.toplevel = 'document'
+            yield begin - 1, self.__offset(), self.header
+
+    def __scan_documents(self):
+        self.__expect('[')
+        self.__skip_ws()
+        if self.__peek() == ']':
+            self.__pos += 1
+            return
+        while True:
+            self.__skip_ws()
+            begin = self.__offset()
+            doc = self.__value()
+            yield begin, self.__offset(), doc
+            self.__skip_ws()
+            c = self.__peek()
+            self.__pos += 1
+            if c == ']':
+                return
+            elif c != ',':
+                raise ValueError('expecting , or ] at byte {}'.format(self.__offset() - 1))
+
+    def __fill(self, size=None):
+        """Read more data into the buffer. Return False at EOF."""
+        if self.__eof:
+            return False
+
+        if self.__pos > 0 and self.__pos >= len(self.__buf) // 2:
+            self.__offset()
+            self.__buf = self.__buf[self.__pos:]
+            self.__enc_pos -= self.__pos
+            self.__pos = 0
+
+        data = self.__file.read(size or self.__chunk_size)
+        if not self.__bom_checked and data:
+            self.__bom_checked = True
+            if isinstance(data, bytes) and data.startswith(_BOM):
+                data = data[len(_BOM):]
+                self.__enc_bytes = len(_BOM)
+            elif isinstance(data, str) and data.startswith('\ufeff'):
+                data = data[1:]
+
+        if isinstance(data, bytes):
+            text = self.__bytes_decoder.decode(data, final=not data)
+        else:
+            text = data
+        if not data:
+            self.__eof = True
+        self.__buf += text
+        return bool(data) or bool(text)
+
+    def __peek(self):
+        while self.__pos >= len(self.__buf):
+            if not self.__fill():
+                raise ValueError('unexpected end of file')
+        return self.__buf[self.__pos]
+
+    def __expect(self, c):
+        self.__skip_ws()
+        if self.__peek() != c:
+            raise ValueError('expecting {} at byte {}'.format(c, self.__offset()))
+        self.__pos += 1
+
+    def __skip_ws(self):
+        while True:
+            self.__pos = _WS.match(self.__buf, self.__pos).end()
+            if self.__pos < len(self.__buf) or not self.__fill():
+                return
+
+    def __value(self):
+        """Decode a JSON value at the current position."""
+        size = self.__chunk_size
+        while True:
+            try:
+                value, end = self.__decoder.raw_decode(self.__buf, self.__pos)
+                # a number or a literal may be cut at the end of the buffer
+                if end < len(self.__buf) or self.__eof:
+                    self.__pos = end
+                    return value
+            except ValueError:
+                if self.__eof:
+                    raise
+            # read more, doubling the request so that a large document costs
+            # a linear number of retries in its size
+            size = max(size, len(self.__buf) - self.__pos)
+            self.__fill(size)
+
+    def __offset(self):
+        """Byte offset of the current position."""
+        if self.__pos > self.__enc_pos:
+            self.__enc_bytes += len(self.__buf[self.__enc_pos:self.__pos].encode('utf-8'))
+            self.__enc_pos = self.__pos
+        elif self.__pos < self.__enc_pos:
+            self.__enc_bytes -= len(self.__buf[self.__pos:self.__enc_pos].encode('utf-8'))
+            self.__enc_pos = self.__pos
+        return self.__enc_bytes
+
+
+def load_document(file, begin, end):
+    """Load the raw document dict at the byte range of a file.
+
+    Random access is supported for plain files only: a compressed file or a
+    zip member would be decompressed from the start for every document. Use
+    :func:`load_documents` to read many documents of such a file in one pass.
+
+    :param file: a file object opened in binary mode or a path of a plain file.
+      A decompressing file object of :func:`.open_binary` is read forward
+      from its current position, which must not be after ``begin``.
+    :param begin: byte offset of the document, as given by :class:`DocumentScanner`
+    :param end: end byte offset of the document
+    :raise ValueError: for a compressed or archived path
+    """
+    if isinstance(file, (str, os.PathLike)):
+        if not is_seekable(file):
+            raise ValueError('random access to documents needs a plain file, '
+                             'use load_documents() for {}'.format(os.fspath(file)))
+        with open_binary(file) as f:
+            return load_document(f, begin, end)
+
+    for b, e, doc in load_documents(file, [(begin, end)]):
+        return doc
+
+
+def load_documents(file, ranges):
+    """Iterate ``(begin, end, raw document dict)`` at the byte ranges of a file,
+    in the order of the ranges in the file.
+
+    A plain file is read by seeking. Any other file, compressed or in a zip
+    archive, is read forward once, skipping the data between the ranges.
+
+    :param file: a file object opened in binary mode or a path for :func:`.open_binary`
+    :param ranges: ``(begin, end)`` byte ranges, as given by :class:`DocumentScanner`
+    :raise ValueError: if a decompressing file object is already past a range
+    """
+    if isinstance(file, (str, os.PathLike)):
+        with open_binary(file) as f:
+            yield from load_documents(f, ranges)
+        return
+
+    forward = is_stream(file)
+    pos = file.tell()
+    last = doc = None
+    for begin, end in sorted(ranges):
+        if (begin, end) != last:
+            if not forward:
+                file.seek(begin)
+            elif begin < pos:
+                raise ValueError('cannot read back to byte {} of a compressed stream at byte {}'.format(begin, pos))
+            else:
+                while pos < begin:
+                    data = file.read(min(begin - pos, 1 << 20))
+                    if not data:
+                        raise ValueError('unexpected end of file before byte {}'.format(begin))
+                    pos += len(data)
+            doc = json.loads(file.read(end - begin).decode('utf-8'))
+            pos = end
+            last = begin, end
+        yield begin, end, doc
+
+
+def corpus_files(path, pattern='*.json'):
+    """Sorted list of the corpus files in a directory tree.
+
+    Compressed files and the members of zip archives are included, as
+    paths that :func:`.open_binary` accepts.
+
+    :param path: a directory or a file name
+    :param pattern: file name pattern of the (uncompressed) corpus files
+    """
+    if not os.path.isdir(path):
+        return expand(path, pattern)
+
+    files = []
+    for root, dirs, names in os.walk(path):
+        dirs.sort()
+        for name in sorted(names):
+            if is_corpus_file(name, pattern):
+                files.extend(expand(os.path.join(root, name), pattern))
+
+    return files
+
+
+def map_files(func, files, max_workers=None, chunksize=1):
+    """Apply ``func`` to each file in a process pool and iterate the results in order.
+
+    ``func`` must be a picklable (module level) function. With ``max_workers=1``,
+    files are processed one by one in the current process.
+    """
+    if max_workers == 1:
+        yield from map(func, files)
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        yield from executor.map(func, files, chunksize=chunksize)
+
+
+def _send_chunks(func, filename, queue, chunk_size, stop):
+    """Put the items of ``func(filename)`` into the queue in lists of
+    ``chunk_size`` items, and None at the end or once ``stop`` is set."""
+    try:
+        chunk = []
+        for item in func(filename):
+            chunk.append(item)
+            if len(chunk) == chunk_size:
+                if stop.is_set():
+                    return
+                queue.put(chunk)
+                chunk = []
+        if chunk and not stop.is_set():
+            queue.put(chunk)
+    finally:
+        queue.put(None)
+
+
+def imap_files(func, files, max_workers=None, chunk_size=1000, queue_size=4):
+    """Iterate the items of the generator function ``func`` over each file, in
+    the order of the files.
+
+    Unlike :func:`map_files`, the items of a file are not collected into one
+    list. With ``max_workers=1``, they are made in the current process as they
+    are iterated. Otherwise, up to ``max_workers`` files are processed at a
+    time in a process pool, and each worker sends the items in lists of
+    ``chunk_size`` through a queue of ``queue_size`` lists, waiting while the
+    queue is full. At most ``max_workers * queue_size * chunk_size`` items are
+    held at a time. If the iteration stops early, the workers stop at their
+    next list.
+
+    ``func`` must be a picklable (module level) function.
+    """
+    if max_workers == 1:
+        for filename in files:
+            yield from func(filename)
+        return
+
+    files = iter(files)
+    max_workers = max_workers or os.cpu_count() or 1
+    with multiprocessing.Manager() as manager, ProcessPoolExecutor(max_workers=max_workers) as executor:
+        stop = manager.Event()
+        pending = deque()       # (future, queue) of the files in progress
+
+        def submit():
+            for filename in files:
+                queue = manager.Queue(queue_size)
+                pending.append((executor.submit(_send_chunks, func, filename, queue, chunk_size, stop),
+                                queue))
+                return
+
+        try:
+            for _ in range(max_workers):
+                submit()
+            while pending:
+                future, queue = pending[0]
+                submit()
+                while True:
+                    chunk = queue.get()
+                    if chunk is None:
+                        break
+                    yield from chunk
+                pending.popleft()
+                future.result()
+        finally:
+            # unblock the workers of the files left, which stop at their next list
+            stop.set()
+            for future, queue in pending:
+                if not future.cancel():
+                    while queue.get() is not None:
+                        pass
@@ -79,6 +79,18 @@ NE_TAGS = {
 }
 
 
+def coarse_ne_tag(label):
+    """Tag of :data:`NE_TAGS` of a fine NE label, by the prefix before ``_``
+    or its first two letters (``PS_NAME`` → ``PS``, ``LCP_COUNTRY`` → ``LC``),
+    or the label itself if it has none."""
+    if label is None or label in NE_TAGS:
+        return label
+    for tag in (label.split('_', 1)[0], label[:2]):
+        if tag in NE_TAGS:
+            return tag
+    return label
+
+
 
 
 #
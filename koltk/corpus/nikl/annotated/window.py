@@ -0,0 +1,156 @@
+"""Batched context windows over coded words or morphemes
+
+:meth:`.Word.neighborAt` and :meth:`.Word.neighbors` give the window of a
+single word. :func:`window_indices` gives the windows of all the units of a
+sentence, or of all the sentences of a document, at once, from a strided
+view of an array of unit indexes padded at the boundaries: the windows of a
+single sentence are that view itself (no copy), and the windows of several
+sentences are gathered from it into one array.
+
+::
+
+    >>> codes, offsets = encode_units(doc, vocab, unit='word')
+    >>> idx = window_indices(offsets, 2, 2)        # shape (number of words, 5)
+    >>> windows = take_padded(codes, idx)          # coded forms, 0 for padding
+
+The same windows feed n-gram and collocation counting (:func:`ngrams`,
+:func:`cooccurrences`) without building Python lists per word.
+
+Requires NumPy.
+"""
+
+from collections import Counter
+
+from .optional import np, require_numpy
+
+
+def encode_units(doc, vocab, unit='word', key=None):
+    """Coded units of all the sentences of a document.
+
+    :param doc: a :class:`.Document`, a raw document dict, or a list of sentences
+    :param vocab: :class:`.Vocabulary` of the unit strings
+    :param unit: 'word' or 'morpheme'
+    :param key: function from a raw word or morpheme dict to the string to
+      code. The default is the form for words and ``form/label`` for morphemes.
+    :return: ``(codes, offsets)``: the units of the i-th sentence are
+      ``codes[offsets[i]:offsets[i+1]]``
+    """
+    require_numpy('the windowing API')
+
+    sentences = doc.get('sentence', []) if isinstance(doc, dict) else doc
+    codes = []
+    offsets = [0]
+    for s in sentences:
+        if unit == 'word':
+            words = s.get('word')
+            if words:
+                strings = [key(w) for w in words] if key else [w['form'] for w in words]
+            else:
+                strings = (s.get('form') or '').split()
+        elif unit == 'morpheme':
+            morphs = s.get('morpheme') or []
+            strings = [key(m) for m in morphs] if key else \
+                ['{}/{}'.format(m['form'], m['label']) for m in morphs]
+        else:
+            raise ValueError('unit must be word or morpheme: {}'.format(unit))
+        codes.extend(vocab.encode(strings))
+        offsets.append(offsets[-1] + len(strings))
+
+    return np.array(codes, dtype=np.int32), np.array(offsets, dtype=np.int64)
+
+
+def window_indices(offsets, left, right, pad=-1):
+    """Indexes of the ``left`` and ``right`` neighbors of every unit.
+
+    Row ``k`` is ``[k - left, ..., k, ..., k + right]``, where the indexes
+    outside the sentence of unit ``k`` are replaced by ``pad``. Windows never
+    cross sentence boundaries.
+
+    The result is read-only, of shape ``(number of units, left + 1 + right)``.
+    For a single sentence it is a strided view of a padded line of
+    ``left + n + right`` indexes (no copy). For several sentences the rows
+    of the view are not evenly spaced, because of the padding between the
+    sentences, and they are gathered into a new array of
+    ``n * (left + 1 + right)`` indexes.
+
+    :param offsets: sentence boundaries, e.g. from :func:`encode_units`.
+      ``[0, n]`` for a single sentence of n units.
+    """
+    offsets = np.asarray(offsets, dtype=np.int64)
+    n = int(offsets[-1])
+    width = left + 1 + right
+    if n == 0:
+        return np.zeros((0, width), dtype=np.int64)
+    # padded line: [pad]*left, then each sentence followed by `left + right`
+    # pads, so that the window of a unit never reaches the next sentence
+    gap = left + right
+    lengths = np.diff(offsets)
+    line = np.full(left + n + gap * len(lengths), pad, dtype=np.int64)
+    # position of unit k in the line
+    sentence_of = np.repeat(np.arange(len(lengths)), lengths)
+    pos = left + np.arange(n) + gap * sentence_of
+    line[pos] = np.arange(n)
+    stride = line.strides[0]
+    windows = np.lib.stride_tricks.as_strided(line, shape=(len(line) - width + 1, width),
+                                              strides=(stride, stride), writeable=False)
+    if len(lengths) == 1:
+        # the window of unit k starts at k in the line
+        return windows[:n]
+    # the window of unit k starts `left` before its position
+    result = windows[pos - left]
+    result.flags.writeable = False
+    return result
+
+
+def sentence_windows(offsets, n):
+    """Strided view of all the n-unit windows inside the sentences.
+
+    Return ``(windows, valid)``: ``windows[k]`` are the unit indexes
+    ``k, ..., k + n - 1`` and ``valid[k]`` is True if they are in one sentence.
+    """
+    offsets = np.asarray(offsets, dtype=np.int64)
+    total = int(offsets[-1])
+    if total < n:
+        return np.zeros((0, n), dtype=np.int64), np.zeros(0, dtype=bool)
+    idx = np.arange(total)
+    windows = np.lib.stride_tricks.as_strided(idx, shape=(total - n + 1, n),
+                                              strides=(idx.strides[0], idx.strides[0]), writeable=False)
+    sentence_of = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    valid = sentence_of[:total - n + 1] == sentence_of[n - 1:]
+    return windows, valid
+
+
+def take_padded(codes, indices, pad_code=0):
+    """Codes at the indexes, with ``pad_code`` where the index is negative."""
+    codes = np.asarray(codes)
+    out = codes[np.maximum(indices, 0)]
+    out[indices < 0] = pad_code
+    return out
+
+
+def ngrams(codes, offsets, n):
+    """Counter of the n-grams (tuples of codes) inside the sentences."""
+    windows, valid = sentence_windows(offsets, n)
+    grams = np.asarray(codes)[windows[valid]]
+    if len(grams) == 0:
+        return Counter()
+    uniq, counts = np.unique(grams, axis=0, return_counts=True)
+    return Counter({tuple(g): int(c) for g, c in zip(uniq.tolist(), counts.tolist())})
+
+
+def cooccurrences(codes, offsets, left, right):
+    """Counter of ``(code, neighbor code, relative position)`` inside ``-left..+right``.
+
+    This is the usual table for collocation measures such as PMI or t-score.
+    """
+    codes = np.asarray(codes)
+    idx = window_indices(offsets, left, right)
+    rel = np.arange(-left, right + 1)
+    keep = (idx >= 0) & (rel != 0)
+    centers = np.broadcast_to(np.arange(len(idx))[:, None], idx.shape)[keep]
+    triples = np.stack([codes[centers], codes[idx[keep]],
+                        np.broadcast_to(rel, idx.shape)[keep]], axis=1)
+    if len(triples) == 0:
+        return Counter()
+    uniq, counts = np.unique(triples, axis=0, return_counts=True)
+    return Counter({tuple(t): int(c) for t, c in zip(uniq.tolist(), counts.tolist())})
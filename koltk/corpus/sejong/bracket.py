@@ -0,0 +1,310 @@
+# -*- coding: utf-8; tab-width: 4 -*-
+# Bracketed Tree Reader for the Sejong Parsed Corpus
+# $Id$
+
+"""
+Tokenizer-based reader of Sejong parsed trees.
+
+L{parsed.ForestWalker} reads the corpus line by line and relies on its
+layout: one terminal per line, tab separated nodes and the closing
+parentheses at the end of the line. L{BracketReader} reads the trees as
+s-expressions instead. The bytes of the file are split into tokens by a
+single regular expression, so any whitespace and line layout is accepted,
+and a parenthesis followed by C{/} is a morph, as in C{(/SS} and C{)/SS}::
+
+	; 그 신세계에 냉동 태아(冷凍 胎兒)가 등장한다.
+	(S (NP_AJT (DP 그/MM) (NP_AJT 신/XPN + 세계/NNG + 에/JKB))
+	   (S (NP_SBJ (NP (NP (NP 냉동/NNG) (NP 태아/NNG))
+	      (NP_PRN (L (/SS) (NP_PRN (NP (NP 冷凍/SH) (NP 胎兒/SH)) (R_PRN )/SS))))
+	      (X_SBJ 가/JKS)) (VP 등장/NNG + 하/XSV + ㄴ다/EF + ./SF)))
+
+Labels and morph strings stay bytes until they are needed and each distinct
+one is decoded once. L{read_compact} decodes only the new strings of the
+pools of a L{CompactForest}.
+::
+
+	for tree in BracketReader('BGJO0150.bnk'):
+		do (tree)
+
+	forest = read_compact('BGJO0150.bnk')
+"""
+__docformat__ = 'epytext'
+import os
+import re
+
+# intra-package references
+from .parsed import Tree, Node, TerminalNode, Sentence, TreeParseError
+from .morph import Word, parse_morph_string
+from .compact import CompactForest
+from .source import open_sejong_bytes
+
+_TOKEN = re.compile(br"""
+	(^;\ [^\r\n]*)					# sentence form line
+	|(\((?!/)[^\s()]*)				# open parenthesis and label
+	|(\))(?!/)						# close parenthesis
+	|((?:[^\s()]|[()](?=/))+		# morph string, up to the close parenthesis
+	 (?:\s+(?:[^\s()]|[()](?=/))+)*)
+""", re.M | re.X)
+
+BLOCK_SIZE = 1 << 20
+MAX_CACHE_SIZE = 1 << 18
+
+
+def tokenize(data):
+	"""
+	:param data: bytes of parsed corpus text
+	:rtype: list of (sentence form line, open, close, morph string) tuples
+	  of bytes
+	:return: the tokens. Only one member of a token is not empty: a
+	  sentence form line, an open parenthesis with its label (C{b'(NP_SBJ'}),
+	  a close parenthesis, or a morph string (C{b'철수/NNP + 가/JKS'}), which
+	  may span lines.
+	"""
+	return _TOKEN.findall(data)
+
+
+def _decoder(encoding, prefix=''):
+	cache = {}
+	def decode(b):
+		s = cache.get(b)
+		if s is None:
+			if len(cache) >= MAX_CACHE_SIZE:
+				cache.clear()
+			s = cache[b] = prefix + ' '.join(b.decode(encoding).split())
+		return s
+	return decode
+
+
+def _blocks(file, block_size=BLOCK_SIZE):
+	"""
+	Blocks of whole trees, cut before a sentence form line.
+	"""
+	rest = b''
+	while True:
+		data = file.read(block_size)
+		if not data:
+			break
+		data = rest + data
+		cut = data.rfind(b'\n; ') + 1
+		if cut == 0:
+			rest = data
+		else:
+			rest = data[cut:]
+			yield data[:cut]
+	if rest:
+		yield rest
+
+
+class BracketReader:
+	"""BracketReader
+
+	An iterator of L{Tree}s, as L{parsed.ForestWalker}, that tokenizes the
+	file instead of reading it line by line. Tree ids are the 1-based
+	numbers of the trees in the file.
+	"""
+	def __init__(self, file, encoding=None, block_size=BLOCK_SIZE):
+		"""
+		:param file: a file name, or a file object opened in binary mode
+		:param encoding: encoding of the file, detected for a file name and
+		  UTF-8 for a file object if None. An original corpus file is read
+		  through L{source.SejongTextFile}.
+		:param block_size: number of bytes to read at a time
+		"""
+		if isinstance(file, (str, os.PathLike)):
+			self.file, encoding = open_sejong_bytes(file, encoding)
+		else:
+			self.file = getattr(file, 'buffer', file)
+			encoding = encoding or 'utf-8'
+		self.encoding = encoding
+		self.number_of_trees = 0
+		self.__label = _decoder(encoding)
+		self.__morph_string = _decoder(encoding, ' ')
+		self.__trees = self.__generate(block_size)
+
+	def __iter__(self):
+		return self
+
+	def __next__(self):
+		return next(self.__trees)
+
+	def readtree(self):
+		"""
+		:rtype: L{Tree}
+		:raise StopIteration: at the end of the file
+		:raise TreeParseError: if the tree is malformed
+		"""
+		return next(self.__trees)
+
+	def close(self):
+		self.file.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+	def __generate(self, block_size):
+		for data in _blocks(self.file, block_size):
+			yield from self.parse(data)
+
+	def parse(self, data):
+		"""
+		Iterate the trees of bytes of whole trees.
+		"""
+		label, morph_string = self.__label, self.__morph_string
+		encoding = self.encoding
+		tree = None
+		stack = []
+		text = None
+		ord = 0
+		for form, opening, close, string in _TOKEN.findall(data):
+			if close:
+				if not stack:
+					raise TreeParseError('unbalanced parenthesis after tree {}'.format(
+						self.number_of_trees))
+				node = stack.pop()
+				if text is not None:
+					if node.first_child is not None:
+						raise TreeParseError('morph string after a node in tree {}'.format(tree.id))
+					ord += 1
+					ms = morph_string(text)
+					text = None
+					tnode = TerminalNode(ord, node, ms, Word(ord, ms, parse_morph_string(ms), ms))
+					node.first_child = tnode
+					tree.lexical_nodes.append(tnode)
+				if not stack:
+					self.number_of_trees += 1
+					yield tree
+			elif opening:
+				if text is not None:
+					raise TreeParseError('node after a morph string in tree {}'.format(tree.id))
+				node = Node(None, label(opening[1:]))
+				node.head_flag = True
+				if stack:
+					# Node.add_child, inlined
+					parent = node.parent = stack[-1]
+					if parent.first_child is None:
+						parent.first_child = node
+					elif parent.second_child is None:
+						parent.second_child = node
+						parent.first_child.head_flag = False
+					else:
+						raise TreeParseError('more than 2 children: {}'.format(node.name))
+				elif tree is None or tree.root is not None:
+					raise TreeParseError('no sentence form line for tree {}'.format(
+						self.number_of_trees + 1))
+				else:
+					tree.root = node
+				stack.append(node)
+			elif string:
+				if not stack:
+					raise TreeParseError('morph string out of a node after tree {}: {}'.format(
+						self.number_of_trees, string.decode(encoding, 'replace')))
+				text = string
+			else:
+				if stack:
+					raise TreeParseError('unclosed tree {}'.format(tree.id))
+				id = str(self.number_of_trees + 1)
+				tree = Tree(id, Sentence(id, form[2:].rstrip().decode(encoding), None))
+				ord = 0
+		if stack:
+			raise TreeParseError('unclosed tree {}'.format(tree.id))
+
+
+def read_compact(file, forest=None, encoding=None, block_size=BLOCK_SIZE):
+	"""
+	Read the trees of a file into a L{CompactForest} without making L{Node}
+	objects. Labels and morph strings are looked up as bytes, and only the
+	new ones are decoded and added to the pools of the forest.
+
+	:param file: a file name, or a file object opened in binary mode
+	:param forest: forest to add the trees to, a new one if None
+	:param encoding: encoding of the file, as for L{BracketReader}
+	:rtype: L{CompactForest}
+	"""
+	if forest is None:
+		forest = CompactForest()
+	if isinstance(file, (str, os.PathLike)):
+		f, encoding = open_sejong_bytes(file, encoding)
+		try:
+			return read_compact(f, forest, encoding, block_size)
+		finally:
+			f.close()
+	file = getattr(file, 'buffer', file)
+	encoding = encoding or 'utf-8'
+
+	label_code = {}
+	morph_code = {}
+	parent, first, second = forest.parent, forest.first, forest.second
+	label, head, ords, morph = forest.label, forest.head, forest.ord, forest.morph
+	number_of_trees = 0
+	form_line = None
+	base = len(parent)
+	ord = 0
+
+	def add(p, lcode, ord, mcode):
+		i = len(parent) - base
+		parent.append(p)
+		first.append(-1)
+		second.append(-1)
+		label.append(lcode)
+		head.append(1)
+		ords.append(ord)
+		morph.append(mcode)
+		if p >= 0:
+			if first[base + p] == -1:
+				first[base + p] = i
+			elif second[base + p] == -1:
+				second[base + p] = i
+				head[base + first[base + p]] = 0
+			else:
+				raise TreeParseError('more than 2 children in tree {}'.format(number_of_trees + 1))
+		return i
+
+	for data in _blocks(file, block_size):
+		stack = []
+		text = None
+		for form, opening, close, string in _TOKEN.findall(data):
+			if string:
+				if not stack:
+					raise TreeParseError('morph string out of a node after tree {}'.format(number_of_trees))
+				text = string
+			elif opening:
+				if text is not None:
+					raise TreeParseError('node after a morph string in tree {}'.format(number_of_trees + 1))
+				if not stack and (form_line is None or len(parent) > base):
+					raise TreeParseError('no sentence form line for tree {}'.format(number_of_trees + 1))
+				b = opening[1:]
+				code = label_code.get(b)
+				if code is None:
+					code = label_code[b] = forest.labels.code(b.decode(encoding))
+				stack.append(add(stack[-1] if stack else -1, code, 0, -1))
+			elif close:
+				if not stack:
+					raise TreeParseError('unbalanced parenthesis after tree {}'.format(number_of_trees))
+				i = stack.pop()
+				if text is not None:
+					if first[base + i] != -1:
+						raise TreeParseError('morph string after a node in tree {}'.format(number_of_trees + 1))
+					code = morph_code.get(text)
+					if code is None:
+						code = morph_code[text] = forest.morphs.code(' ' + ' '.join(text.decode(encoding).split()))
+					text = None
+					ord += 1
+					add(i, -1, ord, code)
+				if not stack:
+					number_of_trees += 1
+					forest.offsets.append(len(parent))
+					forest.ids.append(str(number_of_trees))
+					forest.forms.append(form_line[2:].rstrip().decode(encoding))
+					form_line = None
+			else:
+				if stack:
+					raise TreeParseError('unclosed tree {}'.format(number_of_trees + 1))
+				form_line = form
+				base = len(parent)
+				ord = 0
+		if stack:
+			raise TreeParseError('unclosed tree {}'.format(number_of_trees + 1))
+	return forest
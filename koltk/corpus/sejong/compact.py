@@ -0,0 +1,284 @@
+# -*- coding: utf-8; tab-width: 4 -*-
+# Compact Sejong Parsed Trees
+# $Id$
+
+"""
+Compact, array-backed representation of Sejong parsed trees.
+
+A L{CompactForest} holds many trees in a few flat arrays, one entry per
+node, instead of a web of L{parsed.Node} objects. The nodes of a tree are
+numbered from 0 (the root) in preorder, and the arrays hold for each node
+
+ - parent: node number of the parent, -1 for the root
+ - first, second: node numbers of the children, -1 for none
+ - label: code of the node label in L{CompactForest.labels}, -1 for
+   terminal nodes
+ - head: 1 if the node is the head of its parent
+ - ord: order of a terminal in the sentence, 0 for the other nodes
+ - morph: code of the morph string of a terminal in L{CompactForest.morphs},
+   -1 for the other nodes
+
+Labels and morph strings are interned in pools shared by all the trees.
+::
+
+	forest = CompactForest.from_trees(ForestWalker('BGJO0150.bnk'))
+	tree = forest[10]				# CompactTree
+	for i in tree.terminals():
+		print(tree.ord(i), tree.morph_string(i), tree.label(tree.parent(i)))
+	tree.to_tree()					# parsed.Tree
+"""
+
+from array import array
+
+# intra-package references
+from . import parsed
+from .morph import Word, parse_morph_string
+
+
+class Interner:
+	"""
+	Two-way mapping between strings and integer codes.
+	"""
+	def __init__(self, strings=()):
+		self.strings = []
+		self.index = {}
+		for s in strings:
+			self.code(s)
+
+	def code(self, s):
+		"""
+		:rtype: int
+		:return: the code of the string, added if it is new
+		"""
+		c = self.index.get(s)
+		if c is None:
+			c = len(self.strings)
+			self.index[s] = c
+			self.strings.append(s)
+		return c
+
+	def get(self, s, default=None):
+		"""
+		:return: the code of the string, or default if it is not interned
+		"""
+		return self.index.get(s, default)
+
+	def __getitem__(self, c):
+		return self.strings[c]
+
+	def __len__(self):
+		return len(self.strings)
+
+	def __contains__(self, s):
+		return s in self.index
+
+
+class CompactForest:
+	"""
+	Trees stored in parallel arrays of nodes.
+	"""
+	def __init__(self):
+		self.labels = Interner()
+		"""node label pool
+		:type: L{Interner}"""
+		self.morphs = Interner()
+		"""morph string pool
+		:type: L{Interner}"""
+		self.ids = []
+		self.forms = []
+		self.offsets = array('q', [0])
+		"""the nodes of the i-th tree are offsets[i] to offsets[i+1]"""
+		self.parent = array('i')
+		self.first = array('i')
+		self.second = array('i')
+		self.label = array('i')
+		self.head = array('b')
+		self.ord = array('i')
+		self.morph = array('i')
+
+	@classmethod
+	def from_trees(cls, trees):
+		"""
+		:param trees: iterable of L{parsed.Tree}, e.g. a L{parsed.ForestWalker}
+		:rtype: L{CompactForest}
+		"""
+		forest = cls()
+		for tree in trees:
+			forest.add(tree)
+		return forest
+
+	def add(self, tree):
+		"""
+		Add a L{parsed.Tree}.
+
+		:rtype: int
+		:return: the number of the tree in the forest
+		"""
+		base = len(self.parent)
+		# preorder numbering: (node, parent number)
+		stack = [(tree.root, -1)]
+		while stack:
+			node, parent = stack.pop()
+			i = len(self.parent) - base
+			self.parent.append(parent)
+			self.first.append(-1)
+			self.second.append(-1)
+			self.head.append(1 if node.is_head() else 0)
+			if parent >= 0:
+				if self.first[base + parent] == -1:
+					self.first[base + parent] = i
+				else:
+					self.second[base + parent] = i
+
+			if isinstance(node, parsed.TerminalNode):
+				self.label.append(-1)
+				self.ord.append(node.ord)
+				self.morph.append(self.morphs.code(node.morph_string))
+			else:
+				self.label.append(self.labels.code(node.name))
+				self.ord.append(0)
+				self.morph.append(-1)
+				if node.second_child is not None:
+					stack.append((node.second_child, i))
+				if node.first_child is not None:
+					stack.append((node.first_child, i))
+
+		self.offsets.append(len(self.parent))
+		self.ids.append(tree.id)
+		self.forms.append(tree.sentence.form)
+		return len(self.ids) - 1
+
+	def __len__(self):
+		return len(self.ids)
+
+	def __getitem__(self, n):
+		"""
+		:rtype: L{CompactTree}
+		"""
+		if n < 0:
+			n += len(self.ids)
+		if not 0 <= n < len(self.ids):
+			raise IndexError('tree index out of range')
+		return CompactTree(self, n)
+
+	def __iter__(self):
+		for n in range(len(self.ids)):
+			yield CompactTree(self, n)
+
+	def number_of_nodes(self):
+		return len(self.parent)
+
+
+class CompactTree:
+	"""
+	A tree of a L{CompactForest}. Nodes are numbered from 0 (the root) in
+	preorder.
+	"""
+	__slots__ = ('forest', 'n', 'base', 'size')
+
+	def __init__(self, forest, n):
+		self.forest = forest
+		self.n = n
+		self.base = forest.offsets[n]
+		self.size = forest.offsets[n + 1] - self.base
+
+	@property
+	def id(self):
+		return self.forest.ids[self.n]
+
+	@property
+	def form(self):
+		return self.forest.forms[self.n]
+
+	def __len__(self):
+		"""number of nodes"""
+		return self.size
+
+	def parent(self, i):
+		return self.forest.parent[self.base + i]
+
+	def first_child(self, i):
+		return self.forest.first[self.base + i]
+
+	def second_child(self, i):
+		return self.forest.second[self.base + i]
+
+	def children(self, i):
+		"""
+		:rtype: list of int
+		"""
+		f = self.forest
+		return [c for c in (f.first[self.base + i], f.second[self.base + i]) if c >= 0]
+
+	def is_head(self, i):
+		return self.forest.head[self.base + i] == 1
+
+	def is_terminal(self, i):
+		return self.forest.label[self.base + i] < 0
+
+	def label(self, i):
+		"""
+		:return: the label of a node, or the morph string of a terminal
+		"""
+		f = self.forest
+		code = f.label[self.base + i]
+		return f.labels[code] if code >= 0 else f.morphs[f.morph[self.base + i]]
+
+	def label_code(self, i):
+		return self.forest.label[self.base + i]
+
+	def ord(self, i):
+		return self.forest.ord[self.base + i]
+
+	def morph_string(self, i):
+		code = self.forest.morph[self.base + i]
+		return self.forest.morphs[code] if code >= 0 else None
+
+	def terminals(self):
+		"""
+		:rtype: list of int
+		:return: the terminal nodes in the order of the sentence
+		"""
+		f, b = self.forest, self.base
+		return [i for i in range(self.size) if f.label[b + i] < 0]
+
+	def to_tree(self):
+		"""
+		:rtype: L{parsed.Tree}
+		"""
+		tree = parsed.Tree(self.id, parsed.Sentence(self.id, self.form, None))
+		nodes = []
+		for i in range(self.size):
+			p = self.parent(i)
+			if self.is_terminal(i):
+				ms = self.morph_string(i)
+				ord = self.ord(i)
+				morphs = parse_morph_string(ms)
+				node = parsed.TerminalNode(ord, None, ms, Word(ord, ms, morphs, ms))
+				tree.lexical_nodes.append(node)
+			else:
+				node = parsed.Node(None, self.label(i))
+			if p < 0:
+				tree.set_root(node)
+			else:
+				nodes[p].add_child(node)
+			nodes.append(node)
+
+		# head flags as stored, which add_child may have set otherwise
+		for i, node in enumerate(nodes):
+			node.set_head(self.is_head(i))
+		tree.set_current_node(tree.root)
+		return tree
+
+	@classmethod
+	def from_tree(cls, tree, forest=None):
+		"""
+		:param forest: forest to add the tree to, a new one if None
+		:rtype: L{CompactTree}
+		"""
+		if forest is None:
+			forest = CompactForest()
+		return cls(forest, forest.add(tree))
+
+	def __repr__(self):
+		return 'CompactTree(id={}, nodes={})'.format(self.id, self.size)
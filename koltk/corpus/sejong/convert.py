@@ -0,0 +1,191 @@
+# -*- coding: utf-8; tab-width: 4 -*-
+# Converts Sejong Parsed Corpus to dependency trees
+# $Id$
+
+"""
+Conversion of Sejong parsed (constituency) trees to dependency trees.
+
+The lexical head of every node is found in one bottom-up pass over a
+L{parsed.Tree}: the head child of a node is chosen by a L{HeadRules}
+object, and the head terminal of the other child depends on the head
+terminal of the node, with the label of that child. The head terminal of
+the root depends on itself.
+
+The default rules take the right child as the head, as the original
+C{bnk2dep} script did. Closing brackets and coordination may be treated
+otherwise::
+
+	rules = HeadRules(brackets='attach', coordination='left')
+	for tree in ForestWalker('BGJO0150.bnk'):
+		deptree = to_dep_tree(tree, rules)		# dep.Tree
+
+Whole files are converted in parallel and written to a buffered file::
+
+	with open('sejong.dep', 'wb') as out:
+		write_dep(['BGJO0150.bnk', 'BGJO0151.bnk'], out, max_workers=8)
+"""
+__docformat__ = 'epytext'
+import os
+from functools import partial
+
+# intra-package references
+from . import dep
+from .parsed import iter_trees
+from .morph import Word
+
+
+class HeadRules:
+	"""
+	Rules to choose the head child of a binary node.
+
+	 - brackets: C{'head'} to take a closing bracket (C{R}, C{R_PRN}, ...)
+	   as a right child for the head, as any other right child, or
+	   C{'attach'} to make the bracket depend on its left sibling.
+	 - coordination: C{'right'} to take the last conjunct as the head, or
+	   C{'left'} to take a left child with a C{_CNJ} function tag for the
+	   head, so that the next conjunct depends on it.
+
+	A subclass may override L{head} for other rules.
+	"""
+	def __init__(self, brackets='head', coordination='right'):
+		if brackets not in ('head', 'attach'):
+			raise ValueError("brackets must be 'head' or 'attach': {}".format(brackets))
+		if coordination not in ('right', 'left'):
+			raise ValueError("coordination must be 'right' or 'left': {}".format(coordination))
+		self.brackets = brackets
+		self.coordination = coordination
+
+	def head(self, node):
+		"""
+		:param node: a node with two children
+		:type node: L{parsed.Node}
+		:rtype: int
+		:return: 0 if the first child is the head, 1 if the second one is
+		"""
+		first, second = node.first_child, node.second_child
+		if self.brackets == 'attach' and is_bracket(second.name) and not is_bracket(first.name):
+			return 0
+		if self.coordination == 'left' and first.name.endswith('_CNJ'):
+			return 0
+		return 1
+
+	def __repr__(self):
+		return 'HeadRules(brackets={!r}, coordination={!r})'.format(self.brackets, self.coordination)
+
+
+def is_bracket(label):
+	"""
+	:return: True for the labels of brackets, C{L}, C{R} and their
+	  function tagged forms such as C{R_PRN}
+	"""
+	return label in ('L', 'R') or label[:2] in ('L_', 'R_')
+
+
+DEFAULT_RULES = HeadRules()
+
+
+def heads(tree, rules=None):
+	"""
+	The dependencies of the terminals of a tree, in one bottom-up pass.
+
+	:type tree: L{parsed.Tree}
+	:type rules: L{HeadRules}
+	:rtype: list of (head ord, label)
+	:return: the ord of the head terminal and the dependency label of each
+	  terminal, in the order of the terminals
+	"""
+	if rules is None:
+		rules = DEFAULT_RULES
+	result = [None] * len(tree.lexical_nodes)
+	head_of = {id(t): t for t in tree.lexical_nodes}		# id(node) -> head terminal
+
+	# postorder: a node is visited again when its children are done
+	stack = [(tree.root, False)]
+	while stack:
+		node, done = stack.pop()
+		if id(node) in head_of:
+			continue
+		elif not done:
+			stack.append((node, True))
+			if node.second_child is not None:
+				stack.append((node.second_child, False))
+			stack.append((node.first_child, False))
+		elif node.second_child is None:
+			head_of[id(node)] = head_of[id(node.first_child)]
+		else:
+			children = (node.first_child, node.second_child)
+			h = rules.head(node)
+			head = head_of[id(children[h])]
+			dependent = children[1 - h]
+			result[head_of[id(dependent)].ord - 1] = (head.ord, dependent.name)
+			head_of[id(node)] = head
+
+	root_head = head_of[id(tree.root)]
+	result[root_head.ord - 1] = (root_head.ord, tree.root.name)
+	return result
+
+
+def to_dep_tree(tree, rules=None):
+	"""
+	:type tree: L{parsed.Tree}
+	:rtype: L{dep.Tree}
+	"""
+	deptree = dep.Tree(tree.id, tree.sentence.form)
+	for t, (head, label) in zip(tree.lexical_nodes, heads(tree, rules)):
+		ord = str(t.ord)
+		word = Word(ord, str(t.word), t.word.morphs, t.morph_string)
+		deptree.nodes.append(dep.Node(ord, str(head), label, t.parent.name, word))
+
+	for n in deptree.nodes:
+		if n.dep == n.ord:
+			deptree.set_root(n)
+		else:
+			p = deptree.nodes[int(n.dep) - 1]
+			n.parent = p
+			p.add_a_child(n)
+	return deptree
+
+
+def to_dep_table(tree, rules=None):
+	"""
+	:type tree: L{parsed.Tree}
+	:return: the dependency table of a tree in the format of the
+	  dependency treebank files read by L{dep.ForestWalker}, followed by an
+	  empty line
+	"""
+	lines = ["%s ; %s" % (tree.id, tree.sentence.form)]
+	for t, (head, label) in zip(tree.lexical_nodes, heads(tree, rules)):
+		lines.append("%s\t%s\t%s\t%s\t%s\t%s" % (t.ord, head, label, t.parent.name, t.word, t.name))
+	lines.append("\n")
+	return "\n".join(lines)
+
+
+def iter_dep_trees(filenames, rules=None, max_workers=None):
+	"""
+	Convert parsed corpus files in a process pool, see L{parsed.iter_trees}.
+
+	:rtype: iterator of L{dep.Tree}
+	"""
+	return iter_trees(filenames, partial(to_dep_tree, rules=rules), max_workers=max_workers)
+
+
+def write_dep(filenames, out, rules=None, max_workers=None, encoding='utf-8'):
+	"""
+	Convert parsed corpus files in a process pool and write the dependency
+	tables in the order of the files and the trees.
+
+	:param out: a file name, or a file object opened in binary mode
+	:param max_workers: number of worker processes, 1 to convert in this
+	  process
+	:return: the number of trees
+	"""
+	if isinstance(out, (str, os.PathLike)):
+		with open(out, 'wb') as file:
+			return write_dep(filenames, file, rules, max_workers, encoding)
+
+	n = 0
+	for table in iter_trees(filenames, partial(to_dep_table, rules=rules), max_workers=max_workers):
+		out.write(table.encode(encoding))
+		n += 1
+	out.flush()
+	return n
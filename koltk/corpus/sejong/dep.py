@@ -20,6 +20,10 @@ Suppose you have a Sejong Dependency Treebank file named "sejong.dep".
 	file = codecs.open('sejong.dep', encoding='utf-8')
 	fw = ForestWalker(file)
 
+or with the file name, in any encoding (see L{source.SejongTextFile})::
+
+	fw = ForestWalker('sejong.dep')
+
 L{ForestWalker} is an iterator of forest (treebank). It isn't
 the treebank itself. It does NOT load trees into the memory.
 
@@ -41,20 +45,26 @@ It takes some time according to the file size.
 
 import codecs
 import sys
+import os
 import re
 
 # intra-package references
-from .morph import Morph
 from .morph import Word
+from .morph import parse_morph_string
+from .source import SejongTextFile
 
 class ForestWalker:
 	"""ForestWalker
 	"""
-	def __init__(self, file):
+	def __init__(self, file, encoding=None):
 		"""
 		:param file: Sejong Dependency Treebank file
-		:type file: file object
+		:type file: file object, or file name
+		:param encoding: encoding of the file when a file name is given,
+		  detected if None
 		"""
+		if isinstance(file, (str, os.PathLike)):
+			file = SejongTextFile(file, encoding)
 		self.file = file
 	
 	def __iter__(self):
@@ -80,32 +90,6 @@ class ForestWalker:
 
 		return tree
 	
-	def _parse_morph_string(self, morph_string):
-		"""
-		:rtype: list of L{Morph}
-		"""
-		morphs = []
-
-		m = morph_string
-		for m in morph_string.split('+'):
-			m = m.strip()
-			if m == "" :
-				pass
-			else :
-				if m == "/SW":
-					form, pos = "+", "SW"
-				elif m[0:2] == "//":
-					form, pos = "/", m[2:]
-				else :
-					try :
-						form, pos = m.split("/")
-						if pos == "" : pos = "_ERR_"
-					except :
-						form, pos = m, "_ERR_"	
-				morphs.append(Morph(form,pos))
-		
-		return morphs
-
 	def _readline(self):
 		"""
 		:rtype: string or list
@@ -195,7 +179,7 @@ class Tree:
 		for line in table:
 			if line == "" : break	
 			(ord, dep, tag1, tag2, wordform, morph_string) = line.split("\t")	
-			morphs = self._parse_morph_string(morph_string)
+			morphs = parse_morph_string(morph_string)
 			word = Word(ord, wordform, morphs, morph_string)
 			self.nodes.append(Node(ord, dep, tag1, tag2, word))
 
@@ -209,34 +193,6 @@ class Tree:
 				n.parent = p
 				p.add_a_child(n)
 
-	def _parse_morph_string(self, morph_string):
-		"""
-		:rtype: list of L{Morph}
-		"""
-		morphs = []
-
-		m = morph_string
-		for m in morph_string.split('+'):
-			m = m.strip()
-			if m == "" :
-				pass
-			else :
-				if m == "/SW":
-					form, pos = "+", "SW"
-				elif m[0:2] == "//":
-					form, pos = "/", m[2:]
-				else :
-					try :
-						form, pos = m.split("/")
-						if pos == "" : pos = "_ERR_"
-					except :
-						form, pos = m, "_ERR_"	
-				morphs.append(Morph(form,pos))
-		
-		return morphs
-
-
-	
 	def set_root(self, node):
 		"""
 		:param node: node 
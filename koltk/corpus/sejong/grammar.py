@@ -0,0 +1,310 @@
+# -*- coding: utf-8; tab-width: 4 -*-
+# Grammar Extraction from the Sejong Parsed Corpus
+# $Id$
+
+"""
+Extraction of grammar rules from Sejong parsed trees.
+
+A L{Grammar} counts, in one walk over each tree,
+
+ - phrasal rules: a label and the labels of its one or two children, with
+   the index of the head child, e.g. C{NP_SBJ -> NP *X_SBJ}
+ - lexical rules: the label of a node over a terminal and the morph string
+   of the terminal, e.g. C{NP_AJT -> 신/XPN + 세계/NNG + 에/JKB}
+ - the labels of the roots
+
+The labels and the morph strings are interned and the rules are counted as
+tuples of their codes. The plain CFG rules are the phrasal rules without
+their head, and the PCFG probability of a rule is its count over the count
+of its left hand side label, for the phrasal and the lexical rules together.
+
+Files are split into chunks counted by worker processes, and the partial
+counts are merged::
+
+	grammar = extract(['BGJO0150.bnk', 'BGJO0151.bnk'], max_workers=8)
+	for kind, lhs, rhs, head, count, p in grammar.probabilities():
+		print(kind, lhs, rhs, count, p)
+	grammar.write_tsv('sejong.grammar.tsv')
+	grammar.save('sejong.grammar')
+"""
+__docformat__ = 'epytext'
+import os
+import pickle
+from array import array
+from collections import Counter
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+
+# intra-package references
+from .parsed import _parse_chunk, split_chunks
+from .compact import Interner
+
+PHRASAL = 'rule'
+LEXICAL = 'lex'
+
+
+class Grammar:
+	"""
+	Counts of the rules of trees.
+	"""
+	VERSION = 1
+
+	def __init__(self):
+		self.labels = Interner()
+		"""node labels
+		:type: L{compact.Interner}"""
+		self.words = Interner()
+		"""morph strings of the terminals
+		:type: L{compact.Interner}"""
+		self.rules = Counter()
+		"""(lhs, left, right, head) codes -> count. right is -1 for a unary
+		rule, head is the index of the head child"""
+		self.lexical = Counter()
+		"""(lhs, word) codes -> count"""
+		self.roots = Counter()
+		"""root label code -> count"""
+
+	def add_tree(self, tree, rules=None):
+		"""
+		Count the rules of a tree.
+
+		:param tree: L{parsed.Tree}, or L{compact.CompactTree}
+		:param rules: L{convert.HeadRules} to choose the head children,
+		  None for the head flags of the nodes
+		"""
+		if hasattr(tree, 'forest'):
+			if rules is None:
+				return self.__add_compact(tree)
+			tree = tree.to_tree()
+
+		code = self.labels.code
+		count_rule, count_lexical = self.rules, self.lexical
+		self.roots[code(tree.root.name)] += 1
+		stack = [tree.root]
+		while stack:
+			node = stack.pop()
+			first, second = node.first_child, node.second_child
+			lhs = code(node.name)
+			if hasattr(first, 'morph_string'):
+				count_lexical[lhs, self.words.code(first.morph_string.strip())] += 1
+				continue
+			if second is None:
+				count_rule[lhs, code(first.name), -1, 0] += 1
+				stack.append(first)
+				continue
+			if rules is None:
+				head = 1 if second.is_head() else 0
+			else:
+				head = rules.head(node)
+			count_rule[lhs, code(first.name), code(second.name), head] += 1
+			stack.append(second)
+			stack.append(first)
+
+	def __add_compact(self, tree):
+		forest = tree.forest
+		b = tree.base
+		label, morph, first, second, head = forest.label, forest.morph, forest.first, forest.second, forest.head
+		code = self.labels.code
+		# codes of the forest pools -> codes of the grammar
+		labels = {}
+		words = {}
+		self.roots[code(forest.labels[label[b]])] += 1
+		for i in range(b, b + tree.size):
+			lcode = label[i]
+			if lcode < 0:
+				continue
+			lhs = labels.get(lcode)
+			if lhs is None:
+				lhs = labels[lcode] = code(forest.labels[lcode])
+			f, s = b + first[i], second[i]
+			if label[f] < 0:
+				w = words.get(morph[f])
+				if w is None:
+					w = words[morph[f]] = self.words.code(forest.morphs[morph[f]].strip())
+				self.lexical[lhs, w] += 1
+				continue
+			left = labels.get(label[f])
+			if left is None:
+				left = labels[label[f]] = code(forest.labels[label[f]])
+			if s < 0:
+				self.rules[lhs, left, -1, 0] += 1
+				continue
+			s += b
+			right = labels.get(label[s])
+			if right is None:
+				right = labels[label[s]] = code(forest.labels[label[s]])
+			self.rules[lhs, left, right, 1 if head[s] else 0] += 1
+
+	def update(self, other):
+		"""
+		Add the counts of another grammar, with its own codes.
+
+		:type other: L{Grammar}
+		"""
+		labels = [self.labels.code(s) for s in other.labels.strings] + [-1]
+		words = [self.words.code(s) for s in other.words.strings]
+		for (lhs, left, right, head), n in other.rules.items():
+			self.rules[labels[lhs], labels[left], labels[right], head] += n
+		for (lhs, word), n in other.lexical.items():
+			self.lexical[labels[lhs], words[word]] += n
+		for root, n in other.roots.items():
+			self.roots[labels[root]] += n
+
+	def cfg(self):
+		"""
+		:return: the plain CFG rules: (lhs, rhs labels) -> count
+		:rtype: Counter
+		"""
+		labels = self.labels
+		result = Counter()
+		for (lhs, left, right, head), n in self.rules.items():
+			rhs = (labels[left],) if right < 0 else (labels[left], labels[right])
+			result[labels[lhs], rhs] += n
+		return result
+
+	def lhs_counts(self):
+		"""
+		:return: label code -> number of rules with the label as their left
+		  hand side, phrasal and lexical
+		:rtype: Counter
+		"""
+		counts = Counter()
+		for (lhs, left, right, head), n in self.rules.items():
+			counts[lhs] += n
+		for (lhs, word), n in self.lexical.items():
+			counts[lhs] += n
+		return counts
+
+	def probabilities(self, head=False):
+		"""
+		Iterate the rules with their PCFG probabilities.
+
+		:param head: keep the phrasal rules apart by their head child, or
+		  add up the counts of the plain CFG rules
+		:rtype: iterator of (kind, lhs, rhs, head index, count, probability)
+		:return: kind is 'rule' or 'lex'. rhs is a tuple of labels, or the
+		  morph string of a lexical rule. head index is None for the plain
+		  CFG and lexical rules.
+		"""
+		labels, words = self.labels, self.words
+		totals = self.lhs_counts()
+		if head:
+			for (lhs, left, right, h), n in sorted(self.rules.items()):
+				rhs = (labels[left],) if right < 0 else (labels[left], labels[right])
+				yield PHRASAL, labels[lhs], rhs, h, n, n / totals[lhs]
+		else:
+			lhs_code = self.labels.index
+			for (lhs, rhs), n in sorted(self.cfg().items()):
+				yield PHRASAL, lhs, rhs, None, n, n / totals[lhs_code[lhs]]
+		for (lhs, word), n in sorted(self.lexical.items()):
+			yield LEXICAL, labels[lhs], words[word], None, n, n / totals[lhs]
+
+	def write_tsv(self, file, head=True):
+		"""
+		Write the rules, one per line: kind, lhs, rhs, count and
+		probability. The labels of the rhs of a phrasal rule are separated
+		by a space and the head child is marked with C{*} with C{head=True}.
+
+		:param file: a file name, or a text file
+		"""
+		if isinstance(file, (str, os.PathLike)):
+			with open(file, 'w', encoding='utf-8') as f:
+				return self.write_tsv(f, head)
+
+		for kind, lhs, rhs, h, n, p in self.probabilities(head):
+			if kind == PHRASAL:
+				rhs = ' '.join(('*' + label) if i == h else label for i, label in enumerate(rhs))
+			file.write('%s\t%s\t%s\t%d\t%.6g\n' % (kind, lhs, rhs, n, p))
+
+	def save(self, filename):
+		"""
+		Save the codes and the counts to a binary file, the rules as flat
+		arrays of codes and of counts.
+		"""
+		state = {
+			'version': self.VERSION,
+			'labels': self.labels.strings,
+			'words': self.words.strings,
+			'rules': _pack(self.rules, 4),
+			'lexical': _pack(self.lexical, 2),
+			'roots': _pack({(k,): n for k, n in self.roots.items()}, 1),
+		}
+		with open(filename, 'wb') as file:
+			pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+	@classmethod
+	def load(cls, filename):
+		"""
+		:rtype: L{Grammar}
+		:raise ValueError: if the file is of another version
+		"""
+		with open(filename, 'rb') as file:
+			state = pickle.load(file)
+		if state.get('version') != cls.VERSION:
+			raise ValueError('grammar file version {} is not {}'.format(state.get('version'), cls.VERSION))
+		grammar = cls()
+		grammar.labels = Interner(state['labels'])
+		grammar.words = Interner(state['words'])
+		grammar.rules = _unpack(state['rules'], 4)
+		grammar.lexical = _unpack(state['lexical'], 2)
+		grammar.roots = Counter({k[0]: n for k, n in _unpack(state['roots'], 1).items()})
+		return grammar
+
+	@classmethod
+	def from_trees(cls, trees, rules=None):
+		"""
+		:param trees: iterable of L{parsed.Tree} or L{compact.CompactTree},
+		  e.g. a L{parsed.ForestWalker} or a L{parsed.TreeBank}
+		:rtype: L{Grammar}
+		"""
+		grammar = cls()
+		for tree in trees:
+			grammar.add_tree(tree, rules)
+		return grammar
+
+
+def _pack(counts, width):
+	"""
+	(array of the codes of the keys, array of the counts) of a Counter of
+	tuples of width codes
+	"""
+	codes = array('i')
+	for key in counts:
+		codes.extend(key)
+	return codes, array('q', counts.values())
+
+
+def _unpack(packed, width):
+	codes, counts = packed
+	return Counter({tuple(codes[i * width:(i + 1) * width]): n for i, n in enumerate(counts)})
+
+
+def _extract_chunk(chunk, rules=None, encoding=None):
+	return Grammar.from_trees(_parse_chunk(chunk, encoding=encoding), rules)
+
+
+def extract(filenames, max_workers=None, rules=None, chunk_size=1 << 20, encoding=None):
+	"""
+	Count the rules of parsed corpus files in a process pool.
+
+	:param filenames: a file name or a list of file names
+	:param max_workers: number of worker processes, 1 to count in this
+	  process
+	:param rules: L{convert.HeadRules}, None for the head flags of the nodes
+	:param encoding: encoding of the files, detected for each file if None
+	:rtype: L{Grammar}
+	"""
+	if isinstance(filenames, (str, os.PathLike)):
+		filenames = [filenames]
+	chunks = [c for filename in filenames for c in split_chunks(os.fspath(filename), chunk_size)]
+	count = partial(_extract_chunk, rules=rules, encoding=encoding)
+	grammar = Grammar()
+	if max_workers == 1:
+		for chunk in chunks:
+			grammar.update(count(chunk))
+		return grammar
+
+	with ProcessPoolExecutor(max_workers=max_workers) as executor:
+		for partial_grammar in executor.map(count, chunks):
+			grammar.update(partial_grammar)
+	return grammar
@@ -5,8 +5,15 @@
 """ 
 Sejong Morphology Tagged Corpus Reader.
 
+Morph strings, e.g. C{"하/XSV + ㄴ다/EF"}, repeat millions of times in
+the corpora. L{parse_morph_string} parses each distinct string once, into a
+shared tuple of interned L{Morph}s, and is used by all the Sejong readers.
+
 :status: Not yet fully implemented
 """
+import sys
+
+MAX_CACHE_SIZE = 1 << 18
 
 
 class Word:
@@ -16,7 +23,8 @@ class Word:
 	Word class has 4 attributes:
 	 - ord is the order in the sentence
 	 - form is the orthographical form
-	 - morphs is an array of Morph instances
+	 - morphs is a sequence of Morph instances, the shared tuple of
+	   L{parse_morph_string}
 	 - morph_string is the morphology string in the corpus
 	   for example, "보/VX + 는데/EC"
 	"""
@@ -26,8 +34,8 @@ class Word:
 		:type ord: int
 		:param form: word form
 		:type form: string
-		:param morphs: list of morphs
-		:type morphs: list of L{Morph}s
+		:param morphs: list or tuple of morphs
+		:type morphs: sequence of L{Morph}s
 		:param morph_string: raw morphology string
 		:type morph_string: string
 		"""
@@ -41,7 +49,7 @@ class Word:
 		"""
 		self.morphs = morphs
 		"""
-		:type: list of L{Morph}s
+		:type: sequence of L{Morph}s
 		"""
 		self.morph_string = morph_string
 		"""
@@ -53,7 +61,10 @@ class Word:
 		:param morph: a morpheme
 		:type morph: L{Morph}
 		"""
-		self.morphs.append(morph)
+		if isinstance(self.morphs, tuple):
+			self.morphs += (morph,)		# never change a shared tuple
+		else:
+			self.morphs.append(morph)
 
 	def has_pos(self, pos):
 		"""
@@ -82,22 +93,91 @@ class Word:
 class Morph:
 	"""
 	Morph
+
+	Morphs are immutable and interned: C{Morph(form, pos)} returns the one
+	instance of a form and a part of speech tag, as long as it is in the
+	bounded table of the instances. Morphs compare equal by value.
 	"""
-	def __init__(self, form, pos):
+	__slots__ = ('form', 'pos')
+	_instances = {}
+
+	def __new__(cls, form, pos):
 		"""
 		:param form: morphology form
 		:type form: string
 		:param pos: part of speech tag
 		:type pos: string
 		"""
-		self.form = form
-		"""
-		:type: string
-		"""
-		self.pos = pos
-		"""part of speech tag
-		:type: string
-		"""
+		key = (form, pos)
+		morph = cls._instances.get(key)
+		if morph is None:
+			if len(cls._instances) >= MAX_CACHE_SIZE:
+				cls._instances.clear()
+			morph = object.__new__(cls)
+			object.__setattr__(morph, 'form', sys.intern(form))
+			object.__setattr__(morph, 'pos', sys.intern(pos))
+			cls._instances[key] = morph
+		return morph
+
+	def __setattr__(self, name, value):
+		raise AttributeError('Morph is immutable')
+
+	def __delattr__(self, name):
+		raise AttributeError('Morph is immutable')
 
+	def __reduce__(self):
+		return (Morph, (self.form, self.pos))
 
+	def __eq__(self, other):
+		if not isinstance(other, Morph):
+			return NotImplemented
+		return self is other or (self.form == other.form and self.pos == other.pos)
 
+	def __hash__(self):
+		return hash((self.form, self.pos))
+
+	def __repr__(self):
+		return 'Morph(%r, %r)' % (self.form, self.pos)
+
+
+_morph_strings = {}
+
+def parse_morph_string(morph_string):
+	"""
+	Parse a morph string, once for each distinct string while it is in the
+	bounded cache of the parsed strings.
+
+	:param morph_string: raw morphology string, e.g. "보/VX + 는데/EC"
+	:type morph_string: string
+	:rtype: tuple of L{Morph}s
+	:return: the tuple shared by all the occurrences of the string
+	"""
+	morphs = _morph_strings.get(morph_string)
+	if morphs is None:
+		if len(_morph_strings) >= MAX_CACHE_SIZE:
+			_morph_strings.clear()
+		morphs = _morph_strings[morph_string] = _parse_morph_string(morph_string)
+	return morphs
+
+
+def _parse_morph_string(morph_string):
+	morphs = []
+
+	for m in morph_string.split('+'):
+		m = m.strip()
+		if m == "" :
+			pass
+		else :
+			if m == "/SW":
+				form, pos = "+", "SW"
+			elif m[0:2] == "//":
+				form, pos = "/", m[2:]
+			else :
+				try :
+					form, pos = m.split("/")
+					if pos == "" : pos = "_ERR_"
+				except :
+					form, pos = m, "_ERR_"	
+			morphs.append(Morph(form,pos))
+	
+	return tuple(morphs)
@@ -13,12 +13,14 @@ and all the other classes are general, i.e. reusable!
 USAGE
 =====
 
-You have a Sejong parsed corpus file named 'BGJO0150.bnk'. 
-At first, remove XML tags and check file encoding.
+You have a Sejong parsed corpus file named 'BGJO0150.bnk'. The original
+file is read as it is distributed, in UTF-16 or CP949 and wrapped in XML:
+the encoding is detected and the XML is dropped on the fly (see
+L{source.SejongTextFile}). An open text file of the trees can be given too.
 ::
 
-	file = codecs.open('BGJO0150-noxml.bnk' encoding='utf-8')
-	fw = ForestWalker(file)
+	fw = ForestWalker('BGJO0150.bnk')
+	fw = ForestWalker(codecs.open('BGJO0150-noxml.bnk', encoding='utf-8'))
 
 L{ForestWalker} is an iterator of forest (treebank). It isn't the
 treebank itself. It does NOT load trees to the memory. It's
@@ -28,12 +30,39 @@ light and fast!
 	for tree in fw:
 		do (tree)
 
+With a file name, trees are read at random through an index of their
+byte offsets, which is built once and saved as C{BGJO0150.bnk.idx}. Byte
+offsets need an ASCII-compatible encoding (UTF-8 or CP949): convert a
+UTF-16 file once, e.g. with C{iconv}, to read it at random.
+::
+
+	fw = ForestWalker('BGJO0150.bnk')
+	tree = fw[99]
+	for tree in fw.from_tree(1000):
+		do (tree)
+
+ForestWalker depends on the layout of the distributed files, one terminal
+per line. L{bracket.BracketReader} reads trees in any whitespace and line
+layout.
+::
+
+	for tree in BracketReader('reformatted.bnk'):
+		do (tree)
+
 If you want to get a fully-loaded L{TreeBank} object, try getTreeBank().
 It takes some time according to the file size. 
 ::
 
 	treebank = fw.getTreeBank()
 
+L{TreeBank.from_files} loads many files, in the compact array form if
+asked, and saves the trees and their indexes to a binary cache that is
+loaded instead of the files while they do not change.
+::
+
+	treebank = TreeBank.from_files(files, compact=True, cache='sejong.tbc')
+	treebank.getTreesByLabel('VNP_CMP')
+
 
 Classes
 =======
@@ -72,11 +101,18 @@ parsed corpus sample tree::
 __docformat__ = 'epytext'
 import codecs
 import sys
+import os
+import io
 import re
+import pickle
+from array import array
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
 
 # intra-package references
-from .morph import Morph
 from .morph import Word
+from .morph import parse_morph_string
+from .source import SejongTextFile, detect_file, detect_file_encoding, is_ascii_compatible
 
 class TreeParseError(Exception):
 	def __init__(self, message):
@@ -86,12 +122,122 @@ class TreeParseError(Exception):
 
 
 
+class TreeIndex:
+	"""Byte offsets of the trees of a parsed corpus file.
+
+	The index is built in one pass over the bytes of the file, and saved
+	next to it as C{<file>.idx}: an C{array('q')} of the size and the
+	modification time of the file, followed by the offsets of the
+	sentence form lines (C{'; ...'}) of the trees.
+	"""
+	def __init__(self, offsets, size=None, mtime=None):
+		"""
+		:param offsets: byte offsets of the trees
+		:type offsets: array of int
+		"""
+		self.offsets = offsets
+		self.size = size
+		self.mtime = mtime
+
+	@classmethod
+	def build(cls, filename):
+		"""
+		:param filename: parsed corpus file
+		:rtype: L{TreeIndex}
+		:raise TreeParseError: if the file is not in an ASCII-compatible
+		  encoding
+		"""
+		encoding = detect_file_encoding(filename)
+		if not is_ascii_compatible(encoding):
+			raise TreeParseError('cannot index a file in {}: {}'.format(encoding, filename))
+		st = os.stat(filename)
+		offsets = array('q')
+		pos = 0
+		with open(filename, 'rb') as file:
+			for line in file:
+				if line.startswith(b'; '):
+					offsets.append(pos)
+				elif pos == 0 and line.startswith(codecs.BOM_UTF8 + b'; '):
+					offsets.append(len(codecs.BOM_UTF8))
+				pos += len(line)
+		return cls(offsets, st.st_size, st.st_mtime_ns)
+
+	@classmethod
+	def load(cls, index_filename):
+		"""
+		:rtype: L{TreeIndex}
+		"""
+		a = array('q')
+		with open(index_filename, 'rb') as file:
+			a.frombytes(file.read())
+		return cls(a[2:], a[0], a[1])
+
+	def save(self, index_filename):
+		with open(index_filename, 'wb') as file:
+			array('q', [self.size, self.mtime]).tofile(file)
+			self.offsets.tofile(file)
+
+	@classmethod
+	def for_file(cls, filename, save=True):
+		"""
+		Load the saved index of a file, or build it (and save it) if there
+		is no index or the file has changed since.
+
+		:rtype: L{TreeIndex}
+		"""
+		index_filename = filename + '.idx'
+		st = os.stat(filename)
+		if os.path.exists(index_filename):
+			index = cls.load(index_filename)
+			if (index.size, index.mtime) == (st.st_size, st.st_mtime_ns):
+				return index
+
+		index = cls.build(filename)
+		if save:
+			try:
+				index.save(index_filename)
+			except OSError:
+				pass # read-only corpus directory: keep the index in memory
+		return index
+
+	def __len__(self):
+		return len(self.offsets)
+
+	def __getitem__(self, n):
+		return self.offsets[n]
+
+
 class ForestWalker:  
 	"""ForestWalker
+
+	An iterator of L{Tree}s. The iteration ends with C{StopIteration} at the
+	end of the file.
+
+	With a file name (or a file object that has a C{name}), trees can be
+	read at random with the byte offset L{TreeIndex} of the file::
+
+		fw = ForestWalker('BGJO0150.bnk')
+		tree = fw[10]				# the 11th tree
+		for tree in fw.from_tree(100):	# from the 101st tree to the end
+			do (tree)
+
+	Tree ids are the 1-based numbers of the trees in the file.
 	"""
-	def __init__(self, file):
-		self.file = file
+	def __init__(self, file, encoding=None):
+		"""
+		:param file: a file object opened in text mode, or a file name of
+		  an original or a plain text corpus file
+		:param encoding: encoding of the file when a file name is given,
+		  detected if None
+		"""
+		if isinstance(file, (str, os.PathLike)):
+			self.filename = os.fspath(file)
+			self.file = SejongTextFile(self.filename, encoding)
+		else:
+			self.filename = getattr(file, 'name', None)
+			self.file = file
 		self.number_of_trees = 0
+		self.__index = None
 	
 	def __iter__(self):
 		return self
@@ -99,37 +245,101 @@ class ForestWalker:
 	def __next__(self):
 		return self.readtree()
 
-	def readtree(self): 
+	@property
+	def index(self):
 		"""
+		:rtype: L{TreeIndex}
+		"""
+		if self.__index is None:
+			if self.filename is None:
+				raise TreeParseError('no file name to index')
+			self.__index = TreeIndex.for_file(self.filename)
+		return self.__index
+
+	def seek_tree(self, n):
+		"""
+		Move to the n-th tree (from 0). The next L{readtree} reads it.
+		"""
+		if n < 0:
+			n += len(self.index)
+		self.file.seek(self.index[n])
+		self.number_of_trees = n
+
+	def from_tree(self, n):
+		"""
+		:return: the walker moved to the n-th tree (from 0), to iterate
+		  from there
+		"""
+		self.seek_tree(n)
+		return self
+
+	def __getitem__(self, n):
+		"""
+		:return: the n-th tree (from 0). The iteration continues after it.
 		:rtype: L{Tree}
 		"""
-		# INITIALIZE
-		self.number_of_trees += 1
-		id = str(self.number_of_trees)
+		self.seek_tree(n)
+		return self.readtree()
+
+	def getTreeBank(self, compact=False):
+		"""
+		:param compact: keep the trees in the compact form
+		:return: the trees from the current one to the end of the file
+		:rtype: L{TreeBank}
+		"""
+		treebank = TreeBank(compact)
+		file = None
+		if self.filename is not None:
+			st = os.stat(self.filename)
+			treebank.files.append((self.filename, st.st_size, st.st_mtime_ns))
+			file = 0
+		treebank.extend(self, file)
+		return treebank
+
+	def close(self):
+		self.file.close()
+
+	def __enter__(self):
+		return self
 
+	def __exit__(self, *exc):
+		self.close()
+
+	def readtree(self): 
+		"""
+		:rtype: L{Tree}
+		:raise StopIteration: at the end of the file
+		:raise TreeParseError: if the tree is malformed
+		"""
 		# SENTENCE FORM
 		# read sentence form line and initialize a tree
 		line = self._readline()
+		while line == "":
+			line = self._readline()
+		if line is None:
+			raise StopIteration
+
+		# INITIALIZE
+		self.number_of_trees += 1
+		id = str(self.number_of_trees)
 
 		if (line[0:2] == '; '):
-			i = 0
 			sentence_form = line[2:]
 			tree = Tree(id, Sentence(id, sentence_form, None))
 		else:
-			print("ERROR: no sentence form line")
-			sys.exit(1) # ERROR: no sentence form line 
+			raise TreeParseError('no sentence form line in tree {}: {}'.format(id, line))
 
 
 		# PARSE TREE 
 		ord = 0
 		line = self._readline()
-		while (line and line !="") :
+		while line:
 			ord += 1
 
 			try :
 				(path, number_of_parentheses) = self._parseline(line)
-			except(TreeParseError, e):
-				print("TreeParseError: ", e.message)
+			except TreeParseError as e:
+				raise TreeParseError('{} in tree {}: {}'.format(e.message, id, line))
 
 			if tree.root is not None:
 				tree.move_up()
@@ -140,7 +350,7 @@ class ForestWalker:
 
 			# TERMINAL (LEXICAL) NODE
 			morph_string = path.pop(0)
-			morphs = self._parse_morph_string(morph_string)
+			morphs = parse_morph_string(morph_string)
 			w = Word(ord, morph_string, morphs, morph_string)
 
 			#print tree.current_node.name, morph_string, w.form
@@ -156,34 +366,6 @@ class ForestWalker:
 			
 		return tree
 
-	def _parse_morph_string(self, morph_string):	
-		"""
-		:param morph_string: raw morphology string
-		:type morph_string: string
-		:rtype: list of L{Morph}s
-		"""
-		morphs = []
-
-		m = morph_string
-		for m in morph_string.split('+'):
-			m = m.strip()
-			if m == "" :
-				pass
-			else :
-				if m == "/SW":
-					form, pos = "+", "SW"
-				elif m[0:2] == "//":
-					form, pos = "/", m[2:]
-				else :
-					try :
-						form, pos = m.split("/")
-						if pos == "" : pos = "_ERR_"
-					except :
-						form, pos = m, "_ERR_"	
-				morphs.append(Morph(form,pos))
-		
-		return morphs
-
 	def _parseline(self, line):
 		""" 
 		:param line: a source line from the treebank file
@@ -235,13 +417,12 @@ class ForestWalker:
 	def _readline(self):
 		"""
 		:rtype: string
-		:return: a line of treebank source
+		:return: a line of treebank source, or None at the end of the file
 		"""
 		line = self.file.readline()
 
 		# EOF
-		# immediately exits the program when EOF is encounterd
-		if (line == '') : sys.exit(0)
+		if (line == '') : return None
 
 		if (line[0:2] == '; '):
 			return line.rstrip()
@@ -253,12 +434,416 @@ class ForestWalker:
 		
 
 
-class TreeBank:
+def split_chunks(filename, chunk_size=1 << 20):
 	"""
-	:status: Not yet implemented
+	Split a parsed corpus file into chunks of whole trees, at the sentence
+	form lines, using its L{TreeIndex}. A file in an encoding that is not
+	ASCII-compatible, i.e. UTF-16, is one chunk.
+
+	:param chunk_size: approximate size of a chunk in bytes
+	:rtype: list of (filename, begin, end, number of the trees before)
+	"""
+	if not is_ascii_compatible(detect_file_encoding(filename)):
+		return [(filename, 0, os.path.getsize(filename), 0)]
+	index = TreeIndex.for_file(filename)
+	chunks = []
+	n = len(index)
+	first = 0
+	while first < n:
+		begin = index[first]
+		last = first + 1
+		while last < n and index[last] - begin < chunk_size:
+			last += 1
+		end = index[last] if last < n else index.size
+		chunks.append((filename, begin, end, first))
+		first = last
+	return chunks
+
+
+def _read_chunk(chunk, encoding=None):
 	"""
-	def __init__(self):
-		pass
+	:return: the text of a chunk, without the XML wrapper if the file has
+	  one
+	"""
+	filename, begin, end, first = chunk
+	detected, wrapped = detect_file(filename)
+	with open(filename, 'rb') as file:
+		file.seek(begin)
+		data = file.read(end - begin)
+	return SejongTextFile(io.BytesIO(data), encoding or detected, wrapped).read()
+
+
+def _parse_chunk(chunk, func=None, encoding=None):
+	first = chunk[3]
+	fw = ForestWalker(io.StringIO(_read_chunk(chunk, encoding)))
+	fw.number_of_trees = first
+	if func is None:
+		return list(fw)
+	else:
+		return [func(tree) for tree in fw]
+
+
+def iter_trees(filenames, func=None, max_workers=None, chunk_size=1 << 20, encoding=None):
+	"""
+	Parse parsed corpus files in a process pool and iterate the trees, or
+	C{func(tree)}, in the order of the files and the trees.
+
+	The files are split into chunks at tree boundaries (see L{split_chunks})
+	and each chunk is parsed by a worker. Returning C{func(tree)}, e.g. the
+	converted text of a tree, instead of the tree saves the cost of sending
+	the trees back from the workers. C{func} must be picklable (a module
+	level function).
+	::
+
+		for tree in iter_trees(['BGJO0150.bnk', 'BGJO0151.bnk'], max_workers=8):
+			do (tree)
+
+	:param filenames: a file name or a list of file names
+	:param max_workers: number of worker processes, 1 to parse in this process
+	:param chunk_size: approximate size of a chunk in bytes
+	:param encoding: encoding of the files, detected for each file if None
+	"""
+	if isinstance(filenames, (str, os.PathLike)):
+		filenames = [filenames]
+	chunks = [c for filename in filenames for c in split_chunks(os.fspath(filename), chunk_size)]
+	parse = partial(_parse_chunk, func=func, encoding=encoding)
+	if max_workers == 1:
+		for chunk in chunks:
+			yield from parse(chunk)
+		return
+
+	with ProcessPoolExecutor(max_workers=max_workers) as executor:
+		for results in executor.map(parse, chunks):
+			yield from results
+
+
+def _index_add(index, key, n):
+	"""
+	Add tree number n to the entry of a key: an int for one tree, an
+	C{array('i')} for more.
+	"""
+	v = index.get(key)
+	if v is None:
+		index[key] = n
+	elif isinstance(v, int):
+		if v != n:
+			index[key] = array('i', [v, n])
+	elif v[-1] != n:
+		v.append(n)
+
+
+def _index_get(index, key):
+	v = index.get(key)
+	if v is None:
+		return []
+	elif isinstance(v, int):
+		return [v]
+	return list(v)
+
+
+class TreeBank:
+	"""TreeBank
+
+	Trees of one or more parsed corpus files in memory, with indexes of the
+	trees by id, sentence form, node label and morph. The trees are
+	L{Tree}s, or L{compact.CompactTree}s of a L{compact.CompactForest}
+	with C{compact=True}.
+	::
+
+		treebank = TreeBank.from_files(['BGJO0150.bnk', 'BGJO0151.bnk'],
+		                               compact=True, cache='sejong.tbc')
+		tree = treebank.getTree('10', 'BGJO0151.bnk')
+		for tree in treebank.getTreesByLabel('VNP_CMP'):
+			do (tree)
+
+	A tree is numbered by its order in the treebank, and L{Tree} ids, the
+	numbers of the trees in their file, are unique only within a file.
+
+	The treebank is saved to a binary cache with L{save}, trees in the
+	compact form and indexes, and loaded back with L{load_cache} without
+	parsing the files again.
+	"""
+	CACHE_VERSION = 1
+
+	def __init__(self, compact=False):
+		"""
+		:param compact: keep the trees in a L{compact.CompactForest}
+		"""
+		# compact imports this module
+		from .compact import CompactForest
+		self.compact = compact
+		self.trees = None if compact else []
+		"""list of L{Tree}, None with C{compact=True}"""
+		self.forest = CompactForest() if compact else None
+		"""L{compact.CompactForest}, None without C{compact=True}"""
+		self.files = []
+		"""(file name, size, modification time) of the loaded files"""
+		self.tree_file = array('i')
+		"""file number of each tree, -1 for trees without a file"""
+		self.__by_id = {}
+		self.__by_sentence = {}
+		self.__by_label = {}
+		self.__by_morph = {}
+		self.__morphs_of_pool = []
+
+	def __len__(self):
+		return len(self.tree_file)
+
+	def __getitem__(self, n):
+		"""
+		:return: the n-th tree (from 0)
+		:rtype: L{Tree} or L{compact.CompactTree}
+		"""
+		if self.compact:
+			return self.forest[n]
+		return self.trees[n]
+
+	def __iter__(self):
+		return iter(self.forest if self.compact else self.trees)
+
+	def __file_number(self, file):
+		if file is None or isinstance(file, int):
+			return -1 if file is None else file
+		file = os.fspath(file)
+		for i, (name, size, mtime) in enumerate(self.files):
+			if name == file:
+				return i
+		raise KeyError('file not in the treebank: {}'.format(file))
+
+	def add(self, tree, file=None):
+		"""
+		Add and index a tree.
+
+		:param tree: L{Tree}
+		:param file: file name or number of the tree in L{files}
+		:return: the number of the tree in the treebank
+		"""
+		if self.compact:
+			self.forest.add(tree)
+		else:
+			self.trees.append(tree)
+		return self.__index_tree(self.__file_number(file))
+
+	def extend(self, trees, file=None):
+		"""
+		Add and index trees.
+		"""
+		for tree in trees:
+			self.add(tree, file)
+
+	def __add_file(self, filename):
+		filename = os.fspath(filename)
+		st = os.stat(filename)
+		self.files.append((filename, st.st_size, st.st_mtime_ns))
+		return len(self.files) - 1
+
+	def load(self, filenames, max_workers=1):
+		"""
+		Load the trees of parsed corpus files.
+
+		:param filenames: a file name or a list of file names
+		:param max_workers: number of worker processes to parse the files,
+		  see L{iter_trees}. The compact form is read in this process.
+		"""
+		# bracket imports this module
+		from .bracket import read_compact
+		if isinstance(filenames, (str, os.PathLike)):
+			filenames = [filenames]
+		for filename in filenames:
+			file = self.__add_file(filename)
+			if self.compact:
+				first = len(self.forest)
+				read_compact(filename, self.forest)
+				for n in range(first, len(self.forest)):
+					self.__index_tree(file)
+			else:
+				for tree in iter_trees(filename, max_workers=max_workers):
+					self.trees.append(tree)
+					self.__index_tree(file)
+
+	def __index_tree(self, file):
+		n = len(self.tree_file)
+		self.tree_file.append(file)
+		if self.compact:
+			f = self.forest
+			id, form = f.ids[n], f.forms[n]
+			b, e = f.offsets[n], f.offsets[n + 1]
+			labels = {f.labels[c] for c in set(f.label[b:e]) if c >= 0}
+			morphs = set()
+			for c in set(f.morph[b:e]):
+				if c >= 0:
+					morphs.update(self.__morphs_of_code(c))
+		else:
+			tree = self.trees[n]
+			id, form = tree.id, tree.sentence.form
+			labels = set()
+			morphs = set()
+			stack = [tree.root]
+			while stack:
+				node = stack.pop()
+				if isinstance(node, TerminalNode):
+					morphs.update((m.form, m.pos) for m in node.word.morphs)
+					continue
+				labels.add(node.name)
+				if node.first_child is not None:
+					stack.append(node.first_child)
+				if node.second_child is not None:
+					stack.append(node.second_child)
+
+		self.__by_id.setdefault((file, id), n)
+		self.__by_id.setdefault(id, n)
+		_index_add(self.__by_sentence, form, n)
+		for label in labels:
+			_index_add(self.__by_label, label, n)
+		for morph in morphs:
+			_index_add(self.__by_morph, morph, n)
+			_index_add(self.__by_morph, morph[0], n)
+		return n
+
+	def __morphs_of_code(self, code):
+		pool = self.__morphs_of_pool
+		while len(pool) <= code:
+			ms = self.forest.morphs[len(pool)]
+			pool.append(frozenset((m.form, m.pos) for m in parse_morph_string(ms)))
+		return pool[code]
+
+	def getTree(self, id, file=None):
+		"""
+		:param id: tree id
+		:param file: file name or number in L{files}, None for the first
+		  tree with the id in the treebank
+		:return: the tree, or None if there is no tree with the id
+		"""
+		key = id if file is None else (self.__file_number(file), id)
+		n = self.__by_id.get(key)
+		return None if n is None else self[n]
+
+	def getTreesBySentence(self, form):
+		"""
+		:return: the trees of a sentence form
+		:rtype: list
+		"""
+		return [self[n] for n in _index_get(self.__by_sentence, form)]
+
+	def getTreesByLabel(self, label):
+		"""
+		:return: the trees that have a node with a label, e.g. C{'NP_SBJ'}
+		:rtype: list
+		"""
+		return [self[n] for n in _index_get(self.__by_label, label)]
+
+	def getTreesByMorph(self, form, pos=None):
+		"""
+		:return: the trees that have a morph, e.g. C{('하', 'XSV')}, or a
+		  morph form of any part of speech if C{pos} is None
+		:rtype: list
+		"""
+		key = form if pos is None else (form, pos)
+		return [self[n] for n in _index_get(self.__by_morph, key)]
+
+	def getTreeNumbers(self, label=None, form=None, pos=None):
+		"""
+		:return: the sorted numbers of the trees that have a node with the
+		  label, or a morph of the form (and part of speech), all the
+		  numbers if no key is given
+		:rtype: list of int
+		"""
+		if label is not None:
+			return _index_get(self.__by_label, label)
+		if form is not None:
+			return _index_get(self.__by_morph, form if pos is None else (form, pos))
+		return list(range(len(self)))
+
+	def labels(self):
+		"""
+		:return: the node labels in the treebank
+		"""
+		return list(self.__by_label)
+
+	def save(self, cache_filename):
+		"""
+		Save the trees, in the compact form, and the indexes to a binary
+		cache file.
+		"""
+		# compact imports this module
+		from .compact import CompactForest
+		forest = self.forest if self.compact else CompactForest.from_trees(self.trees)
+		state = {
+			'version': self.CACHE_VERSION,
+			'files': self.files,
+			'tree_file': self.tree_file,
+			'forest': forest,
+			'by_id': self.__by_id,
+			'by_sentence': self.__by_sentence,
+			'by_label': self.__by_label,
+			'by_morph': self.__by_morph,
+		}
+		with open(cache_filename, 'wb') as file:
+			pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+	@classmethod
+	def load_cache(cls, cache_filename, compact=False):
+		"""
+		:param compact: keep the trees in the compact form, or make L{Tree}s
+		:rtype: L{TreeBank}
+		:raise ValueError: if the cache is of another version
+		"""
+		with open(cache_filename, 'rb') as file:
+			state = pickle.load(file)
+		if state.get('version') != cls.CACHE_VERSION:
+			raise ValueError('treebank cache version {} is not {}'.format(
+				state.get('version'), cls.CACHE_VERSION))
+		treebank = cls(compact)
+		treebank.files = state['files']
+		treebank.tree_file = state['tree_file']
+		if compact:
+			treebank.forest = state['forest']
+		else:
+			treebank.trees = [t.to_tree() for t in state['forest']]
+		treebank.__by_id = state['by_id']
+		treebank.__by_sentence = state['by_sentence']
+		treebank.__by_label = state['by_label']
+		treebank.__by_morph = state['by_morph']
+		return treebank
+
+	def is_current(self, filenames):
+		"""
+		:return: True if the treebank was loaded from the files, and they
+		  have not changed since
+		"""
+		if isinstance(filenames, (str, os.PathLike)):
+			filenames = [filenames]
+		current = []
+		for filename in filenames:
+			st = os.stat(filename)
+			current.append((os.fspath(filename), st.st_size, st.st_mtime_ns))
+		return [tuple(f) for f in self.files] == current
+
+	@classmethod
+	def from_files(cls, filenames, compact=False, cache=None, max_workers=1):
+		"""
+		Load a treebank from its cache if the files have not changed since
+		it was saved, or from the files, and save the cache.
+
+		:param cache: cache file name, None for no cache
+		:rtype: L{TreeBank}
+		"""
+		if cache is not None and os.path.exists(cache):
+			try:
+				treebank = cls.load_cache(cache, compact)
+			except (ValueError, OSError, pickle.UnpicklingError, EOFError):
+				treebank = None
+			if treebank is not None and treebank.is_current(filenames):
+				return treebank
+
+		treebank = cls(compact)
+		treebank.load(filenames, max_workers)
+		if cache is not None:
+			try:
+				treebank.save(cache)
+			except OSError:
+				pass # read-only directory: keep the treebank in memory
+		return treebank
 
 		
 class Tree:
@@ -385,9 +970,7 @@ class Node:
 			self.first_child.set_head(False)
 			self.second_child.set_head(True)
 		else :
-			print(node.name)
-			print("ERROR: more than 2 children")
-			sys.exit(0) # TreeError	: more than 2 children
+			raise TreeParseError('more than 2 children: {}'.format(node.name))
 
 class TerminalNode (Node):
 	def __init__(self, ord, parent, morph_string, word):
@@ -440,51 +1023,19 @@ class Sentence:
 #===============================================================
 # CODE FOR TEST
 
-class Encode:
-	def __init__(self, stdout, enc):
-		self.stdout = stdout
-		self.encoding = enc
-
-	def write(self, s):
-		self.stdout.buffer.write(s.encode(self.encoding))
-
-
 class Test:
 	def __init__(self, file):
 		fw = ForestWalker(file)
 		self.bnk2dep(fw, 'utf8')
 
 	def bnk2dep(self, fw, enc):
-		sys.stdout = Encode(sys.stdout, enc)
+		# convert imports this module
+		from .convert import to_dep_table
+		out = sys.stdout.buffer
 		for tree in fw:
-			#print "================ beg"
-			#print "TREE_ID: ", tree.id
-			print(tree.id, ";", tree.sentence.form)
-			#print "ROOT_NODE: ", tree.root.name
-			for t in  tree.lexical_nodes:
-				#print reduce( lambda x, y :  x+" "+y, tree.get_path_to_node(t))
-				dep_parent_ord, dep_name = self.get_dep_parent_of_node(t)
-				print("%s\t%s\t%s\t%s\t%s\t%s" % (t.ord, dep_parent_ord, dep_name, t.parent.name, t.word, t.name))
-			print()
-			#print "================ end"
-
-	def get_dep_parent_of_node(self, node):
-		while(node.is_head() and node.parent is not None):
-			node = node.parent
-
-
-		dep_name = node.name
-		if node.parent is not None: 
-			node = node.parent
-
-		while(node.__class__ is not TerminalNode):
-			if node.second_child is None:
-				node = node.first_child
-			else :
-				node = node.second_child
-
-		return node.ord, dep_name
-		
+			out.write(to_dep_table(tree).encode(enc))
+		out.flush()
+
 if __name__ == '__main__':
 	file = codecs.open(sys.argv[1], encoding='utf-8')
 	Test(file)
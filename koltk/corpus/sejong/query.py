@@ -0,0 +1,570 @@
+# -*- coding: utf-8; tab-width: 4 -*-
+# Tree Pattern Queries on the Sejong Parsed Corpus
+# $Id$
+
+"""
+Tree pattern queries, in the style of tgrep and Tregex, on Sejong parsed
+trees.
+
+A pattern is a node description followed by relations to other nodes::
+
+	NP_SBJ << (NP_PRN <<# {pos=JKS})
+
+matches the C{NP_SBJ} nodes that dominate an C{NP_PRN} node whose head
+terminal has a C{JKS} morph.
+
+Node descriptions
+=================
+
+	- C{NP_SBJ}: a node with the label, C{NP|NP_SBJ} with one of the labels
+	- C{/^NP/}: a node with a label that matches the regular expression
+	- C{__}: any node, terminal or not
+	- C{{pos=JKS}}: a terminal with a morph that has all the properties
+	  C{form}, C{pos} and C{morph} (C{form/pos}) given, e.g.
+	  C{{form=가 pos=JKS}}, C{{morph=가/JKS}}, C{{pos=/^JK/}}
+
+A description may be named with C{=name}, as C{NP_PRN=prn}, to get the
+node of the match.
+
+Relations
+=========
+
+	- C{A << B}: A dominates B
+	- C{A < B}: A immediately dominates B
+	- C{A >> B}: A is dominated by B
+	- C{A > B}: A is immediately dominated by B
+	- C{A <: B}: B is the only child of A
+	- C{A $ B}: A is a sister of B
+	- C{A $+ B}: B is the right sister of A
+	- C{A $- B}: B is the left sister of A
+	- C{A <# B}: B is the head child of A
+	- C{A <<# B}: B is a head of A, down the head children
+	- C{A ># B}: A is the head child of B
+	- C{A >># B}: A is a head of B
+
+The relations after a description all apply to it: C{A < B < C} is A
+immediately dominating B and C. Parentheses apply relations to the other
+node: C{A < (B < C)}. C{!} negates a relation: C{VP !< {pos=EF}}. The head
+child of a node is the one with the head flag of L{parsed.Node}.
+
+Searching
+=========
+::
+
+	query = compile('NP_SBJ << (NP_PRN <<# {pos=JKS})')
+	for tree in ForestWalker('BGJO0150.bnk'):
+		for node, names in query.matches(tree):
+			do (node)
+
+	for tree, node, names in query.search_treebank(treebank):
+		do (node)
+
+	for match in search_files(pattern, files, max_workers=8):
+		print(match.file, match.tree_id, match.label, match.begin, match.end)
+
+L{Query.search_treebank} reads only the trees that have all the labels and
+morphs required by a pattern, from the indexes of a L{parsed.TreeBank}.
+L{search_files} splits the files into chunks searched by worker
+processes, which parse only the trees whose text contains these labels and
+morphs.
+"""
+__docformat__ = 'epytext'
+import io
+import os
+import re
+from collections import namedtuple
+from functools import lru_cache, partial
+from concurrent.futures import ProcessPoolExecutor
+
+# intra-package references
+from .parsed import ForestWalker, TerminalNode, split_chunks, _read_chunk
+from .source import detect_file_encoding, is_ascii_compatible
+
+
+class QueryParseError(Exception):
+	def __init__(self, message):
+		self.message = message
+	def __str__(self):
+		return repr(self.message)
+
+
+_TOKEN = re.compile(r"""\s*(?:
+	(<<\#|>>\#|<\#|>\#|<<|>>|<:|<|>|\$\+|\$-|\$)	# relation
+	|(!)
+	|(\()
+	|(\))
+	|=(\w+)										# name
+	|\{([^}]*)\}								# morph constraints
+	|/((?:[^/\\]|\\.)*)/						# label regular expression
+	|(__)
+	|([^\s<>$!()=|{}/]+(?:\|[^\s<>$!()=|{}/]+)*)	# labels
+	)""", re.X)
+
+_CONSTRAINT = re.compile(r'\s*(form|pos|morph)\s*=\s*(/(?:[^/\\]|\\.)*/|[^\s,]+)\s*,?')
+
+
+#===============================================================
+# NODE RELATIONS
+
+def _children(node):
+	first = getattr(node, 'first_child', None)
+	if first is None:
+		return ()
+	second = node.second_child
+	return (first,) if second is None else (first, second)
+
+def _descendants(node):
+	stack = list(reversed(_children(node)))
+	while stack:
+		n = stack.pop()
+		yield n
+		stack.extend(reversed(_children(n)))
+
+def _parent(node):
+	return () if node.parent is None else (node.parent,)
+
+def _ancestors(node):
+	node = node.parent
+	while node is not None:
+		yield node
+		node = node.parent
+
+def _only_child(node):
+	children = _children(node)
+	return children if len(children) == 1 else ()
+
+def _sisters(node):
+	return tuple(n for n in _children(node.parent) if n is not node) if node.parent is not None else ()
+
+def _right_sister(node):
+	p = node.parent
+	if p is not None and p.first_child is node and p.second_child is not None:
+		return (p.second_child,)
+	return ()
+
+def _left_sister(node):
+	p = node.parent
+	if p is not None and p.second_child is node:
+		return (p.first_child,)
+	return ()
+
+def _head_child(node):
+	return tuple(n for n in _children(node) if n.is_head())[:1]
+
+def _heads(node):
+	while True:
+		children = _head_child(node)
+		if not children:
+			return
+		node = children[0]
+		yield node
+
+def _head_parent(node):
+	return (node.parent,) if node.parent is not None and node.is_head() else ()
+
+def _head_ancestors(node):
+	while node.parent is not None and node.is_head():
+		node = node.parent
+		yield node
+
+RELATIONS = {
+	'<<': _descendants,
+	'<': _children,
+	'>>': _ancestors,
+	'>': _parent,
+	'<:': _only_child,
+	'$': _sisters,
+	'$+': _right_sister,
+	'$-': _left_sister,
+	'<#': _head_child,
+	'<<#': _heads,
+	'>#': _head_parent,
+	'>>#': _head_ancestors,
+}
+"""relation -> function of a node to the related nodes"""
+
+
+#===============================================================
+# PATTERNS
+
+def _value(s):
+	if len(s) >= 2 and s[0] == '/' and s[-1] == '/':
+		return re.compile(s[1:-1])
+	return s
+
+def _value_matches(value, s):
+	if isinstance(value, str):
+		return value == s
+	return value.search(s) is not None
+
+
+class NodeDescription:
+	"""
+	Description of a node: labels, a label regular expression, morph
+	constraints or any node.
+	"""
+	def __init__(self, labels=None, regex=None, morph=None, name=None):
+		"""
+		:param labels: set of labels
+		:param regex: compiled regular expression of labels
+		:param morph: dict of C{form}, C{pos} -> value or compiled regular
+		  expression, for terminals
+		:param name: name of the matched node
+		"""
+		self.labels = labels
+		self.regex = regex
+		self.morph = morph
+		self.name = name
+
+	def match(self, node):
+		if self.morph is not None:
+			if not isinstance(node, TerminalNode):
+				return False
+			for m in node.word.morphs:
+				if all(_value_matches(v, getattr(m, k)) for k, v in self.morph.items()):
+					return True
+			return False
+		if self.labels is None and self.regex is None:
+			return True
+		if isinstance(node, TerminalNode):
+			return False
+		if self.labels is not None:
+			return node.name in self.labels
+		return self.regex.search(node.name) is not None
+
+	def required(self):
+		"""
+		:return: (labels, morphs): a set of labels, one of which is in
+		  every tree that has a matching node, and a set of (form, pos)
+		  of which one is, with None for an unknown form or pos
+		"""
+		if self.labels is not None:
+			return set(self.labels), None
+		if self.morph is not None:
+			form, pos = self.morph.get('form'), self.morph.get('pos')
+			form = form if isinstance(form, str) else None
+			pos = pos if isinstance(pos, str) else None
+			if form is not None or pos is not None:
+				return None, {(form, pos)}
+		return None, None
+
+
+class Pattern:
+	"""
+	A node description and its relations to other patterns.
+	"""
+	def __init__(self, description, relations=None):
+		"""
+		:type description: L{NodeDescription}
+		:param relations: list of (relation, negated, L{Pattern})
+		"""
+		self.description = description
+		self.relations = relations or []
+
+	def match(self, node, names):
+		"""
+		:param names: dict to which the named nodes are added
+		:rtype: boolean
+		"""
+		if not self.description.match(node):
+			return False
+		for relation, negated, pattern in self.relations:
+			found = False
+			for other in RELATIONS[relation](node):
+				if pattern.match(other, names):
+					found = True
+					break
+			if found == negated:
+				return False
+		if self.description.name is not None:
+			names[self.description.name] = node
+		return True
+
+	def required(self):
+		"""
+		:return: list of (labels, morphs) of L{NodeDescription.required},
+		  all of which are in a tree that matches
+		"""
+		groups = []
+		labels, morphs = self.description.required()
+		if labels is not None or morphs is not None:
+			groups.append((labels, morphs))
+		for relation, negated, pattern in self.relations:
+			if not negated:
+				groups.extend(pattern.required())
+		return groups
+
+
+class _Parser:
+	def __init__(self, text):
+		self.text = text
+		self.tokens = []
+		pos = 0
+		text = text.rstrip()
+		while pos < len(text):
+			m = _TOKEN.match(text, pos)
+			if m is None or m.end() == pos:
+				raise QueryParseError('syntax error at {}: {}'.format(pos, self.text))
+			self.tokens.append((m.lastindex, m.group(m.lastindex)))
+			pos = m.end()
+		self.i = 0
+
+	def peek(self):
+		return self.tokens[self.i] if self.i < len(self.tokens) else (None, None)
+
+	def next(self):
+		token = self.peek()
+		self.i += 1
+		return token
+
+	def parse(self):
+		pattern = self.pattern()
+		if self.i < len(self.tokens):
+			raise QueryParseError('unexpected {} in {}'.format(self.peek()[1], self.text))
+		return pattern
+
+	def pattern(self):
+		kind, value = self.next()
+		if kind == 3:			# (
+			pattern = self.pattern()
+			if self.next()[0] != 4:
+				raise QueryParseError('missing ) in {}'.format(self.text))
+		else:
+			pattern = Pattern(self.description(kind, value))
+		while True:
+			kind, value = self.peek()
+			negated = False
+			if kind == 2:		# !
+				self.next()
+				negated = True
+				kind, value = self.peek()
+			if kind != 1:
+				if negated:
+					raise QueryParseError('no relation after ! in {}'.format(self.text))
+				return pattern
+			self.next()
+			pattern.relations.append((value, negated, self.target()))
+
+	def target(self):
+		kind, value = self.next()
+		if kind == 3:
+			pattern = self.pattern()
+			if self.next()[0] != 4:
+				raise QueryParseError('missing ) in {}'.format(self.text))
+			return pattern
+		return Pattern(self.description(kind, value))
+
+	def description(self, kind, value):
+		if kind == 9:
+			d = NodeDescription(labels=set(value.split('|')))
+		elif kind == 7:
+			d = NodeDescription(regex=re.compile(value))
+		elif kind == 8:
+			d = NodeDescription()
+		elif kind == 6:
+			d = NodeDescription(morph=self.constraints(value))
+		else:
+			raise QueryParseError('no node description at {} in {}'.format(value, self.text))
+		if self.peek()[0] == 5:
+			d.name = self.next()[1]
+		return d
+
+	def constraints(self, text):
+		morph = {}
+		pos = 0
+		text = text.strip()
+		while pos < len(text):
+			m = _CONSTRAINT.match(text, pos)
+			if m is None or m.end() == pos:
+				raise QueryParseError('bad morph constraint {{{}}} in {}'.format(text, self.text))
+			key, value = m.group(1), m.group(2)
+			if key == 'morph':
+				form, sep, p = value.rpartition('/')
+				if not sep or not form:
+					raise QueryParseError('morph must be form/pos: {}'.format(value))
+				morph['form'], morph['pos'] = form, p
+			else:
+				morph[key] = _value(value)
+			pos = m.end()
+		if not morph:
+			raise QueryParseError('empty morph constraint in {}'.format(self.text))
+		return morph
+
+
+#===============================================================
+# QUERIES
+
+QueryMatch = namedtuple('QueryMatch', ['file', 'tree_id', 'sentence', 'label', 'begin', 'end', 'names'])
+QueryMatch.__doc__ = """A match of L{search_files}: the ords of the first and the last
+terminal (C{begin}, C{end}) of the node, and the names of the named nodes
+to their (label, begin, end)."""
+
+
+def _span(node):
+	first = last = node
+	while getattr(first, 'first_child', None) is not None:
+		first = first.first_child
+	while getattr(last, 'first_child', None) is not None:
+		last = last.second_child or last.first_child
+	return first.ord, last.ord
+
+
+class Query:
+	"""
+	A compiled tree pattern.
+	"""
+	def __init__(self, text):
+		"""
+		:param text: pattern
+		:raise QueryParseError: if the pattern is malformed
+		"""
+		self.text = text
+		self.pattern = _Parser(text).parse()
+		self.required = self.pattern.required()
+		"""list of (labels, morphs): one of the labels or morphs of each
+		item is in every tree that matches"""
+
+	def matches(self, tree):
+		"""
+		Iterate the matches in a tree, in preorder.
+
+		:type tree: L{parsed.Tree}
+		:rtype: iterator of (node, names)
+		"""
+		stack = [tree.root]
+		while stack:
+			node = stack.pop()
+			names = {}
+			if self.pattern.match(node, names):
+				yield node, names
+			stack.extend(reversed(_children(node)))
+
+	def search(self, trees):
+		"""
+		:param trees: iterable of L{parsed.Tree}, e.g. a L{parsed.ForestWalker}
+		:rtype: iterator of (tree, node, names)
+		"""
+		for tree in trees:
+			for node, names in self.matches(tree):
+				yield tree, node, names
+
+	def candidates(self, treebank):
+		"""
+		:type treebank: L{parsed.TreeBank}
+		:return: the sorted numbers of the trees of a treebank that have
+		  the labels and the morphs required by the pattern
+		"""
+		result = None
+		for labels, morphs in self.required:
+			numbers = set()
+			for label in labels or ():
+				numbers.update(treebank.getTreeNumbers(label=label))
+			for form, pos in morphs or ():
+				if form is None:
+					# no index by part of speech alone
+					numbers = None
+					break
+				numbers.update(treebank.getTreeNumbers(form=form, pos=pos))
+			if numbers is None:
+				continue
+			result = numbers if result is None else result & numbers
+		if result is None:
+			return list(range(len(treebank)))
+		return sorted(result)
+
+	def search_treebank(self, treebank):
+		"""
+		Search the candidate trees of a L{parsed.TreeBank}.
+
+		:rtype: iterator of (tree, node, names)
+		"""
+		for n in self.candidates(treebank):
+			tree = treebank[n]
+			if not hasattr(tree, 'root'):
+				tree = tree.to_tree()		# compact tree
+			for node, names in self.matches(tree):
+				yield tree, node, names
+
+	def literals(self, encoding='utf-8'):
+		"""
+		:return: list of tuples of bytes, one of which is in the text of
+		  every tree that matches
+		"""
+		groups = []
+		for labels, morphs in self.required:
+			group = set()
+			for label in labels or ():
+				group.add(('(' + label).encode(encoding))
+			for form, pos in morphs or ():
+				group.add((form if form is not None else '/' + pos).encode(encoding))
+			groups.append(tuple(group))
+		return groups
+
+
+@lru_cache(maxsize=256)
+def compile(text):
+	"""
+	:rtype: L{Query}
+	:raise QueryParseError: if the pattern is malformed
+	"""
+	return Query(text)
+
+
+_TREE_START = re.compile(br'^; ', re.M)
+
+def _search_chunk(chunk, text, encoding=None):
+	filename, begin, end, first = chunk
+	query = compile(text)
+	if encoding is None:
+		encoding = detect_file_encoding(filename)
+	if is_ascii_compatible(encoding):
+		with open(filename, 'rb') as file:
+			file.seek(begin)
+			data = file.read(end - begin)
+	else:
+		data = _read_chunk(chunk, encoding).encode('utf-8')
+		encoding = 'utf-8'
+	literals = query.literals(encoding)
+
+	results = []
+	starts = [m.start() for m in _TREE_START.finditer(data)] + [len(data)]
+	for k in range(len(starts) - 1):
+		tree_text = data[starts[k]:starts[k + 1]]
+		if not all(any(l in tree_text for l in group) for group in literals):
+			continue
+		fw = ForestWalker(io.StringIO(tree_text.decode(encoding)))
+		fw.number_of_trees = first + k
+		tree = fw.readtree()
+		for node, names in query.matches(tree):
+			begin_ord, end_ord = _span(node)
+			results.append(QueryMatch(filename, tree.id, tree.sentence.form, node.name, begin_ord, end_ord,
+				{name: (n.name,) + _span(n) for name, n in names.items()}))
+	return results
+
+
+def search_files(text, filenames, max_workers=None, chunk_size=1 << 20, encoding=None):
+	"""
+	Search parsed corpus files in a process pool.
+
+	:param text: pattern
+	:param filenames: a file name or a list of file names
+	:param max_workers: number of worker processes, 1 to search in this
+	  process
+	:param encoding: encoding of the files, detected for each file if None
+	:rtype: iterator of L{QueryMatch}, in the order of the files and the
+	  trees
+	:raise QueryParseError: if the pattern is malformed
+	"""
+	compile(text)
+	if isinstance(filenames, (str, os.PathLike)):
+		filenames = [filenames]
+	chunks = [c for filename in filenames for c in split_chunks(os.fspath(filename), chunk_size)]
+	search = partial(_search_chunk, text=text, encoding=encoding)
+	if max_workers == 1:
+		for chunk in chunks:
+			yield from search(chunk)
+		return
+
+	with ProcessPoolExecutor(max_workers=max_workers) as executor:
+		for results in executor.map(search, chunks):
+			yield from results
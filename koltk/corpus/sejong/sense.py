@@ -31,6 +31,8 @@ example::
     file = codecs.open(filename, encodeing='utf-8')
     corpus = Corpus(file)
 
+    corpus = Corpus('BSAA0001.txt')     # original file, UTF-16 in XML
+
     corpus.readsentence()
 
     for sentence in corpus:
@@ -60,8 +62,12 @@ Structure
 #__docformat__ = 'restructuredtext'
 
 
+import os
 import re
 
+# intra-package references
+from .source import SejongTextFile
+
 class Word:
     """
     A word in a sentence.
@@ -170,7 +176,15 @@ class Corpus:
     """Sejong Sense Tagged Corpus.
     """
 
-    def __init__(self, file):
+    def __init__(self, file, encoding=None):
+        """
+        :param file: a file object opened in text mode, or a file name of an
+          original or a plain text corpus file
+        :param encoding: encoding of the file when a file name is given,
+          detected if None
+        """
+        if isinstance(file, (str, os.PathLike)):
+            file = SejongTextFile(file, encoding)
         self.file = file
 
     def __iter__(self):
@@ -0,0 +1,339 @@
+# -*- coding: utf-8; tab-width: 4 -*-
+# Original Sejong Corpus Files
+# $Id$
+
+"""
+Reading the original Sejong corpus files.
+
+The files are distributed in UTF-16 (with a byte order mark) or CP949,
+wrapped in TEI XML: a C{<!DOCTYPE ...>} declaration, a C{<teiHeader>} and
+C{<text>}, C{<body>}, C{<p>}, ... elements around the corpus lines::
+
+	<!DOCTYPE tei.2 SYSTEM "c:\\Tei_dtd\\tei2.dtd" [
+	<!ENTITY % TEI.corpus "INCLUDE"> ...
+	]>
+	<tei.2>
+	<teiHeader> ... </teiHeader>
+	<text>
+	<body>
+	<p>
+	; 프랑스의 세계적인 의상 디자이너 엠마누엘 웅가로가 ...
+	(S	(NP_SBJ	...
+	</p>
+	...
+
+L{SejongTextFile} reads such a file as a text file of the corpus lines
+only. The encoding is detected from the head of the file, the bytes are
+decoded incrementally in large chunks, and the declarations, the header
+and the lines of the known TEI wrapper tags are dropped on the fly. The
+corpus lines themselves are never changed, even if they hold something
+like a tag, e.g. C{; 영화 <Matrix>를 봤다.}, and a file that does not
+begin with an XML prolog or a TEI element is not stripped at all.
+::
+
+	file = open_sejong('BGJO0150.txt')		# no preprocessing
+	fw = ForestWalker(file)
+
+Byte offsets of lines, as in L{parsed.TreeIndex}, can be used only with an
+ASCII-compatible encoding (UTF-8, CP949), see L{is_ascii_compatible}.
+"""
+__docformat__ = 'epytext'
+import codecs
+import os
+import re
+
+BUFFER_SIZE = 1 << 20
+HEAD_SIZE = 4096
+
+# the elements that wrap the corpus lines of the TEI files
+_WRAPPER_TAG = re.compile(r"""
+	</?(?:tei\.2|text|group|body|front|back|div\d?|p|head)(?:\s[^<>]*)?/?>
+	|<\?xml[^>]*\?>|<!DOCTYPE[^>]*>|<!--.*?-->
+""", re.I | re.X)
+_WRAPPER_START = re.compile(r'^\s*<(?:\?xml|!DOCTYPE|tei\.2\b|teiHeader\b)', re.I | re.M)
+_XML_ENCODING = re.compile(br'<\?xml[^>]*encoding\s*=\s*["\']([\w.:-]+)["\']')
+
+
+def detect_encoding(head):
+	"""
+	Detect the encoding of a file from its first bytes: a byte order mark,
+	the zero bytes of UTF-16, an XML declaration, or a strict UTF-8 decoding,
+	and CP949 otherwise.
+
+	:param head: the first bytes of a file, a few kilobytes
+	:rtype: string
+	"""
+	if head.startswith(codecs.BOM_UTF8):
+		return 'utf-8-sig'
+	if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+		return 'utf-16'
+	if len(head) >= 2:
+		even, odd = head[0::2].count(0), head[1::2].count(0)
+		if odd > len(head) // 8 and even == 0:
+			return 'utf-16-le'
+		if even > len(head) // 8 and odd == 0:
+			return 'utf-16-be'
+
+	m = _XML_ENCODING.search(head)
+	if m:
+		encoding = m.group(1).decode('ascii').lower()
+		# CP949 is the superset of EUC-KR used by the corpus
+		return 'cp949' if encoding in ('euc-kr', 'euc_kr', 'ks_c_5601-1987') else encoding
+
+	try:
+		codecs.getincrementaldecoder('utf-8')().decode(head, False)
+		return 'utf-8'
+	except UnicodeDecodeError:
+		return 'cp949'
+
+
+def detect_file_encoding(filename):
+	"""
+	:rtype: string
+	"""
+	return detect_file(filename)[0]
+
+
+def is_xml_wrapped(head, encoding):
+	"""
+	:param head: the first bytes of a file
+	:return: True if the file begins with an XML prolog or a TEI element,
+	  as the original corpus files do
+	"""
+	text = codecs.getincrementaldecoder(encoding)('replace').decode(head, False)
+	return _WRAPPER_START.search(text) is not None
+
+
+def detect_file(filename):
+	"""
+	:rtype: (encoding, True if the file is wrapped in XML)
+	"""
+	with open(filename, 'rb') as file:
+		head = file.read(HEAD_SIZE)
+	encoding = detect_encoding(head)
+	return encoding, is_xml_wrapped(head, encoding)
+
+
+def is_ascii_compatible(encoding):
+	"""
+	:return: True if the ASCII characters, such as newlines and the C{'; '}
+	  of sentence form lines, are single bytes of their ASCII codes in the
+	  encoding, so that byte offsets of lines are meaningful
+	"""
+	name = codecs.lookup(encoding).name
+	if name == 'utf-8-sig':
+		return True
+	try:
+		return '\n; <>()'.encode(name) == b'\n; <>()'
+	except UnicodeError:
+		return False
+
+
+class SejongTextFile:
+	"""SejongTextFile
+
+	A read-only text file of the corpus lines of an original Sejong file.
+	Lines end with C{'\\n'}. With C{strip_xml}, the XML and document type
+	declarations, comments and the C{<teiHeader>} element are dropped, and
+	so are the lines of the wrapper tags (C{<text>}, C{<body>}, C{<p>},
+	C{<head>}, ...). Only lines that begin with C{<} are looked at: the tree,
+	sentence and word lines are passed as they are.
+	"""
+	def __init__(self, file, encoding=None, strip_xml=None, buffer_size=BUFFER_SIZE):
+		"""
+		:param file: a file name, or a file object opened in binary mode
+		:param encoding: encoding of the file, detected if None
+		:param strip_xml: drop the XML wrapper, if the file begins with one
+		  when None
+		:param buffer_size: number of bytes to decode at a time
+		"""
+		if isinstance(file, (str, os.PathLike)):
+			self.name = os.fspath(file)
+			self.raw = open(self.name, 'rb')
+		else:
+			self.name = getattr(file, 'name', None)
+			self.raw = file
+		if encoding is None or strip_xml is None:
+			pos = self.raw.tell()
+			head = self.raw.read(HEAD_SIZE)
+			self.raw.seek(pos)
+			if encoding is None:
+				encoding = detect_encoding(head)
+			if strip_xml is None:
+				strip_xml = is_xml_wrapped(head, encoding)
+		self.encoding = encoding
+		self.strip_xml = strip_xml
+		self.buffer_size = buffer_size
+		self.__reset()
+
+	def __reset(self):
+		self.__decoder = codecs.getincrementaldecoder(self.encoding)()
+		self.__lines = []
+		self.__i = 0
+		self.__rest = ''
+		self.__eof = False
+		self.__skip_until = None
+
+	def __fill(self):
+		"""
+		Decode the next buffer into lines, until there is a line or the end
+		of the file.
+		"""
+		while self.__i >= len(self.__lines) and not self.__eof:
+			data = self.raw.read(self.buffer_size)
+			text = self.__rest + self.__decoder.decode(data, not data)
+			lines = text.split('\n')
+			self.__rest = lines.pop()
+			lines = [(l[:-1] if l.endswith('\r') else l) + '\n' for l in lines]
+			if not data:
+				self.__eof = True
+				if self.__rest:
+					lines.append(self.__rest)	# last line without a newline
+				self.__rest = ''
+			if self.strip_xml:
+				lines = self.__strip(lines)
+			self.__lines = lines
+			self.__i = 0
+
+	def __strip(self, lines):
+		out = []
+		for line in lines:
+			if self.__skip_until is not None:
+				if self.__skip_until in line:
+					self.__skip_until = None
+				continue
+			if '<' not in line:
+				out.append(line)
+				continue
+			s = line.lstrip()
+			if not s.startswith('<'):
+				out.append(line)	# corpus line
+				continue
+
+			if s.startswith('<teiHeader'):
+				if '</teiHeader>' not in line:
+					self.__skip_until = '</teiHeader>'
+				continue
+			if s.startswith('<!DOCTYPE') and '[' in line and ']>' not in line:
+				self.__skip_until = ']>'
+				continue
+			if s.startswith('<!--') and '-->' not in line:
+				self.__skip_until = '-->'
+				continue
+
+			stripped = _WRAPPER_TAG.sub('', line)
+			if stripped == line:
+				out.append(line)	# not a wrapper tag
+			elif stripped.strip() != '':
+				out.append(stripped.lstrip())
+		return out
+
+	def readline(self):
+		"""
+		:return: the next line, or '' at the end of the file
+		"""
+		if self.__i >= len(self.__lines):
+			self.__fill()
+			if self.__i >= len(self.__lines):
+				return ''
+		line = self.__lines[self.__i]
+		self.__i += 1
+		return line
+
+	def read(self, size=-1):
+		"""
+		:param size: approximate number of characters, in whole lines, or
+		  -1 for the rest of the file
+		"""
+		parts = []
+		n = 0
+		while size < 0 or n < size:
+			if self.__i >= len(self.__lines):
+				self.__fill()
+				if self.__i >= len(self.__lines):
+					break
+			lines = self.__lines[self.__i:]
+			self.__lines, self.__i = [], 0
+			parts.extend(lines)
+			n += sum(len(l) for l in lines)
+		return ''.join(parts)
+
+	def __iter__(self):
+		return self
+
+	def __next__(self):
+		line = self.readline()
+		if line == '':
+			raise StopIteration
+		return line
+
+	def seekable(self):
+		return is_ascii_compatible(self.encoding) and self.raw.seekable()
+
+	def seek(self, offset):
+		"""
+		Move to a byte offset of the file, at the beginning of a line.
+
+		:raise ValueError: if the encoding is not ASCII-compatible
+		"""
+		if not is_ascii_compatible(self.encoding):
+			raise ValueError('byte offsets need an ASCII-compatible encoding: {}'.format(self.encoding))
+		self.raw.seek(offset)
+		self.__reset()
+
+	def close(self):
+		self.raw.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+
+class _Utf8Reader:
+	"""
+	Binary file of the UTF-8 encoded lines of a L{SejongTextFile}.
+	"""
+	def __init__(self, textfile):
+		self.textfile = textfile
+		self.name = textfile.name
+
+	def read(self, size=-1):
+		return self.textfile.read(size).encode('utf-8')
+
+	def close(self):
+		self.textfile.close()
+
+
+def open_sejong(filename, encoding=None, strip_xml=None):
+	"""
+	:param encoding: encoding of the file, detected if None
+	:param strip_xml: drop the XML wrapper, if the file begins with one
+	  when None
+	:rtype: L{SejongTextFile}
+	"""
+	return SejongTextFile(filename, encoding, strip_xml)
+
+
+def open_sejong_bytes(filename, encoding=None):
+	"""
+	Open a file for the byte level readers. A plain text file in an
+	ASCII-compatible encoding is opened as it is, and the other files are
+	decoded, stripped of XML and encoded in UTF-8.
+
+	:rtype: (binary file, encoding of its bytes)
+	"""
+	raw = open(filename, 'rb')
+	head = raw.read(HEAD_SIZE)
+	if encoding is None:
+		encoding = detect_encoding(head)
+	wrapped = is_xml_wrapped(head, encoding)
+	if is_ascii_compatible(encoding) and not wrapped:
+		if codecs.lookup(encoding).name == 'utf-8-sig':
+			raw.seek(len(codecs.BOM_UTF8) if head.startswith(codecs.BOM_UTF8) else 0)
+			return raw, 'utf-8'
+		raw.seek(0)
+		return raw, encoding
+	raw.seek(0)
+	return _Utf8Reader(SejongTextFile(raw, encoding, wrapped)), 'utf-8'
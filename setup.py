@@ -18,4 +18,7 @@ setuptools.setup(
         "Operating System :: OS Independent",
     ],
     python_requires='>=3.8',
+    extras_require={
+        'numpy': ['numpy'],
+    },
 )
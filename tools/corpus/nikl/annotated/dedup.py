@@ -0,0 +1,35 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+""" dedup : finds duplicate sentences in NIKL annotated corpora
+
+prints one cluster of duplicate sentences per line in JSON:
+{"kind": "exact" or "near", "ids": [sentence ids]}
+
+USAGE:
+
+$ dedup.py [-j WORKERS] [--exact] [-t 0.8] NIKL_MESSENGER/ > duplicates.jsonl
+"""
+
+import json
+import argparse
+from koltk.corpus.nikl.annotated.dedup import find_duplicates
+
+
+def main():
+    parser = argparse.ArgumentParser(description='find duplicate sentences in NIKL annotated corpora')
+    parser.add_argument('path', help='corpus file or directory')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='number of worker processes')
+    parser.add_argument('--exact', action='store_true', help='find exact duplicates only')
+    parser.add_argument('-t', '--threshold', type=float, default=0.8,
+                        help='minimum Jaccard similarity of near-duplicates')
+    parser.add_argument('--pattern', default='*.json', help='corpus file name pattern')
+    args = parser.parse_args()
+
+    clusters = find_duplicates(args.path, pattern=args.pattern, near=not args.exact,
+                               threshold=args.threshold, max_workers=args.jobs)
+    for cluster in clusters:
+        print(json.dumps(cluster._asdict(), ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
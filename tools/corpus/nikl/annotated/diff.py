@@ -0,0 +1,37 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+""" diff : differences between two versions of a NIKL annotated corpus
+
+prints one difference per line:
+status, layer, document id, sentence id and item key, separated by tabs.
+With -s, prints the number of differences per layer instead.
+
+USAGE:
+
+$ diff.py [-j WORKERS] [-s] NIKL_NE_2019/ NIKL_NE_2020/ > ne.diff
+"""
+
+import argparse
+from koltk.corpus.nikl.annotated.diff import diff, summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='diff two versions of a NIKL annotated corpus')
+    parser.add_argument('old', help='corpus file or directory of the old version')
+    parser.add_argument('new', help='corpus file or directory of the new version')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='number of worker processes')
+    parser.add_argument('-s', '--summary', action='store_true', help='print counts per layer')
+    parser.add_argument('--pattern', default='*.json', help='corpus file name pattern')
+    args = parser.parse_args()
+
+    items = diff(args.old, args.new, pattern=args.pattern, max_workers=args.jobs)
+    if args.summary:
+        for (layer, status), count in sorted(summary(items).items()):
+            print('%s\t%s\t%d' % (layer, status, count))
+    else:
+        for item in items:
+            print('\t'.join('' if x is None else str(x) for x in item))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+""" kwic : keyword in context concordances of NIKL annotated corpora
+
+builds or updates the index, then prints one concordance line per hit:
+sentence id, left context, keyword, right context separated by tabs
+
+USAGE:
+
+$ kwic.py messenger.kwic --add NIKL_MESSENGER/ -j 8
+$ kwic.py messenger.kwic --morpheme 먹/VV --sort left -w 20 -p 0
+$ kwic.py messenger.kwic --sense 책 1
+"""
+
+import argparse
+from koltk.corpus.nikl.annotated.kwic import KWICIndex
+
+
+def main():
+    parser = argparse.ArgumentParser(description='keyword in context concordances of NIKL annotated corpora')
+    parser.add_argument('index', help='index file')
+    parser.add_argument('--add', metavar='PATH', help='index the corpus files of a file or directory')
+    parser.add_argument('--pattern', default='*.json', help='corpus file name pattern')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='number of worker processes')
+    query = parser.add_mutually_exclusive_group()
+    query.add_argument('--form', help='word form')
+    query.add_argument('--morpheme', help='morpheme as form/label')
+    query.add_argument('--ne', help='NE label')
+    query.add_argument('--sense', nargs=2, metavar=('WORD', 'SENSE_ID'), help='WSD sense')
+    parser.add_argument('--sort', choices=['left', 'right'], default=None, help='sort by context')
+    parser.add_argument('-w', '--width', type=int, default=40, help='context width in characters')
+    parser.add_argument('-p', '--page', type=int, default=0, help='page number from 0')
+    parser.add_argument('-n', '--page-size', type=int, default=50, help='hits per page')
+    args = parser.parse_args()
+
+    with KWICIndex(args.index) as index:
+        if args.add:
+            index.add(args.add, pattern=args.pattern, max_workers=args.jobs)
+
+        sense = (args.sense[0], int(args.sense[1])) if args.sense else None
+        if args.form or args.morpheme or args.ne or sense:
+            for hit in index.query(sort=args.sort, width=args.width, page=args.page,
+                                   page_size=args.page_size, form=args.form,
+                                   morpheme=args.morpheme, ne=args.ne, sense=sense):
+                print('\t'.join(hit))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+""" split : splits a NIKL annotated corpus file into shards
+
+writes the shard files and manifest.json into the output directory.
+
+USAGE:
+
+$ split.py [-b sentence|token|byte|hash] NXRW1900000001.json 8 shards/
+"""
+
+import argparse
+from koltk.corpus.nikl.annotated.split import split, SPLIT_METHODS
+
+
+def main():
+    parser = argparse.ArgumentParser(description='split a NIKL annotated corpus file into shards')
+    parser.add_argument('file', help='corpus JSON file')
+    parser.add_argument('n', type=int, help='number of shards')
+    parser.add_argument('outdir', help='output directory')
+    parser.add_argument('-b', '--by', choices=SPLIT_METHODS, default='sentence',
+                        help='balance the shards by this unit, or assign by document id hash')
+    args = parser.parse_args()
+
+    manifest = split(args.file, args.n, args.outdir, by=args.by)
+    for shard in manifest['shards']:
+        print('%s\t%d\t%d\t%d' % (shard['file'], shard['documents'], shard['sentences'], shard['tokens']))
+
+
+if __name__ == '__main__':
+    main()
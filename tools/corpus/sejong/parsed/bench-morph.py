@@ -0,0 +1,66 @@
+#!/usr/bin/python
+# -*- coding: utf-8; tab-width: 4 -*-
+# Benchmarks the morph string parsing of the Sejong readers
+# $Id$
+
+""" bench-morph : measures the morph string parser and the memory of trees
+
+The trees are loaded with ForestWalker while tracemalloc counts the memory
+they hold, caches of the parser included as they are cold at first. Then
+the morph strings of their terminals are parsed again with
+parse_morph_string.
+
+USAGE:
+
+$ bench-morph BGJO0150.bnk BGJO0151.bnk ...
+$ bench-morph -r 5 sejong-parsed.bnk
+"""
+
+import argparse
+import time
+import tracemalloc
+from koltk.corpus.sejong.parsed import ForestWalker, parse_morph_string
+
+
+def load_trees(filenames):
+	trees = []
+	for filename in filenames:
+		with ForestWalker(filename) as fw:
+			trees.extend(fw)
+	return trees
+
+def traced(func, *args):
+	"""
+	:return: (result, bytes held by the result, seconds)
+	"""
+	tracemalloc.start()
+	start = time.perf_counter()
+	result = func(*args)
+	elapsed = time.perf_counter() - start
+	size = tracemalloc.get_traced_memory()[0]
+	tracemalloc.stop()
+	return result, size, elapsed
+
+def main():
+	parser = argparse.ArgumentParser(description='measure the Sejong morph string parser and the memory of trees')
+	parser.add_argument('files', nargs='+', help='parsed corpus files (.bnk)')
+	parser.add_argument('-r', '--repeat', type=int, default=3, help='number of runs, the best is reported')
+	args = parser.parse_args()
+
+	trees, size, elapsed = traced(load_trees, args.files)
+	print('trees\t%d\t%.1f MB\t%.0f bytes/tree\t%.3f s (traced)' % (len(trees), size / 1e6, size / len(trees), elapsed))
+	strings = [t.morph_string for tree in trees for t in tree.lexical_nodes]
+	del trees
+
+	best = None
+	for _ in range(args.repeat):
+		start = time.perf_counter()
+		for s in strings:
+			parse_morph_string(s)
+		elapsed = time.perf_counter() - start
+		best = elapsed if best is None else min(best, elapsed)
+	print('morph strings\t%d (%d distinct)' % (len(strings), len(set(strings))))
+	print('parse\t%.3f s\t%.0f strings/s' % (best, len(strings) / best))
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,73 @@
+#!/usr/bin/python
+# -*- coding: utf-8; tab-width: 4 -*-
+# Benchmarks the readers of the Sejong Parsed Corpus
+# $Id$
+
+""" bench-readtree : compares the throughput of the tree readers
+
+ForestWalker.readtree (line based), BracketReader (tokenizer) and
+read_compact (tokenizer into a CompactForest) read the same files, and
+their number of trees and terminals are checked to agree.
+
+USAGE:
+
+$ bench-readtree BGJO0150.bnk BGJO0151.bnk ...
+$ bench-readtree -r 5 sejong-parsed.bnk
+"""
+
+import argparse
+import os
+import time
+from koltk.corpus.sejong.parsed import ForestWalker
+from koltk.corpus.sejong.bracket import BracketReader, read_compact
+
+
+def count_readtree(filename):
+	with ForestWalker(filename) as fw:
+		return count_trees(fw)
+
+def count_bracket(filename):
+	with BracketReader(filename) as reader:
+		return count_trees(reader)
+
+def count_compact(filename):
+	forest = read_compact(filename)
+	return len(forest), sum(1 for code in forest.morph if code >= 0)
+
+def count_trees(trees):
+	n = terminals = 0
+	for tree in trees:
+		n += 1
+		terminals += len(tree.lexical_nodes)
+	return n, terminals
+
+READERS = [
+	('readtree', count_readtree),
+	('bracket', count_bracket),
+	('compact', count_compact),
+]
+
+def main():
+	parser = argparse.ArgumentParser(description='compare the throughput of the Sejong parsed tree readers')
+	parser.add_argument('files', nargs='+', help='parsed corpus files (.bnk)')
+	parser.add_argument('-r', '--repeat', type=int, default=3, help='number of runs, the best is reported')
+	args = parser.parse_args()
+
+	size = sum(os.path.getsize(f) for f in args.files)
+	counts = {}
+	print('reader\tseconds\ttrees/s\tMB/s')
+	for name, count in READERS:
+		best = None
+		for _ in range(args.repeat):
+			start = time.perf_counter()
+			counts[name] = [count(f) for f in args.files]
+			elapsed = time.perf_counter() - start
+			best = elapsed if best is None else min(best, elapsed)
+		trees = sum(n for n, t in counts[name])
+		print('%s\t%.3f\t%.0f\t%.2f' % (name, best, trees / best, size / best / 1e6))
+
+	if len(set(map(tuple, counts.values()))) > 1:
+		print('MISMATCH: (trees, terminals) per file', counts)
+
+if __name__ == '__main__':
+	main()
@@ -8,59 +8,29 @@
 USAGE:
 
 $ bnk2dep sejong-parsed.bnk > sejong-parsed.dep
+$ bnk2dep -j 8 BGJO0150.bnk BGJO0151.bnk ... > sejong-parsed.dep
+$ bnk2dep --brackets attach --coordination left sejong-parsed.bnk > sejong-parsed.dep
 """
 
-import codecs
+import argparse
 import sys
-import koltk.corpus.sejong.parsed
+from koltk.corpus.sejong.convert import HeadRules, write_dep
 
-class Encode:
-	def __init__(self, stdout, enc):
-		self.stdout = stdout
-		self.encoding = enc
-	def write(self, s):
-		self.stdout.buffer.write(s.encode(self.encoding))
 
+def main():
+	parser = argparse.ArgumentParser(description='convert Sejong Parsed Corpus to dependency treebank')
+	parser.add_argument('files', nargs='+', help='parsed corpus files (.bnk)')
+	parser.add_argument('-j', '--jobs', type=int, default=1,
+						help='number of worker processes, 1 (default) to convert in one process')
+	parser.add_argument('--brackets', choices=('head', 'attach'), default='head',
+						help='closing brackets are heads as any right child (default), '
+						'or attach to their left sibling')
+	parser.add_argument('--coordination', choices=('right', 'left'), default='right',
+						help='the last conjunct is the head (default), or the first one')
+	args = parser.parse_args()
 
-class Convert:
-	def __init__(self, file):
-		fw = koltk.corpus.sejong.parsed.ForestWalker(file)
-		self.bnk2dep(fw, 'utf8')
+	rules = HeadRules(brackets=args.brackets, coordination=args.coordination)
+	write_dep(args.files, sys.stdout.buffer, rules, max_workers=args.jobs)
 
-	def bnk2dep(self, fw, enc):
-		sys.stdout = Encode(sys.stdout, enc)
-		for tree in fw:
-			#print "================ beg"
-			#print "TREE_ID: ", tree.id
-			print(tree.id, ";", tree.sentence.form)
-			#print "ROOT_NODE: ", tree.root.name
-			for t in  tree.lexical_nodes:
-				#print reduce( lambda x, y :  x+" "+y, tree.get_path_to_node(t))
-				dep_parent_ord, dep_name = self.get_dep_parent_of_node(t)
-				print("%s\t%s\t%s\t%s\t%s\t%s" % (t.ord, dep_parent_ord, dep_name, t.parent.name, t.word, t.name))
-			print()
-			#print "================ end"
-
-	def get_dep_parent_of_node(self, node):
-		while(node.is_head() and node.parent is not None):
-			node = node.parent
-
-
-		dep_name = node.name
-		if node.parent is not None: 
-			node = node.parent
-
-		while(node.__class__ is not koltk.corpus.sejong.parsed.TerminalNode):
-			if node.second_child is None:
-				node = node.first_child
-			else :
-				node = node.second_child
-
-		return node.ord, dep_name
-		
 if __name__ == '__main__':
-	file = codecs.open(sys.argv[1], encoding='utf-8')
-	Convert(file)
-	file.close()
-
-
+	main()
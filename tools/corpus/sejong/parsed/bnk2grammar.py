@@ -0,0 +1,50 @@
+#!/usr/bin/python
+# -*- coding:utf-8; tab-width: 4 -*-
+# Extracts grammar rules from Sejong Parsed Corpus
+# $Id$
+
+""" bnk2grammar : extracts PCFG rules from Sejong Parsed Corpus
+
+Writes the phrasal and the lexical rules, with their counts and
+probabilities, as TSV: kind, lhs, rhs, count, probability.
+
+USAGE:
+
+$ bnk2grammar sejong-parsed.bnk > sejong.grammar.tsv
+$ bnk2grammar -j 8 --cfg BGJO0150.bnk BGJO0151.bnk ... > sejong.grammar.tsv
+$ bnk2grammar -j 8 -o sejong.grammar BGJO0150.bnk BGJO0151.bnk ...
+"""
+
+import argparse
+import sys
+from koltk.corpus.sejong.convert import HeadRules
+from koltk.corpus.sejong.grammar import extract
+
+
+def main():
+	parser = argparse.ArgumentParser(description='extract PCFG rules from Sejong Parsed Corpus')
+	parser.add_argument('files', nargs='+', help='parsed corpus files (.bnk)')
+	parser.add_argument('-j', '--jobs', type=int, default=1,
+						help='number of worker processes, 1 (default) to count in one process')
+	parser.add_argument('--cfg', action='store_true',
+						help='add up the phrasal rules without their head child')
+	parser.add_argument('--brackets', choices=('head', 'attach'), default=None,
+						help='head rule for closing brackets, see bnk2dep (default: head flags of the nodes)')
+	parser.add_argument('--coordination', choices=('right', 'left'), default=None,
+						help='head rule for coordination, see bnk2dep (default: head flags of the nodes)')
+	parser.add_argument('-o', '--output', help='save the binary grammar to a file instead of writing TSV')
+	args = parser.parse_args()
+
+	rules = None
+	if args.brackets is not None or args.coordination is not None:
+		rules = HeadRules(brackets=args.brackets or 'head', coordination=args.coordination or 'right')
+	grammar = extract(args.files, max_workers=args.jobs, rules=rules)
+	if args.output:
+		grammar.save(args.output)
+	else:
+		out = open(sys.stdout.fileno(), 'w', encoding='utf-8', closefd=False)
+		grammar.write_tsv(out, head=not args.cfg)
+		out.flush()
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,65 @@
+#!/usr/bin/python
+# -*- coding: utf-8; tab-width: 4 -*-
+# Checks that bnk2dep output does not depend on how a file is read
+# $Id$
+
+""" check-bnk2dep : regression check of the bnk2dep output of plain files
+
+A plain .bnk file is converted from an open text file, which is passed to
+ForestWalker as it is, and from its file name: ForestWalker(filename),
+and write_dep in one and in several processes, which read the file with
+encoding detection. The outputs must be the same, and the same as a saved
+output of bnk2dep if one is given. Exits with status 1 if they differ.
+
+USAGE:
+
+$ check-bnk2dep sejong-parsed.bnk
+$ check-bnk2dep sejong-parsed.bnk sejong-parsed.baseline.dep
+"""
+
+import argparse
+import io
+import sys
+from koltk.corpus.sejong.parsed import ForestWalker
+from koltk.corpus.sejong.convert import to_dep_table, write_dep
+
+
+def from_text_file(filename):
+	with open(filename, encoding='utf-8') as file:
+		return ''.join(to_dep_table(tree) for tree in ForestWalker(file)).encode('utf-8')
+
+def from_file_name(filename):
+	with ForestWalker(filename) as fw:
+		return ''.join(to_dep_table(tree) for tree in fw).encode('utf-8')
+
+def from_write_dep(filename, max_workers):
+	out = io.BytesIO()
+	write_dep(filename, out, max_workers=max_workers)
+	return out.getvalue()
+
+def main():
+	parser = argparse.ArgumentParser(description='check that bnk2dep output of a plain file is unchanged')
+	parser.add_argument('file', help='plain parsed corpus file (.bnk) in UTF-8')
+	parser.add_argument('expected', nargs='?', help='saved bnk2dep output of the file')
+	parser.add_argument('-j', '--jobs', type=int, default=2, help='number of worker processes of write_dep')
+	args = parser.parse_args()
+
+	reference = from_text_file(args.file)
+	outputs = [
+		('ForestWalker(filename)', from_file_name(args.file)),
+		('write_dep -j 1', from_write_dep(args.file, 1)),
+		('write_dep -j %d' % args.jobs, from_write_dep(args.file, args.jobs)),
+	]
+	if args.expected:
+		with open(args.expected, 'rb') as file:
+			outputs.append((args.expected, file.read()))
+
+	failed = False
+	for name, output in outputs:
+		same = output == reference
+		failed = failed or not same
+		print('%s\t%s' % ('ok' if same else 'DIFFERS', name))
+	sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+	main()